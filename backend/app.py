@@ -1,12 +1,53 @@
-from fastapi import FastAPI
+import asyncio
+import base64
+import json
+import os
+from fastapi import Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-from simulator.assembler import validate_program
-from simulator.pipeline_core import SIM
+from typing import Optional, Union
+from simulator.batch import BatchRunner
+from simulator.decoder import DECODE_CACHE
+from simulator.history import DEFAULT_HISTORY_SIZE
+from simulator.jobs import JobBusy, JobNotFound, JobPool
+from simulator.loader import parse_image
+from simulator.memory import MemoryFault
+from simulator.pipeline_core import PipelineSimulator, PROGRAM_START
+from simulator.program_cache import PROGRAM_CACHE
+from simulator.trace import DEFAULT_MAX_TRACE_CYCLES, FLAG_FLUSH, FLAG_STALL, TraceReader
+from simulator.sessions import Session, SessionNotFound, SessionPool
 
 app = FastAPI(title="RISC-V Simulator API", version="1.0.0")
 
+# Requests without a session_id share this session (single-user behaviour)
+DEFAULT_SESSION_ID = "default"
+MAX_FORKS = 64  # sessions created by one /api/sim/fork call
+STREAM_MAX_FPS = 30  # frames per second pushed by /api/sim/stream
+MAX_DIAGRAM_CYCLES = 10000  # cycles per /api/sim/trace/diagram slice
+
+# Sessions are interactive, so they keep undo history for reverse stepping;
+# batch runs and bare simulators go without it
+SESSIONS = SessionPool(
+    lambda: PipelineSimulator(history_size=DEFAULT_HISTORY_SIZE),
+    max_sessions=int(os.environ.get("SIM_MAX_SESSIONS", 256)),
+    idle_timeout=float(os.environ.get("SIM_SESSION_IDLE_TIMEOUT", 30 * 60)),
+)
+
+# Background runs for /api/jobs, with per-job quota ceilings
+JOBS = JobPool(
+    max_workers=int(os.environ.get("SIM_JOB_WORKERS", 4)),
+    max_cycles=int(os.environ.get("SIM_JOB_MAX_CYCLES", 100_000_000)),
+    max_seconds=float(os.environ.get("SIM_JOB_MAX_SECONDS", 60)),
+)
+# /api/sim/run holds a request thread: its time limit defaults to this, and both quotas
+# are capped at the job ceilings; longer runs go through /api/jobs
+SIM_RUN_MAX_SECONDS = float(os.environ.get("SIM_RUN_MAX_SECONDS", 5))
+
+# Process pool for /api/sim/batch, started on the first batch (default: one worker per core)
+BATCH = BatchRunner(max_workers=int(os.environ.get("SIM_BATCH_WORKERS", 0)) or None)
+
 # CORS configuration for React dev server
 app.add_middleware(
     CORSMiddleware,
@@ -39,25 +80,107 @@ def read_root():
 
 @app.post("/api/assemble", response_model=AssembleResponse)
 def assemble_code(request: AssembleRequest):
-    result = validate_program(request.source)
+    # addresses match where /api/sim/load places the program
+    program = PROGRAM_CACHE.get(request.source, PROGRAM_START)
     
     return AssembleResponse(
-        success=len(result["errors"]) == 0,
-        instructions=result["instructions"],
-        errors=result["errors"]
+        success=len(program.errors) == 0,
+        instructions=program.listing(),
+        errors=program.errors
     )
 
 
-class SimLoadRequest(BaseModel):
+class SimOptions(BaseModel):
+    # simulator options; omitted fields keep the session's current setting
+    hazard_policy: Optional[str] = None
+    branch_predictor: Optional[str] = None
+    bht_size: Optional[int] = None
+    btb_size: Optional[int] = None
+    branch_resolution: Optional[str] = None
+    memory_size: Optional[Union[int, str]] = None  # bytes, e.g. 65536 or "0x10000"
+    history_size: Optional[int] = None  # cycles of undo records for reverse stepping (sessions default to 1024, 0 disables)
+    profile: Optional[bool] = None  # per-PC profiler, read back from /api/sim/profile
+
+    def sim_options(self) -> dict:
+        options = {
+            "hazard_policy": self.hazard_policy,
+            "branch_predictor": self.branch_predictor,
+            "bht_size": self.bht_size,
+            "btb_size": self.btb_size,
+            "branch_resolution": self.branch_resolution,
+            "memory_size": _parse_address(self.memory_size) if self.memory_size is not None else None,
+            "history_size": self.history_size,
+            "profile": self.profile,
+        }
+        return {k: v for k, v in options.items() if v is not None}
+
+
+class SimLoadRequest(SimOptions):
     source: str
     initial_registers: Optional[dict] = None
     initial_memory: Optional[dict] = None
 
 
+class SimLoadImageRequest(SimOptions):
+    image: str  # base64 for format "bin", record text for format "ihex"
+    format: str = "bin"
+    base: Optional[Union[int, str]] = None  # load address of a raw binary (default: the program start)
+    initial_registers: Optional[dict] = None
+    initial_memory: Optional[dict] = None
+
+
+def get_session(session_id: Optional[str] = None) -> Session:
+    if not session_id:
+        return SESSIONS.get_or_create(DEFAULT_SESSION_ID)
+    try:
+        return SESSIONS.get(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session '{session_id}'")
+
+
+@app.post("/api/sessions")
+def session_create():
+    session = SESSIONS.create()
+    return {"success": True, "session_id": session.id}
+
+
+@app.get("/api/sessions")
+def session_stats():
+    return SESSIONS.stats()
+
+
+@app.delete("/api/sessions/{session_id}")
+def session_close(session_id: str):
+    try:
+        SESSIONS.close(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session '{session_id}'")
+    return {"success": True}
+
+
+@app.get("/api/decode_cache")
+def decode_cache_stats():
+    # shared by all sessions running binary images
+    return DECODE_CACHE.stats()
+
+
+@app.get("/api/program_cache")
+def program_cache_stats():
+    # assembled programs shared by /api/assemble and /api/sim/load
+    return PROGRAM_CACHE.stats()
+
+
 @app.post("/api/sim/load")
-def sim_load(req: SimLoadRequest):
+def sim_load(req: SimLoadRequest, session: Session = Depends(get_session)):
     # assemble + load into simulator with optional register and memory initialization
-    res = SIM.load_program(req.source, req.initial_registers, req.initial_memory)
+    with session.lock:
+        try:
+            options = req.sim_options()
+            if options:
+                session.sim.configure(**options)
+        except ValueError as e:
+            return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+        res = session.sim.load_program(req.source, req.initial_registers, req.initial_memory)
     if res.get("errors"):
         return {"success": False, "errors": res.get("errors", [])}
     return {
@@ -67,18 +190,500 @@ def sim_load(req: SimLoadRequest):
     }
 
 
+@app.post("/api/sim/load_image")
+def sim_load_image(req: SimLoadImageRequest, session: Session = Depends(get_session)):
+    # load a raw little-endian binary or Intel HEX image and run it from memory
+    try:
+        base = _parse_address(req.base) if req.base is not None else PROGRAM_START
+        data = base64.b64decode(req.image, validate=True) if req.format == "bin" else req.image
+        image = parse_image(data, req.format, base)
+    except ValueError as e:
+        return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+    with session.lock:
+        try:
+            options = req.sim_options()
+            if options:
+                session.sim.configure(**options)
+        except ValueError as e:
+            return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+        res = session.sim.load_image(image, req.initial_registers, req.initial_memory)
+    if res.get("errors"):
+        return {"success": False, "errors": res["errors"]}
+    return {
+        "success": True,
+        "instructions": res["instructions"],
+        "labels": {},
+        "entry": res["entry"]
+    }
+
+
 @app.post("/api/sim/step")
-def sim_step():
-    state = SIM.step()
-    return state
+def sim_step(delta: bool = False, since: Optional[int] = None, epoch: Optional[int] = None,
+             session: Session = Depends(get_session)):
+    # delta=true returns only what changed since `since` (default: the previous cycle)
+    with session.lock:
+        if delta:
+            return session.sim.step_delta(since, epoch)
+        return session.sim.step()
+
+
+@app.post("/api/sim/back")
+def sim_back(cycles: int = 1, delta: bool = False, since: Optional[int] = None, epoch: Optional[int] = None,
+             session: Session = Depends(get_session)):
+    # step backwards through the undo history
+    with session.lock:
+        start = session.sim.cycle
+        try:
+            session.sim.seek(start - max(0, cycles))
+        except ValueError as e:
+            return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+        if delta:
+            return session.sim.get_state_delta(start if since is None else since, epoch)
+        return session.sim.get_state()
+
+
+class SimSeekRequest(BaseModel):
+    cycle: int
+    delta: bool = False
+    since: Optional[int] = None
+    epoch: Optional[int] = None
+
+
+@app.post("/api/sim/seek")
+def sim_seek(req: SimSeekRequest, session: Session = Depends(get_session)):
+    # move to any cycle: undo records, then the nearest keyframe plus replay
+    with session.lock:
+        start = session.sim.cycle
+        try:
+            session.sim.seek(req.cycle)
+        except ValueError as e:
+            return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+        if req.delta:
+            return session.sim.get_state_delta(start if req.since is None else req.since, req.epoch)
+        return session.sim.get_state()
+
+
+@app.get("/api/sim/state")
+def sim_state(delta: bool = False, since: Optional[int] = None, epoch: Optional[int] = None,
+              session: Session = Depends(get_session)):
+    with session.lock:
+        if delta:
+            return session.sim.get_state_delta(since, epoch)
+        return session.sim.get_state()
+
+
+class SimRunRequest(BaseModel):
+    max_cycles: int = 10000  # capped at SIM_JOB_MAX_CYCLES
+    max_seconds: Optional[float] = None  # default SIM_RUN_MAX_SECONDS, capped at SIM_JOB_MAX_SECONDS
+    breakpoints: list[Union[int, str]] = []
+    watch_registers: list[Union[int, str]] = []
+    watch_memory: list[Union[int, str]] = []
+    delta: bool = False
+    since: Optional[int] = None
+    epoch: Optional[int] = None
+
+
+def _parse_address(value) -> int:
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+
+def _parse_register(value) -> int:
+    idx = int(value[1:]) if isinstance(value, str) and value.startswith("x") else int(value)
+    if not 0 <= idx < 32:
+        raise ValueError(f"Invalid register '{value}'")
+    return idx
+
+
+def _run_seconds(max_seconds: float | None) -> float:
+    """Time limit of a synchronous run: SIM_RUN_MAX_SECONDS by default, at most SIM_JOB_MAX_SECONDS"""
+    return max(0.0, min(SIM_RUN_MAX_SECONDS if max_seconds is None else max_seconds, JOBS.max_seconds))
+
+
+@app.post("/api/sim/run")
+def sim_run(req: SimRunRequest, session: Session = Depends(get_session)):
+    # run up to max_cycles server-side and return only the final state
+    try:
+        breakpoints = [_parse_address(a) for a in req.breakpoints]
+        watch_registers = [_parse_register(r) for r in req.watch_registers]
+        watch_memory = [_parse_address(a) for a in req.watch_memory]
+    except ValueError as e:
+        return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+    with session.lock:
+        try:
+            result = session.sim.run(
+                max_cycles=max(0, min(req.max_cycles, JOBS.max_cycles)),
+                max_seconds=_run_seconds(req.max_seconds),
+                breakpoints=breakpoints,
+                watch_registers=watch_registers,
+                watch_memory=watch_memory,
+                delta=req.delta,
+                since=req.since,
+                epoch=req.epoch,
+            )
+        except MemoryFault as e:
+            # watched address outside the configured memory
+            return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+    return {"success": True, **result}
+
+
+@app.get("/api/sim/profile")
+def sim_profile(format: str = "json", session: Session = Depends(get_session)):
+    # per-PC counters of a session loaded with profile=true, as JSON or CSV
+    if format not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}' (json or csv)")
+    with session.lock:
+        sim = session.sim
+        if sim.profiler is None:
+            return {"success": False, "errors": [{"message": "Profiling is disabled (load with profile=true)", "severity": "error"}]}
+        if format == "csv":
+            return PlainTextResponse(sim.profiler.to_csv(sim.decoded), media_type="text/csv")
+        return {"success": True, **sim.profile_report()}
+
+
+@app.delete("/api/sim/profile")
+def sim_profile_reset(session: Session = Depends(get_session)):
+    # zero the profile counters without touching the machine state
+    with session.lock:
+        if session.sim.profiler is not None:
+            session.sim.profiler.clear()
+    return {"success": True}
+
+
+@app.post("/api/sim/trace")
+def sim_trace_start(max_cycles: Optional[int] = None, session: Session = Depends(get_session)):
+    # record the following cycles to a binary trace file (replaces a running trace)
+    if max_cycles is None:
+        max_cycles = DEFAULT_MAX_TRACE_CYCLES
+    max_cycles = max(1, min(max_cycles, DEFAULT_MAX_TRACE_CYCLES))
+    with session.lock:
+        return {"success": True, **session.sim.start_trace(max_cycles=max_cycles).info()}
+
+
+@app.get("/api/sim/trace")
+def sim_trace_info(session: Session = Depends(get_session)):
+    with session.lock:
+        tracer = session.sim.tracer
+        return {"tracing": tracer is not None, **(tracer.info() if tracer is not None else {})}
+
+
+@app.get("/api/sim/trace/diagram")
+def sim_trace_diagram(first_cycle: int = 0, last_cycle: Optional[int] = None,
+                      session: Session = Depends(get_session)):
+    # pipeline diagram rows for cycles first_cycle..last_cycle of the running trace
+    if last_cycle is None:
+        last_cycle = first_cycle + MAX_DIAGRAM_CYCLES - 1
+    if last_cycle < first_cycle or last_cycle - first_cycle >= MAX_DIAGRAM_CYCLES:
+        raise HTTPException(status_code=400, detail=f"Slices span 1 to {MAX_DIAGRAM_CYCLES} cycles")
+    # read under the lock: the recorder truncates the file when the machine goes back
+    with session.lock:
+        sim = session.sim
+        if sim.tracer is None:
+            return {"success": False, "errors": [{"message": "No trace is running (POST /api/sim/trace)", "severity": "error"}]}
+        sim.tracer.flush()
+        with TraceReader(sim.tracer.path) as reader:
+            rows = list(reader.diagram(first_cycle, last_cycle))
+            # flushes of empty stages leave no flushed row, so the flagged cycles are listed too
+            flags = [(r[0], r[6]) for r in reader.records(first_cycle, last_cycle) if r[6] & (FLAG_STALL | FLAG_FLUSH)]
+        for row in rows:
+            d = sim.decoded.get(int(row["address"], 16))
+            row["instruction"] = d.raw if d is not None else None
+    return {"success": True, "first_cycle": first_cycle, "last_cycle": last_cycle, "rows": rows,
+            "stall_cycles": [c for c, f in flags if f & FLAG_STALL], "flush_cycles": [c for c, f in flags if f & FLAG_FLUSH]}
+
+
+@app.delete("/api/sim/trace")
+def sim_trace_stop(session: Session = Depends(get_session)):
+    # stop recording and delete the trace file
+    with session.lock:
+        tracer = session.sim.stop_trace()
+    return {"success": True, "records": tracer.records if tracer is not None else 0}
+
+
+@app.post("/api/sim/snapshot")
+def sim_snapshot(session: Session = Depends(get_session)):
+    # copy-on-write checkpoint of the whole machine, kept in the session
+    with session.lock:
+        snapshot = session.sim.snapshot()
+        snapshot_id = session.add_snapshot(snapshot)
+    return {"success": True, "snapshot_id": snapshot_id, **snapshot.info()}
+
+
+@app.get("/api/sim/snapshots")
+def sim_snapshots(session: Session = Depends(get_session)):
+    with session.lock:
+        return {"snapshots": {sid: snap.info() for sid, snap in session.snapshots.items()}}
+
+
+@app.delete("/api/sim/snapshots/{snapshot_id}")
+def sim_snapshot_delete(snapshot_id: str, session: Session = Depends(get_session)):
+    with session.lock:
+        if session.snapshots.pop(snapshot_id, None) is None:
+            raise HTTPException(status_code=404, detail=f"Unknown snapshot '{snapshot_id}'")
+    return {"success": True}
+
+
+class SimRestoreRequest(BaseModel):
+    snapshot_id: str
+
+
+@app.post("/api/sim/restore")
+def sim_restore(req: SimRestoreRequest, session: Session = Depends(get_session)):
+    with session.lock:
+        snapshot = session.snapshots.get(req.snapshot_id)
+        if snapshot is None:
+            raise HTTPException(status_code=404, detail=f"Unknown snapshot '{req.snapshot_id}'")
+        session.sim.restore(snapshot)
+        return {"success": True, "state": session.sim.get_state()}
+
+
+class SimForkRequest(BaseModel):
+    count: int = 1
+    snapshot_id: Optional[str] = None  # default: the session's current state
+    registers: Optional[list[Optional[dict]]] = None  # per-fork register overrides
+    memory: Optional[list[Optional[dict]]] = None  # per-fork memory word overrides
+
+
+@app.post("/api/sim/fork")
+def sim_fork(req: SimForkRequest, session: Session = Depends(get_session)):
+    # new sessions sharing memory pages copy-on-write with the source state
+    if not 1 <= req.count <= MAX_FORKS:
+        return {"success": False, "errors": [{"message": f"count must be between 1 and {MAX_FORKS}", "severity": "error"}]}
+    with session.lock:
+        if req.snapshot_id is None:
+            snapshot = session.sim.snapshot()
+        else:
+            snapshot = session.snapshots.get(req.snapshot_id)
+            if snapshot is None:
+                raise HTTPException(status_code=404, detail=f"Unknown snapshot '{req.snapshot_id}'")
+    sims = []
+    for i in range(req.count):
+        sim = PipelineSimulator.from_snapshot(snapshot)
+        registers = req.registers[i] if req.registers and i < len(req.registers) else None
+        memory = req.memory[i] if req.memory and i < len(req.memory) else None
+        errors = sim.set_inputs(registers, memory)
+        if errors:
+            return {"success": False, "errors": errors}
+        sims.append(sim)
+    session_ids = [SESSIONS.create(sim=sim).id for sim in sims]
+    return {"success": True, "session_ids": session_ids, "cycle": snapshot.cycle}
+
+
+class JobRequest(BaseModel):
+    max_cycles: Optional[int] = None  # default and ceiling: SIM_JOB_MAX_CYCLES
+    max_seconds: Optional[float] = None  # default and ceiling: SIM_JOB_MAX_SECONDS
+    breakpoints: list[Union[int, str]] = []
+    watch_registers: list[Union[int, str]] = []
+    watch_memory: list[Union[int, str]] = []
+
+
+@app.post("/api/jobs")
+def job_submit(req: JobRequest, session: Session = Depends(get_session)):
+    # run the session's simulator in the background; poll /api/jobs/{job_id}
+    try:
+        run_options = {
+            "breakpoints": [_parse_address(a) for a in req.breakpoints],
+            "watch_registers": [_parse_register(r) for r in req.watch_registers],
+            "watch_memory": [_parse_address(a) for a in req.watch_memory],
+        }
+        job = JOBS.submit(session, req.max_cycles, req.max_seconds, **run_options)
+    except (ValueError, JobBusy) as e:
+        return {"success": False, "errors": [{"message": str(e), "severity": "error"}]}
+    return {"success": True, **job.info()}
+
+
+@app.get("/api/jobs")
+def job_list():
+    return {**JOBS.stats(), "job_ids": [job.id for job in JOBS.jobs()]}
+
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str):
+    try:
+        return JOBS.get(job_id).info()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+
+
+@app.delete("/api/jobs/{job_id}")
+def job_cancel(job_id: str):
+    # cooperative: the job stops at its next check, within one check interval
+    try:
+        return {"success": True, **JOBS.cancel(job_id).info()}
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+
+
+class BatchJob(SimOptions):
+    id: Optional[Union[int, str]] = None  # echoed back; defaults to the job's index
+    source: str
+    initial_registers: Optional[dict] = None
+    initial_memory: Optional[dict] = None
+    max_cycles: int = 10000  # capped at SIM_JOB_MAX_CYCLES
+    max_seconds: Optional[float] = None  # default SIM_RUN_MAX_SECONDS, capped at SIM_JOB_MAX_SECONDS
+    engine: str = "pipeline"  # or a functional engine: interp, fast, block
+
+
+class SimBatchRequest(BaseModel):
+    jobs: list[BatchJob]
+
+
+@app.post("/api/sim/batch")
+def sim_batch(req: SimBatchRequest):
+    # run independent jobs on the process pool; one NDJSON result line per job, in completion order
+    jobs = []
+    invalid = []
+    for index, job in enumerate(req.jobs):
+        job_id = index if job.id is None else job.id
+        try:
+            options = job.sim_options()
+        except ValueError as e:
+            invalid.append({"id": job_id, "success": False, "errors": [{"message": str(e), "severity": "error"}]})
+            continue
+        jobs.append({
+            "id": job_id,
+            "source": job.source,
+            "initial_registers": job.initial_registers,
+            "initial_memory": job.initial_memory,
+            # bounded like /api/sim/run: a job holds a pool worker until it returns
+            "max_cycles": max(0, min(job.max_cycles, JOBS.max_cycles)),
+            "max_seconds": _run_seconds(job.max_seconds),
+            "engine": job.engine,
+            "options": options,
+        })
+
+    def results():
+        for result in invalid:
+            yield json.dumps(result) + "\n"
+        for result in BATCH.run(jobs):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
 
 @app.post("/api/sim/reset")
-def sim_reset():
-    SIM.reset()
+def sim_reset(session: Session = Depends(get_session)):
+    with session.lock:
+        session.sim.reset()
     return {"success": True}
 
 
+def _stream_frame(session: Session, cycles: int, seconds: float, breakpoints: list, delta: bool,
+                  since: Optional[int], epoch: Optional[int]) -> dict:
+    # one frame's worth of simulation, run in the threadpool
+    with session.lock:
+        if cycles <= 0:
+            state = session.sim.get_state_delta(since, epoch) if delta else session.sim.get_state()
+            return {"state": state, "stop_reason": None, "stop_at": None, "epoch": session.sim.epoch}
+        result = session.sim.run(max_cycles=cycles, max_seconds=seconds, breakpoints=breakpoints,
+                                 delta=delta, since=since, epoch=epoch)
+        if result["stop_reason"] in ("max_cycles", "max_seconds"):
+            # frame budget used up; the run goes on with the next frame
+            result["stop_reason"] = None
+        result["epoch"] = session.sim.epoch
+        return result
+
+
+@app.websocket("/api/sim/stream")
+async def sim_stream(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Run the session's simulator server-side and push at most STREAM_MAX_FPS
+    state frames per second. Client messages (JSON):
+      {"action": "run"} / {"action": "pause"}
+      {"action": "speed", "cycles_per_second": 500}  (null or 0: as fast as possible)
+      {"action": "breakpoints", "addresses": ["0x0090"]}
+      {"action": "step", "cycles": 1}
+      {"action": "mode", "delta": false}  (full states instead of deltas)
+    Frames are deltas against the previous frame, so a slow client simply gets
+    fewer, larger frames: the next chunk only runs once the last frame is sent.
+    """
+    await websocket.accept()
+    try:
+        session = SESSIONS.get_or_create(DEFAULT_SESSION_ID) if not session_id else SESSIONS.get(session_id)
+    except SessionNotFound:
+        await websocket.send_json({"type": "error", "message": f"Unknown or expired session '{session_id}'"})
+        await websocket.close(code=4404)
+        return
+
+    control = {"running": False, "speed": None, "breakpoints": [], "delta": True, "steps": 0}
+    wake = asyncio.Event()
+
+    async def receive():
+        try:
+            while True:
+                try:
+                    # a malformed frame is reported like an unknown action
+                    msg = await websocket.receive_json()
+                    action = msg.get("action") if isinstance(msg, dict) else None
+                    if action == "run":
+                        control["running"] = True
+                    elif action == "pause":
+                        control["running"] = False
+                    elif action == "speed":
+                        speed = msg.get("cycles_per_second")
+                        control["speed"] = float(speed) if speed else None
+                    elif action == "breakpoints":
+                        control["breakpoints"] = [_parse_address(a) for a in msg.get("addresses", [])]
+                    elif action == "step":
+                        control["steps"] += max(1, int(msg.get("cycles", 1)))
+                    elif action == "mode":
+                        control["delta"] = bool(msg.get("delta", True))
+                    else:
+                        raise ValueError(f"Unknown action '{action}'")
+                except KeyError:
+                    # a binary frame has no text
+                    await websocket.send_json({"type": "error", "message": "Expected a JSON text frame"})
+                except (TypeError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                wake.set()
+        finally:
+            wake.set()
+
+    receiver = asyncio.create_task(receive())
+    loop = asyncio.get_running_loop()
+    interval = 1 / STREAM_MAX_FPS
+    since = epoch = None  # cycle/epoch of the last frame sent; None sends a full state
+    credit = 0.0  # cycles owed at a limited speed
+    try:
+        while not receiver.done():
+            started = loop.time()
+            steps, control["steps"] = control["steps"], 0
+            if control["running"]:
+                if control["speed"]:
+                    credit += control["speed"] * interval
+                    cycles = int(credit)
+                    credit -= cycles
+                else:
+                    cycles = 1 << 30  # bounded by the frame's time budget
+                cycles += steps
+            else:
+                cycles = steps
+            if cycles or since is None:
+                result = await run_in_threadpool(_stream_frame, session, cycles, interval, control["breakpoints"],
+                                                 control["delta"], since, epoch)
+                state = result["state"]
+                since, epoch = state["cycle"], result["epoch"]
+                if result["stop_reason"]:
+                    control["running"] = False
+                await websocket.send_json({
+                    "type": "frame",
+                    "running": control["running"],
+                    "stop_reason": result["stop_reason"],
+                    "stop_at": result["stop_at"],
+                    "state": state,
+                })
+            if control["running"]:
+                await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+            else:
+                credit = 0.0
+                wake.clear()
+                if not control["steps"]:
+                    await wake.wait()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
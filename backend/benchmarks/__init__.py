@@ -0,0 +1 @@
+"""Simulator benchmark harness (see run.py)"""
@@ -0,0 +1,21 @@
+# Branches whose direction follows the counter bits, defeating static prediction
+        ADDI x1, x0, 0          # i
+        ADDI x2, x0, 2000       # iterations per round
+        ADDI x3, x0, 3          # mask
+        ADDI x10, x0, 0         # round
+        ADDI x11, x0, 2         # rounds
+round:  ADDI x1, x0, 0
+loop:   AND x4, x1, x3
+        BEQ x4, x0, zero        # taken every 4th iteration
+        ADDI x5, x5, 1
+        BNE x4, x3, next        # not taken every 4th iteration
+        ADDI x6, x6, 1
+        BEQ x0, x0, next        # always taken
+zero:   ADDI x7, x7, 1
+next:   SLT x8, x4, x3
+        BGE x8, x3, skip        # never taken
+        ADDI x9, x9, 1
+skip:   ADDI x1, x1, 1
+        BLT x1, x2, loop
+        ADDI x10, x10, 1
+        BLT x10, x11, round
@@ -0,0 +1,14 @@
+# Back-to-back RAW chains and load-use pairs
+        ADDI x1, x0, 0
+        ADDI x2, x0, 2000
+loop:   ADD x3, x1, x1
+        ADD x4, x3, x3          # RAW on x3
+        SUB x5, x4, x3          # RAW on x4
+        SW x5, 0(x0)
+        LW x6, 0(x0)
+        ADD x7, x6, x5          # load-use on x6
+        LW x8, 4(x0)
+        SLT x9, x8, x7          # load-use on x8
+        SW x9, 4(x0)
+        ADDI x1, x1, 1
+        BLT x1, x2, loop        # RAW on x1
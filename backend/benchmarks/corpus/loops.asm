@@ -0,0 +1,14 @@
+# Nested counting loops of independent ALU work
+        ADDI x1, x0, 0          # i
+        ADDI x2, x0, 100        # outer bound
+outer:  ADDI x3, x0, 0          # j
+        ADDI x4, x0, 50         # inner bound
+inner:  ADD x5, x5, x3
+        ORI x6, x3, 7
+        SLLI x7, x3, 2
+        SUB x8, x7, x6
+        AND x9, x8, x4
+        ADDI x3, x3, 1
+        BLT x3, x4, inner
+        ADDI x1, x1, 1
+        BLT x1, x2, outer
@@ -0,0 +1,16 @@
+# Fill a 32-word array, then sum it back, once per pass
+        ADDI x1, x0, 0          # pass
+        ADDI x2, x0, 100        # passes
+        ADDI x4, x0, 128        # array size in bytes (data region 0x00-0x7F)
+pass:   ADDI x3, x0, 0          # byte offset
+fill:   ADD x5, x3, x1
+        SW x5, 0(x3)
+        ADDI x3, x3, 4
+        BLT x3, x4, fill
+        ADDI x3, x0, 0
+sum:    LW x6, 0(x3)
+        ADD x7, x7, x6
+        ADDI x3, x3, 4
+        BLT x3, x4, sum
+        ADDI x1, x1, 1
+        BLT x1, x2, pass
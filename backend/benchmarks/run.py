@@ -0,0 +1,262 @@
+"""
+Benchmark harness for the simulator engines.
+Runs every program in benchmarks/corpus on the functional engines
+(core.Simulator: interp, fast, block), the vector engine and the pipeline in
+several modes, and reports assemble/load time, cycles/s, instructions/s and
+peak memory per session. Results are written as JSON so runs on different
+commits can be compared:
+
+    cd backend
+    python -m benchmarks.run -o before.json
+    python -m benchmarks.run -o after.json --compare before.json
+
+This is a measurement tool. Its only check is that every engine ends with the
+same registers as the interpreter; tests/test_engines.py checks the same
+corpus, memory included, under pytest.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from simulator import core, pipeline_core
+from simulator.assembler import assemble
+from simulator.history import DEFAULT_HISTORY_SIZE
+from simulator.vector_engine import VectorSimulator
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+DEFAULT_REPEAT = 3  # timed runs per row; the fastest is reported
+ASSEMBLE_REPEAT = 20
+MAX_CYCLES = 10_000_000
+STEP_CYCLES = 5000  # cycles timed for the step() mode, which builds a state per cycle
+VECTOR_LANES = 64
+
+# pipeline mode -> PipelineSimulator options
+PIPELINE_MODES = {
+    "stall": {},
+    "forward": {"hazard_policy": "forward"},
+    "forward_load_use+2bit": {"hazard_policy": "forward_load_use", "branch_predictor": "2bit"},
+    "branch_in_id+btb": {"hazard_policy": "forward_load_use", "branch_resolution": "id", "branch_predictor": "btb"},
+    "history": {"history_size": DEFAULT_HISTORY_SIZE},  # as in an interactive session
+}
+ENGINES = core.ENGINES + ("vector", "pipeline", "pipeline_step")
+
+
+def _best(fn, repeat: int) -> tuple:
+    """(fastest wall time, result of that call) over `repeat` calls of fn()"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[0]:
+            best = (elapsed, result)
+    return best
+
+
+def _peak_memory(fn) -> int:
+    """Peak bytes allocated while fn() builds and runs a session"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _functional(source: str, engine: str):
+    sim = core.Simulator()
+    sim.load_program(source)
+    return lambda: sim.run(MAX_CYCLES, engine), sim
+
+
+def _run_functional(source: str, engine: str) -> core.Simulator:
+    run, sim = _functional(source, engine)
+    run()
+    return sim
+
+
+def _run_vector(source: str) -> VectorSimulator:
+    sim = VectorSimulator(assemble(source, core.PROGRAM_START), VECTOR_LANES, core.MEMORY_SIZE)
+    return sim.run(MAX_CYCLES)
+
+
+def _run_pipeline(source: str, options: dict) -> pipeline_core.PipelineSimulator:
+    sim = pipeline_core.PipelineSimulator(**options)
+    sim.load_program(source)
+    sim.run(MAX_CYCLES)
+    return sim
+
+
+def _run_pipeline_step(source: str) -> pipeline_core.PipelineSimulator:
+    # stepping is what interactive sessions do, so with their undo history
+    sim = pipeline_core.PipelineSimulator(history_size=DEFAULT_HISTORY_SIZE)
+    sim.load_program(source)
+    for _ in range(STEP_CYCLES):
+        if sim.is_finished():
+            break
+        sim.step()
+    return sim
+
+
+def _timed_run(run, sim) -> tuple:
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started, sim
+
+
+def _timed_pipeline(source: str, options: dict) -> tuple:
+    sim = pipeline_core.PipelineSimulator(**options)
+    sim.load_program(source)
+    started = time.perf_counter()
+    sim.run(MAX_CYCLES)
+    return time.perf_counter() - started, sim
+
+
+def _load_ms(make, repeat: int) -> float:
+    """Fastest load of the program into a fresh simulator (program cache warm)"""
+    return round(_best(make, max(repeat, 5))[0] * 1000, 4)
+
+
+def bench_program(name: str, source: str, engines, repeat: int, memory: bool) -> tuple:
+    """Benchmark one program; returns (program info, result rows)"""
+    reference = _run_functional(source, "interp").registers
+    assemble_time, program = _best(lambda: assemble(source, core.PROGRAM_START), ASSEMBLE_REPEAT)
+    info = {
+        "instructions": len(program.decoded),
+        "assemble_ms": round(assemble_time * 1000, 4),
+        "executed": _run_functional(source, "fast").cycle,
+    }
+    rows = []
+
+    def row(engine, mode, load_ms, elapsed, cycles, instructions, registers_match, session):
+        rows.append({
+            "program": name,
+            "engine": engine,
+            "mode": mode,
+            "load_ms": load_ms,
+            "cycles": cycles,
+            "instructions": instructions,
+            "seconds": round(elapsed, 6),
+            "cycles_per_second": round(cycles / elapsed) if elapsed > 0 else None,
+            "instructions_per_second": round(instructions / elapsed) if elapsed > 0 else None,
+            "cpi": round(cycles / instructions, 4) if instructions else None,
+            "peak_memory_bytes": _peak_memory(session) if memory else None,
+            "registers_match": registers_match,
+        })
+
+    for engine in core.ENGINES:
+        if engine not in engines:
+            continue
+        load_ms = _load_ms(lambda: core.Simulator().load_program(source), repeat)
+        # time only the run; every repeat starts from a freshly loaded machine
+        elapsed, sim = min((_timed_run(*_functional(source, engine)) for _ in range(repeat)), key=lambda r: r[0])
+        row(engine, None, load_ms, elapsed, sim.cycle, sim.cycle, sim.registers == reference,
+            lambda: _run_functional(source, engine))
+
+    if "vector" in engines:
+        elapsed, sim = _best(lambda: _run_vector(source), repeat)
+        executed = int(sim.cycle.sum())
+        match = all(list(map(int, sim.registers[lane])) == reference for lane in range(sim.lanes))
+        row("vector", f"{VECTOR_LANES}_lanes", None, elapsed, executed, executed, match,
+            lambda: _run_vector(source))
+
+    if "pipeline" in engines:
+        load_ms = _load_ms(lambda: pipeline_core.PipelineSimulator().load_program(source), repeat)
+        for mode, options in PIPELINE_MODES.items():
+            elapsed, sim = min((_timed_pipeline(source, options) for _ in range(repeat)), key=lambda r: r[0])
+            row("pipeline", mode, load_ms, elapsed, sim.cycle, sim.retired, sim.registers == reference,
+                lambda: _run_pipeline(source, options))
+
+    if "pipeline_step" in engines:
+        elapsed, sim = _best(lambda: _run_pipeline_step(source), repeat)
+        # a capped run: registers only match the reference if the program finished
+        match = sim.registers == reference if sim.is_finished() else None
+        row("pipeline", "step", None, elapsed, sim.cycle, sim.retired, match,
+            lambda: _run_pipeline_step(source))
+    return info, rows
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(programs: list | None = None, engines=ENGINES, repeat: int = DEFAULT_REPEAT, memory: bool = True) -> dict:
+    """Benchmark the corpus (or the named programs) and return the JSON report"""
+    paths = sorted(CORPUS_DIR.glob("*.asm"))
+    if programs:
+        paths = [p for p in paths if p.stem in programs]
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "programs": {},
+        "results": [],
+    }
+    for path in paths:
+        info, rows = bench_program(path.stem, path.read_text(), engines, repeat, memory)
+        report["programs"][path.stem] = info
+        report["results"].extend(rows)
+    return report
+
+
+def _key(row: dict) -> tuple:
+    return row["program"], row["engine"], row["mode"]
+
+
+def _label(row: dict) -> str:
+    return f"{row['program']:<10} {row['engine']:<9} {row['mode'] or '':<22}"
+
+
+def print_report(report: dict, baseline: dict | None = None, out=sys.stdout):
+    """Human-readable table; with a baseline, the instructions/s change per row"""
+    old = {_key(r): r for r in baseline["results"]} if baseline else {}
+    header = f"{'program':<10} {'engine':<9} {'mode':<22} {'cycles/s':>11} {'instr/s':>11} {'peak KiB':>9}"
+    print(header + ("   vs base" if baseline else ""), file=out)
+    for row in report["results"]:
+        peak = row["peak_memory_bytes"]
+        line = (f"{_label(row)} {row['cycles_per_second'] or 0:>11,} {row['instructions_per_second'] or 0:>11,} "
+                + (f"{peak / 1024:>9.1f}" if peak is not None else f"{'-':>9}"))
+        before = old.get(_key(row))
+        if before and before["instructions_per_second"] and row["instructions_per_second"]:
+            change = row["instructions_per_second"] / before["instructions_per_second"] - 1
+            line += f"   {change:+8.1%}"
+        if row["registers_match"] is False:
+            line += "   REGISTERS DIFFER"
+        print(line, file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="earlier JSON report to compare instructions/s against")
+    parser.add_argument("--program", action="append", help="corpus program to run (repeatable; default all)")
+    parser.add_argument("--engine", action="append", choices=ENGINES, help="engine to run (repeatable; default all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per row")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory pass")
+    args = parser.parse_args(argv)
+
+    report = run(args.program, args.engine or ENGINES, max(1, args.repeat), not args.no_memory)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
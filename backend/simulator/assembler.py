@@ -1,3 +1,12 @@
+"""
+Two-pass assembler. Pass one tokenizes every line once, validates it and builds
+the symbol table; pass two encodes and predecodes each instruction with every
+label known. The result is a Program consumed by both simulators and
+/api/assemble.
+"""
+from .encoder import encode_instruction
+from .predecode import predecode
+
 VALID_OPCODES = [
     "LW", "SW",
     # arithmetic
@@ -11,6 +20,10 @@ VALID_OPCODES = [
     # compare
     "SLT",
 ]
+BRANCH_OPCODES = frozenset({"BEQ", "BNE", "BLT", "BGE"})
+# B-type immediates are 13-bit signed byte offsets
+BRANCH_MIN_OFFSET = -4096
+BRANCH_MAX_OFFSET = 4094
 REGISTER_PREFIX = "x"
 MAX_REGISTER = 31
 
@@ -25,21 +38,33 @@ def is_valid_register(reg: str) -> bool:
         return False
 
 
-def parse_instruction(line: str, lineno: int):
-    parts = line.replace(",", "").split()
-    if not parts:
-        return None  # skip blank lines
-
-    # Accept label-only lines or label: instr on same line
-    if parts[0].endswith(":"):
-        # label only -> skip validation here (simulator will resolve labels)
-        if len(parts) == 1:
-            return None
-        # otherwise drop the label token and continue with the instruction
-        parts = parts[1:]
-        if not parts:
-            return None
+def _hex(x: int) -> str:
+    return f"0x{x:08x}"
+
+
+def _split_line(line: str) -> tuple[str | None, list, str]:
+    """
+    Tokenize one source line.
+
+    Returns:
+        (label or None, instruction tokens, instruction text). Comments after
+        '#' are dropped and commas separate operands like whitespace.
+    """
+    if "#" in line:
+        line = line.split("#", 1)[0]
+    line = line.strip()
+    label = None
+    if ":" in line:
+        label, line = line.split(":", 1)
+        label = label.strip()
+        if not label.isidentifier():
+            raise ValueError(f"Invalid label name '{label}'")
+        line = line.strip()
+    return label, line.replace(",", " ").split(), line
 
+
+def _check_operands(parts: list):
+    """Validate the mnemonic and operand format of one tokenized instruction"""
     opcode = parts[0].upper()
     if opcode not in VALID_OPCODES:
         raise ValueError(f"Invalid opcode '{opcode}'")
@@ -108,41 +133,108 @@ def parse_instruction(line: str, lineno: int):
         if not label.isidentifier():
             raise ValueError(f"Invalid label name '{label}'")
 
+
+def parse_instruction(line: str, lineno: int):
+    _, parts, text = _split_line(line)
+    if not parts:
+        return None  # blank, comment or label-only line
+    _check_operands(parts)
     return {
         "line": lineno,
-        "opcode": opcode,
-        "raw": line.strip()
+        "opcode": parts[0].upper(),
+        "raw": text
     }
 
 
-def validate_program(source: str) -> dict:
-    lines = source.split("\n")
-    instructions = []
-    errors = []
-    
-    for lineno, line in enumerate(lines, start=1):
-        # strip surrounding whitespace and remove inline comments
-        line = line.strip()
-        if not line:
-            continue
-        # remove inline comments (anything after '#')
-        if '#' in line:
-            line = line.split('#', 1)[0].strip()
-        if not line:
-            continue
-            
+class Program:
+    """
+    Output of assemble(). Each DecodedInstruction carries both the decoded
+    fields and the encoded machine word.
+    """
+
+    def __init__(self, base: int):
+        self.base = base
+        self.decoded = {}  # addr -> DecodedInstruction, in program order
+        self.labels = {}  # label -> address
+        self.lines = {}  # addr -> source line number (empty for binary images)
+        self.errors = []  # {"line", "message", "severity"}
+
+    @property
+    def words(self) -> list[int]:
+        """Machine-code image, one word per instruction from `base`"""
+        return [d.encoded for d in self.decoded.values()]
+
+    @property
+    def contiguous(self) -> bool:
+        """True if the instructions fill every word from `base` without gaps"""
+        return not self.decoded or max(self.decoded) - self.base == 4 * (len(self.decoded) - 1)
+
+    def listing(self) -> list[dict]:
+        return [
+            {"line": self.lines.get(a), "opcode": d.opcode, "raw": d.raw, "address": _hex(a), "hex": _hex(d.encoded)}
+            for a, d in self.decoded.items()
+        ]
+
+    def label_listing(self) -> dict:
+        return {k: _hex(v) for k, v in self.labels.items()}
+
+
+def assemble(source: str, base: int = 0) -> Program:
+    """
+    Assemble source text into a Program placed at address `base`.
+    Lines with errors are reported in Program.errors and left out of the image.
+    """
+    program = Program(base)
+    labels, errors = program.labels, program.errors
+    pending = []  # (line number, address, tokens, text)
+    addr = base
+
+    # Pass 1: tokenize, validate, assign addresses and collect labels
+    for lineno, line in enumerate(source.split("\n"), start=1):
         try:
-            instr = parse_instruction(line, lineno)
-            if instr:
-                instructions.append(instr)
+            label, parts, text = _split_line(line)
+            if label is not None:
+                if label in labels:
+                    raise ValueError(f"Duplicate label '{label}'")
+                labels[label] = addr
+            if parts:
+                _check_operands(parts)
+                pending.append((lineno, addr, parts, text))
+                addr += 4
         except ValueError as e:
             errors.append({
                 "line": lineno,
                 "message": str(e),
                 "severity": "error"
             })
-    
+
+    # Pass 2: encode and predecode against the complete symbol table
+    for lineno, a, parts, text in pending:
+        if parts[0].upper() in BRANCH_OPCODES:
+            label = parts[3]
+            if label not in labels:
+                errors.append({"line": lineno, "message": f"Undefined label '{label}'", "severity": "error"})
+                continue
+            offset = labels[label] - a
+            if not BRANCH_MIN_OFFSET <= offset <= BRANCH_MAX_OFFSET:
+                errors.append({
+                    "line": lineno,
+                    "message": f"Branch to '{label}' out of range (offset {offset}, limit -4096..4094)",
+                    "severity": "error"
+                })
+                continue
+        encoded = encode_instruction(parts[0], parts[1:], a, labels)
+        program.decoded[a] = predecode(parts, a, labels, text, encoded)
+        program.lines[a] = lineno
+    errors.sort(key=lambda e: e["line"])
+    return program
+
+
+def validate_program(source: str) -> dict:
+    program = assemble(source)
     return {
-        "instructions": instructions,
-        "errors": errors
+        "instructions": [
+            {"line": program.lines[a], "opcode": d.opcode, "raw": d.raw} for a, d in program.decoded.items()
+        ],
+        "errors": program.errors
     }
@@ -0,0 +1,155 @@
+"""
+Batch runner: fans many independent simulation jobs out across a process pool
+and yields each result as soon as it finishes. Jobs are submitted in chunks to
+keep inter-process overhead low. Programs come from each worker's own
+PROGRAM_CACHE, so a source repeated across jobs is assembled once per worker.
+
+A job is a dict:
+    source: assembly source (required)
+    id: echoed back in the result (default: the job's index in the batch)
+    engine: "pipeline" (cycle-accurate, default) or a functional engine
+            ("interp", "fast", "block")
+    max_cycles: cycle budget (functional engines execute one instruction per cycle)
+    max_seconds: wall-clock budget (default: none)
+    initial_registers / initial_memory: as for /api/sim/load
+    options: PipelineSimulator options (only memory_size applies to functional engines)
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import core, pipeline_core
+from .memory import MemoryFault
+from .program_cache import PROGRAM_CACHE
+
+BATCH_ENGINES = ("pipeline",) + core.ENGINES
+DEFAULT_CHUNK_SIZE = 32  # jobs per task sent to a worker
+FUNCTIONAL_CHECK_STEPS = 65536  # functional-engine steps between max_seconds checks
+
+
+def _error(job_id, message: str) -> dict:
+    return {"id": job_id, "success": False, "errors": [{"message": message, "severity": "error"}]}
+
+
+def run_job(job: dict, job_id=None) -> dict:
+    """Run one job in the current process and return its result"""
+    job_id = job.get("id", job_id)
+    engine = job.get("engine", "pipeline")
+    max_cycles = max(0, int(job.get("max_cycles", pipeline_core.DEFAULT_RUN_CYCLES)))
+    max_seconds = job.get("max_seconds")
+    options = job.get("options") or {}
+    if engine not in BATCH_ENGINES:
+        return _error(job_id, f"Unknown engine '{engine}'. Expected one of {', '.join(BATCH_ENGINES)}")
+    try:
+        if engine == "pipeline":
+            sim = pipeline_core.PipelineSimulator(**options)
+            program = PROGRAM_CACHE.get(job["source"], pipeline_core.PROGRAM_START)
+        else:
+            sim = core.Simulator(**{k: v for k, v in options.items() if k == "memory_size"})
+            program = PROGRAM_CACHE.get(job["source"], core.PROGRAM_START)
+        res = sim.load_assembled(program, job.get("initial_registers"), job.get("initial_memory"))
+    except (KeyError, TypeError, ValueError) as e:
+        return _error(job_id, f"Invalid job: {e}")
+    if res.get("errors"):
+        return {"id": job_id, "success": False, "errors": res["errors"]}
+
+    try:
+        if engine == "pipeline":
+            result = sim.run(max_cycles=max_cycles, max_seconds=max_seconds)
+        else:
+            started = time.perf_counter()
+            deadline = None if max_seconds is None else started + max_seconds
+            # in slices, so the time budget is checked between them
+            state = sim.get_state()
+            while sim.cycle < max_cycles and not sim.halted:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                state = sim.run(min(FUNCTIONAL_CHECK_STEPS, max_cycles - sim.cycle), engine)
+            elapsed = time.perf_counter() - started
+            if state["fault"]:
+                stop_reason = "fault"
+            elif state["halted"]:
+                stop_reason = "halted"
+            else:
+                stop_reason = "max_cycles" if sim.cycle >= max_cycles else "max_seconds"
+            result = {
+                "state": state,
+                "stop_reason": stop_reason,
+                "stop_at": state["fault"]["pc"] if state["fault"] else None,
+                "stats": {"cycles": state["cycle"], "elapsed_ms": round(elapsed * 1000, 3)},
+            }
+    except MemoryFault as e:
+        return _error(job_id, str(e))
+    return {"id": job_id, "success": True, "engine": engine, **result}
+
+
+def _run_chunk(chunk: list) -> list:
+    """Worker entry point: run (index, job) pairs in order"""
+    return [(index, run_job(job, index)) for index, job in chunk]
+
+
+class BatchRunner:
+    """Process pool running job batches; the pool is started on first use and reused"""
+
+    def __init__(self, max_workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def run(self, jobs: list):
+        """
+        Run every job and yield results in completion order. Each result carries
+        the job's `id` (its index when none was given). Closing the generator
+        early cancels the chunks that have not started yet.
+        """
+        for _, result in self.run_indexed(jobs):
+            yield result
+
+    def run_indexed(self, jobs: list):
+        """Like run(), yielding (job index, result) pairs"""
+        indexed = list(enumerate(jobs))
+        chunks = [indexed[i:i + self.chunk_size] for i in range(0, len(indexed), self.chunk_size)]
+        if not chunks:
+            return
+        pool = self._executor()
+        futures = {pool.submit(_run_chunk, chunk): chunk for chunk in chunks}
+        try:
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # a worker died or the chunk could not be sent; fail its jobs only
+                    results = [(index, _error(job.get("id", index) if isinstance(job, dict) else index,
+                                              f"Worker failed: {e!r}"))
+                               for index, job in futures[future]]
+                yield from results
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_batch(jobs: list, max_workers: int | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+    """Run a batch on a temporary pool and return the results in job order"""
+    results = [None] * len(jobs)
+    with BatchRunner(max_workers, chunk_size) as runner:
+        for index, result in runner.run_indexed(jobs):
+            results[index] = result
+    return results
@@ -0,0 +1,172 @@
+"""
+Basic-block translation engine for the functional simulator.
+A basic block runs from its start PC up to and including the next branch (or
+unknown instruction). Each block is translated once into a generated Python
+function with the registers it touches held in locals and written back on
+exit. Translations are cached by start PC in a bounded cache that evicts the
+oldest translation first.
+"""
+from .memory import MemoryFault
+from .predecode import (
+    OP_ADD, OP_SUB, OP_ADDI, OP_AND, OP_OR, OP_ORI, OP_SLL, OP_SLLI, OP_SLT,
+    OP_LW, OP_SW, OP_BEQ, OP_BNE, OP_BLT, OP_BGE, BRANCH_OPS,
+)
+
+DEFAULT_MAX_BLOCKS = 1024
+MAX_BLOCK_LENGTH = 256  # instructions; longer straight-line runs are split
+
+# Expression templates; xor with 0x80000000 maps signed u32 order onto unsigned order
+_R_EXPR = {
+    OP_ADD: "({a} + {b}) & 0xFFFFFFFF",
+    OP_SUB: "({a} - {b}) & 0xFFFFFFFF",
+    OP_AND: "{a} & {b}",
+    OP_OR: "{a} | {b}",
+    OP_SLL: "({a} << ({b} & 31)) & 0xFFFFFFFF",
+    OP_SLT: "1 if ({a} ^ 0x80000000) < ({b} ^ 0x80000000) else 0",
+}
+_I_EXPR = {
+    OP_ADDI: "({a} + {imm}) & 0xFFFFFFFF",
+    OP_ORI: "({a} | {imm}) & 0xFFFFFFFF",
+    OP_SLLI: "({a} << {sh}) & 0xFFFFFFFF",
+}
+_BRANCH_COND = {
+    OP_BEQ: "{a} == {b}",
+    OP_BNE: "{a} != {b}",
+    OP_BLT: "({a} ^ 0x80000000) < ({b} ^ 0x80000000)",
+    OP_BGE: "({a} ^ 0x80000000) >= ({b} ^ 0x80000000)",
+}
+
+
+class Block:
+    """One translated basic block"""
+    __slots__ = ("start", "length", "fn", "source")
+
+    def __init__(self, start: int, length: int, fn, source: str):
+        self.start = start
+        self.length = length  # instructions, the terminator included
+        self.fn = fn  # fn(registers) -> next PC, or ~PC if the machine halts
+        self.source = source  # generated code, kept for debugging
+
+
+def _reg(idx: int) -> str:
+    return f"x{idx}" if idx > 0 else "0"
+
+
+def translate(decoded: dict, start: int, read_word, write_word) -> Block | None:
+    """
+    Translate the basic block starting at `start`.
+
+    Returns:
+        Block, or None if there is no instruction at `start`. When a load or
+        store faults, the generated function writes back the registers of the
+        completed instructions and re-raises the MemoryFault with `pc` and
+        `steps` (instructions completed in the block) set.
+    """
+    if start not in decoded:
+        return None
+    body = []
+    used = set()  # registers read or written
+    written = set()
+    has_memory = False
+    pc = start
+    length = 0
+    exit_expr = None
+    while True:
+        d = decoded[pc]
+        op = d.op
+        a, b = _reg(d.rs1), _reg(d.rs2)
+        used.update(r for r in (d.rs1, d.rs2, d.rd) if r > 0)
+        if d.rd > 0:
+            written.add(d.rd)
+        length += 1
+        if op in _R_EXPR:
+            if d.rd > 0:
+                body.append(f"x{d.rd} = " + _R_EXPR[op].format(a=a, b=b))
+        elif op in _I_EXPR:
+            if d.rd > 0:
+                body.append(f"x{d.rd} = " + _I_EXPR[op].format(a=a, imm=d.imm, sh=d.imm & 0x1F))
+        elif op == OP_LW:
+            has_memory = True
+            body.append(f"n = {length - 1}")
+            load = f"rw({a} + {d.imm})"
+            body.append(f"x{d.rd} = {load}" if d.rd > 0 else load)
+        elif op == OP_SW:
+            has_memory = True
+            body.append(f"n = {length - 1}")
+            body.append(f"ww({a} + {d.imm}, {b})")
+        elif op in BRANCH_OPS:
+            # a taken branch to an unknown label halts with the PC after the branch
+            taken = d.target if d.target >= 0 else ~(pc + 4)
+            body.append("t = " + _BRANCH_COND[op].format(a=a, b=b))
+            exit_expr = f"{taken} if t else {pc + 4}"
+            break
+        else:
+            # unknown instruction: executes as a no-op, then the machine halts
+            exit_expr = str(~(pc + 4))
+            break
+        pc += 4
+        if pc not in decoded or length >= MAX_BLOCK_LENGTH:
+            exit_expr = str(pc)
+            break
+
+    writeback = [f"r[{i}] = x{i}" for i in sorted(written)]
+    lines = ["def block(r):"]
+    lines += [f"    x{i} = r[{i}]" for i in sorted(used)]
+    if has_memory:
+        lines.append("    try:")
+        lines += [f"        {s}" for s in body]
+        lines.append("    except MemoryFault as fault:")
+        lines += [f"        {s}" for s in writeback]
+        lines.append(f"        fault.pc = {start} + 4 * n")
+        lines.append("        fault.steps = n")
+        lines.append("        raise")
+    else:
+        lines += [f"    {s}" for s in body]
+    lines += [f"    {s}" for s in writeback]
+    lines.append(f"    return {exit_expr}")
+    source = "\n".join(lines) + "\n"
+
+    namespace = {"rw": read_word, "ww": write_word, "MemoryFault": MemoryFault}
+    exec(compile(source, f"<block 0x{start:08x}>", "exec"), namespace)
+    return Block(start, length, namespace["block"], source)
+
+
+class BlockCache:
+    """Translated blocks of one loaded program by start PC, bounded, oldest evicted first"""
+
+    def __init__(self, decoded: dict, read_word, write_word, max_blocks: int = DEFAULT_MAX_BLOCKS):
+        if max_blocks <= 0:
+            raise ValueError("max_blocks must be positive")
+        self.decoded = decoded
+        self.read_word = read_word
+        self.write_word = write_word
+        self.max_blocks = max_blocks
+        self.blocks = {}  # start PC -> Block, oldest translation first
+        self.translations = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def get(self, pc: int) -> Block | None:
+        """Block starting at `pc`, translated on first use; None if `pc` holds no instruction"""
+        block = self.blocks.get(pc)
+        if block is not None:
+            return block
+        block = translate(self.decoded, pc, self.read_word, self.write_word)
+        if block is None:
+            return None
+        self.translations += 1
+        if len(self.blocks) >= self.max_blocks:
+            del self.blocks[next(iter(self.blocks))]
+            self.evictions += 1
+        self.blocks[pc] = block
+        return block
+
+    def stats(self) -> dict:
+        return {
+            "blocks": len(self.blocks),
+            "max_blocks": self.max_blocks,
+            "translations": self.translations,
+            "evictions": self.evictions,
+        }
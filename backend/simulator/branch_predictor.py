@@ -0,0 +1,144 @@
+"""
+Branch predictors for the pipeline simulator.
+IF asks the predictor whether a fetched branch is taken; the stage that resolves
+the branch reports the real outcome through update().
+"""
+
+DEFAULT_BHT_SIZE = 64
+DEFAULT_BTB_SIZE = 16
+
+
+class BranchPredictor:
+    """Base class: predict-not-taken, no state"""
+    name = "not_taken"
+
+    def predict(self, pc: int, target: int) -> bool:
+        """Return True to fetch `target` next instead of pc + 4"""
+        return False
+
+    def predict_target(self, pc: int, target: int) -> int | None:
+        """Address IF fetches after the branch at `pc` when predicted taken, else None"""
+        return target if self.predict(pc, target) else None
+
+    def update(self, pc: int, target: int, taken: bool):
+        """Record the resolved outcome of the branch at `pc`"""
+
+    def state(self):
+        """Copy of the internal tables (for snapshots)"""
+        return None
+
+    def restore(self, state):
+        """Restore tables produced by state()"""
+
+
+class NotTakenPredictor(BranchPredictor):
+    """Static predict-not-taken (the Group 2 default)"""
+    name = "not_taken"
+
+
+class BTFNPredictor(BranchPredictor):
+    """Static backward-taken / forward-not-taken"""
+    name = "btfn"
+
+    def predict(self, pc: int, target: int) -> bool:
+        return target <= pc
+
+
+class CounterPredictor(BranchPredictor):
+    """Branch history table of n-bit saturating counters indexed by PC"""
+
+    def __init__(self, bits: int, bht_size: int = DEFAULT_BHT_SIZE):
+        if bht_size <= 0:
+            raise ValueError("bht_size must be positive")
+        self.bits = bits
+        self.max_count = (1 << bits) - 1
+        self.threshold = 1 << (bits - 1)  # counters at or above this predict taken
+        self.name = f"{bits}bit"
+        self.bht_size = bht_size
+        # start weakly not-taken
+        self.table = [self.threshold - 1] * bht_size
+
+    def _index(self, pc: int) -> int:
+        return (pc >> 2) % self.bht_size
+
+    def predict(self, pc: int, target: int) -> bool:
+        return self.table[self._index(pc)] >= self.threshold
+
+    def update(self, pc: int, target: int, taken: bool):
+        i = self._index(pc)
+        if taken:
+            self.table[i] = min(self.table[i] + 1, self.max_count)
+        else:
+            self.table[i] = max(self.table[i] - 1, 0)
+
+    def state(self):
+        return list(self.table)
+
+    def restore(self, state):
+        self.table = list(state)
+
+
+class BTBPredictor(BranchPredictor):
+    """
+    Direct-mapped branch target buffer with a 2-bit counter per entry.
+    A branch is predicted taken only when it hits in the BTB, i.e. it has been
+    taken before and has not since been evicted by an aliasing branch. A hit
+    redirects fetch to the stored target, which the resolving stage checks
+    against the real one.
+    """
+    name = "btb"
+
+    def __init__(self, btb_size: int = DEFAULT_BTB_SIZE):
+        if btb_size <= 0:
+            raise ValueError("btb_size must be positive")
+        self.btb_size = btb_size
+        self.entries = [None] * btb_size  # (tag pc, target, counter)
+
+    def _index(self, pc: int) -> int:
+        return (pc >> 2) % self.btb_size
+
+    def _hit(self, pc: int):
+        entry = self.entries[self._index(pc)]
+        return entry if entry is not None and entry[0] == pc and entry[2] >= 2 else None
+
+    def predict(self, pc: int, target: int) -> bool:
+        return self._hit(pc) is not None
+
+    def predict_target(self, pc: int, target: int) -> int | None:
+        entry = self._hit(pc)
+        return entry[1] if entry is not None else None
+
+    def update(self, pc: int, target: int, taken: bool):
+        i = self._index(pc)
+        entry = self.entries[i]
+        if entry is None or entry[0] != pc:
+            if taken:
+                # allocate on the first taken execution
+                self.entries[i] = (pc, target, 2)
+            return
+        counter = min(entry[2] + 1, 3) if taken else max(entry[2] - 1, 0)
+        self.entries[i] = (pc, target, counter)
+
+    def state(self):
+        return list(self.entries)
+
+    def restore(self, state):
+        self.entries = list(state)
+
+
+PREDICTORS = ("not_taken", "btfn", "1bit", "2bit", "btb")
+
+
+def make_predictor(name: str, bht_size: int = DEFAULT_BHT_SIZE, btb_size: int = DEFAULT_BTB_SIZE) -> BranchPredictor:
+    """Create a predictor by name (see PREDICTORS)"""
+    if name == "not_taken":
+        return NotTakenPredictor()
+    if name == "btfn":
+        return BTFNPredictor()
+    if name == "1bit":
+        return CounterPredictor(1, bht_size)
+    if name == "2bit":
+        return CounterPredictor(2, bht_size)
+    if name == "btb":
+        return BTBPredictor(btb_size)
+    raise ValueError(f"Unknown branch predictor '{name}'. Expected one of {', '.join(PREDICTORS)}")
@@ -1,7 +1,20 @@
-from .assembler import validate_program, is_valid_register
-
-MEMORY_SIZE = 0x0100
+from .assembler import Program
+from .block_engine import BlockCache, DEFAULT_MAX_BLOCKS
+from .decoder import DECODE_CACHE
+from .fast_engine import compile_program, run_table
+from .initial_state import parse_registers
+from .loader import Image
+from .memory import PagedMemory, MemoryFault, DEFAULT_MEMORY_SIZE
+from .predecode import (
+    OP_ADD, OP_SUB, OP_ADDI, OP_AND, OP_OR, OP_ORI, OP_SLL, OP_SLLI,
+    OP_SLT, OP_LW, OP_SW, OP_BEQ, OP_BNE, OP_BLT, OP_BGE, BRANCH_OPS,
+)
+from .program_cache import PROGRAM_CACHE
+
+MEMORY_SIZE = DEFAULT_MEMORY_SIZE
 PROGRAM_START = 0x0000
+DEFAULT_MAX_STEPS = 1_000_000
+ENGINES = ("interp", "fast", "block")
 
 
 def _hex(x: int) -> str:
@@ -13,175 +26,298 @@ def _to_u32(x: int) -> int:
 
 
 class Simulator:
-    def __init__(self):
-        self.memory = bytearray(MEMORY_SIZE)
+    def __init__(self, memory_size: int = MEMORY_SIZE, max_blocks: int = DEFAULT_MAX_BLOCKS):
+        self.memory_size = memory_size
+        self.max_blocks = max_blocks
+        self.memory = PagedMemory(memory_size)
         self.registers = [0] * 32
         self.pc = PROGRAM_START
         self.cycle = 0
-        self.instructions = {}  # addr -> {'tokens':..., 'raw':..., 'opcode':...}
+        self.program = None  # assembler.Program
+        self.decoded = {}  # addr -> DecodedInstruction
+        self.image = None  # loader.Image when running a binary image
+        self._fetch = self.decoded.get  # pc -> DecodedInstruction or None
         self.label_map = {}
         self.halted = False
+        self.fault = None  # memory fault that halted the machine
+        self._compiled = None  # threaded-code (table, exits) for the fast engine
+        self._blocks = None  # BlockCache for the block engine
 
     def reset(self):
-        self.memory = bytearray(MEMORY_SIZE)
+        self.memory = PagedMemory(self.memory_size)
         self.registers = [0] * 32
         self.pc = PROGRAM_START
         self.cycle = 0
-        self.instructions = {}
+        self.program = None
+        self.decoded = {}
+        self.image = None
+        self._fetch = self.decoded.get
         self.label_map = {}
         self.halted = False
+        self.fault = None
+        self._compiled = None
+        self._blocks = None
 
-    def load_program(self, source: str):
-        # Validate first
-        res = validate_program(source)
-        if res["errors"]:
-            return res
+    def load_program(self, source: str, initial_regs: dict | None = None, initial_memory: dict | None = None):
+        return self.load_assembled(PROGRAM_CACHE.get(source, PROGRAM_START), initial_regs, initial_memory)
 
-        self.reset()
-        addr = PROGRAM_START
-
-        lines = source.splitlines()
-        for raw in lines:
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            # handle label definitions: "label:" or "label: instr..."
-            if ":" in line:
-                label, rest = line.split(":", 1)
-                label = label.strip()
-                if label:
-                    self.label_map[label] = addr
-                line = rest.strip()
-                if not line:
-                    continue
-
-            tokens = line.replace(",", "").split()
-            opcode = tokens[0].upper()
-            self.instructions[addr] = {"tokens": tokens, "raw": line, "opcode": opcode}
-            addr += 4
+    def load_assembled(self, program: Program, initial_regs: dict | None = None,
+                       initial_memory: dict | None = None):
+        """Load an already assembled program (based at PROGRAM_START); it is shared, not copied"""
+        if program.errors:
+            return {"instructions": program.listing(), "errors": program.errors}
 
+        self.reset()
+        errors = self._set_initial_state(initial_regs, initial_memory)
+        if errors:
+            return {"instructions": [], "errors": errors}
+        self.program = program
+        self.decoded = program.decoded
+        self._fetch = self.decoded.get
+        self.label_map = program.labels
         self.pc = PROGRAM_START
-        return {"instructions": [{"line": i+1, "opcode": v["opcode"], "raw": v["raw"]} for i, v in enumerate(self.instructions.values())], "errors": []}
-
-    def _reg_index(self, r: str) -> int:
-        return int(r.lstrip("x"))
+        return {"instructions": program.listing(), "errors": []}
+
+    def load_image(self, image: Image):
+        """
+        Load a binary image (see loader) into memory and start at its entry point.
+        The interpreter fetches and decodes words from memory; the fast engine
+        compiles the image as loaded.
+        """
+        self.reset()
+        try:
+            image.write_to(self.memory)
+        except MemoryFault as e:
+            return {"instructions": [], "errors": [{"message": f"Image: {e}", "severity": "error"}]}
+        self.image = image
+        self.program = image.program()
+        self.decoded = self.program.decoded
+        self._fetch = self._fetch_memory
+        self.pc = image.entry
+        return {"instructions": self.program.listing(), "errors": []}
+
+    def _set_initial_state(self, initial_regs: dict | None, initial_memory: dict | None) -> list:
+        """Apply initial register values and memory words (int or hex string); returns load errors"""
+        registers = parse_registers(initial_regs)
+        if isinstance(registers, list):
+            return registers
+        for idx, value in registers.items():
+            if idx:  # x0 is always 0
+                self.registers[idx] = value
+        for addr, value in (initial_memory or {}).items():
+            try:
+                addr = int(addr, 0) if isinstance(addr, str) else int(addr)
+                word = int(value, 0) if isinstance(value, str) else int(value)
+            except (TypeError, ValueError):
+                continue  # skip invalid entries, as the pipeline simulator does
+            try:
+                self._write_word(addr, _to_u32(word))
+            except MemoryFault as e:
+                return [{"message": f"Initial memory: {e}", "severity": "error"}]
+        return []
+
+    def _fetch_memory(self, pc: int):
+        if pc & 3 or not self.image.start <= pc <= self.image.end - 4:
+            return None
+        return DECODE_CACHE.decode(self.memory.read_word(pc), pc)
 
     def _read_word(self, addr: int) -> int:
-        if addr < 0 or addr + 4 > MEMORY_SIZE:
-            return 0
-        b = self.memory[addr:addr + 4]
-        return int.from_bytes(b, "little")
+        return self.memory.read_word(addr)
 
     def _write_word(self, addr: int, val: int):
-        if addr < 0 or addr + 4 > MEMORY_SIZE:
-            return
-        self.memory[addr:addr + 4] = int(val & 0xFFFFFFFF).to_bytes(4, "little")
+        self.memory.write_word(addr, val)
+
+    def _fault(self, fault: MemoryFault):
+        """Halt on a memory fault, leaving the PC at the faulting instruction"""
+        self.halted = True
+        self.fault = {"pc": _hex(self.pc), **fault.info()}
 
     def step(self):
+        self._execute()
+        return self.get_state()
+
+    def run(self, max_steps: int = DEFAULT_MAX_STEPS, engine: str = "fast"):
+        """
+        Execute up to max_steps instructions and return the final state.
+
+        engine="fast" runs the program compiled to threaded code (see
+        fast_engine); engine="block" runs basic blocks translated to Python
+        functions (see block_engine); engine="interp" repeats the single-step
+        interpreter. All produce identical architectural results.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'. Expected one of {', '.join(ENGINES)}")
+        if engine == "fast":
+            self._run_fast(max_steps)
+        elif engine == "block":
+            self._run_blocks(max_steps)
+        else:
+            executed = 0
+            while executed < max_steps and not self.halted:
+                self._execute()
+                executed += 1
+        return self.get_state()
+
+    def _run_fast(self, max_steps: int):
+        if self.halted or max_steps <= 0:
+            return
+        base = self.program.base if self.program is not None else PROGRAM_START
+        offset = self.pc - base
+        if offset < 0 or offset % 4 or self.pc not in self.decoded:
+            self.halted = True
+            return
+        if not self.program.contiguous:
+            # images with gaps between segments cannot be compiled to a flat table
+            executed = 0
+            while executed < max_steps and not self.halted:
+                self._execute()
+                executed += 1
+            return
+        if self._compiled is None:
+            self._compiled = compile_program(self.decoded, base, self.memory.read_word, self.memory.write_word)
+        try:
+            index, executed, halted = run_table(self._compiled[0], self.registers, offset // 4, max_steps)
+        except MemoryFault as fault:
+            self.pc = base + 4 * fault.index
+            self.cycle += fault.steps
+            self._fault(fault)
+            return
+        self.pc = self._compiled[1].get(index, base + 4 * index)
+        self.cycle += executed
+        self.halted = halted
+
+    def _run_blocks(self, max_steps: int):
+        if self.halted or max_steps <= 0:
+            return
+        if self._blocks is None:
+            self._blocks = BlockCache(self.decoded, self.memory.read_word, self.memory.write_word, self.max_blocks)
+        translated = self._blocks.blocks.get  # hit path without a method call
+        get_block = self._blocks.get
+        regs = self.registers
+        pc = self.pc
+        executed = 0
+        try:
+            while executed < max_steps:
+                block = translated(pc) or get_block(pc)
+                if block is None:
+                    # fetch outside the program
+                    self.halted = True
+                    break
+                if block.length > max_steps - executed:
+                    break
+                nxt = block.fn(regs)
+                executed += block.length
+                if nxt < 0:
+                    pc = ~nxt
+                    self.halted = True
+                    break
+                pc = nxt
+        except MemoryFault as fault:
+            self.pc = fault.pc
+            self.cycle += executed + fault.steps
+            self._fault(fault)
+            return
+        self.pc = pc
+        self.cycle += executed
+        # budget left that is shorter than the next block
+        while executed < max_steps and not self.halted:
+            self._execute()
+            executed += 1
+
+    def _execute(self):
+        """Execute one instruction without building a state snapshot"""
         if self.halted:
-            return self.get_state()
+            return
 
-        instr = self.instructions.get(self.pc)
-        if not instr:
+        d = self._fetch(self.pc)
+        if not d:
             self.halted = True
-            return self.get_state()
+            return
 
-        toks = instr["tokens"]
-        op = instr["opcode"]
+        op = d.op
         nxt_pc = self.pc + 4
 
-        def get_reg(t):
-            return self.registers[self._reg_index(t)]
+        def get_reg(idx):
+            return self.registers[idx]
 
-        def set_reg(t, val):
-            idx = self._reg_index(t)
+        def set_reg(idx, val):
             if idx == 0:
                 return
             self.registers[idx] = _to_u32(val)
 
         try:
-            if op == "ADD":
-                rd, rs1, rs2 = toks[1], toks[2], toks[3]
-                set_reg(rd, get_reg(rs1) + get_reg(rs2))
-
-            elif op == "SUB":
-                rd, rs1, rs2 = toks[1], toks[2], toks[3]
-                set_reg(rd, get_reg(rs1) - get_reg(rs2))
-
-            elif op == "ADDI":
-                rd, rs1, imm = toks[1], toks[2], int(toks[3])
-                set_reg(rd, get_reg(rs1) + imm)
-
-            elif op in ("AND", "OR"):
-                rd, rs1, rs2 = toks[1], toks[2], toks[3]
-                a, b = get_reg(rs1), get_reg(rs2)
-                set_reg(rd, a & b if op == "AND" else a | b)
-
-            elif op == "ORI":
-                rd, rs1, imm = toks[1], toks[2], int(toks[3])
-                set_reg(rd, get_reg(rs1) | imm)
-
-            elif op == "SLL":
-                rd, rs1, rs2 = toks[1], toks[2], toks[3]
-                set_reg(rd, (get_reg(rs1) << (get_reg(rs2) & 0x1F)))
-
-            elif op == "SLLI":
-                rd, rs1, sh = toks[1], toks[2], int(toks[3])
-                set_reg(rd, get_reg(rs1) << (sh & 0x1F))
-
-            elif op == "SLT":
-                rd, rs1, rs2 = toks[1], toks[2], toks[3]
-                a, b = get_reg(rs1), get_reg(rs2)
+            if op == OP_ADD:
+                set_reg(d.rd, get_reg(d.rs1) + get_reg(d.rs2))
+
+            elif op == OP_SUB:
+                set_reg(d.rd, get_reg(d.rs1) - get_reg(d.rs2))
+
+            elif op == OP_ADDI:
+                set_reg(d.rd, get_reg(d.rs1) + d.imm)
+
+            elif op in (OP_AND, OP_OR):
+                a, b = get_reg(d.rs1), get_reg(d.rs2)
+                set_reg(d.rd, a & b if op == OP_AND else a | b)
+
+            elif op == OP_ORI:
+                set_reg(d.rd, get_reg(d.rs1) | d.imm)
+
+            elif op == OP_SLL:
+                set_reg(d.rd, (get_reg(d.rs1) << (get_reg(d.rs2) & 0x1F)))
+
+            elif op == OP_SLLI:
+                set_reg(d.rd, get_reg(d.rs1) << (d.imm & 0x1F))
+
+            elif op == OP_SLT:
+                a, b = get_reg(d.rs1), get_reg(d.rs2)
                 # signed compare
                 a_s = a if a < (1 << 31) else a - (1 << 32)
                 b_s = b if b < (1 << 31) else b - (1 << 32)
-                set_reg(rd, 1 if a_s < b_s else 0)
+                set_reg(d.rd, 1 if a_s < b_s else 0)
 
-            elif op == "LW":
-                rd, mem = toks[1], toks[2]
-                offset, base = mem.replace(")", "").split("(")
-                addr = get_reg(base) + int(offset)
+            elif op == OP_LW:
+                addr = get_reg(d.rs1) + d.imm
                 val = self._read_word(addr)
-                set_reg(rd, val)
+                set_reg(d.rd, val)
 
-            elif op == "SW":
-                rs2, mem = toks[1], toks[2]
-                offset, base = mem.replace(")", "").split("(")
-                addr = get_reg(base) + int(offset)
-                self._write_word(addr, get_reg(rs2))
+            elif op == OP_SW:
+                addr = get_reg(d.rs1) + d.imm
+                self._write_word(addr, get_reg(d.rs2))
 
-            elif op in ("BEQ", "BNE", "BLT", "BGE"):
-                rs1, rs2, label = toks[1], toks[2], toks[3]
-                a, b = get_reg(rs1), get_reg(rs2)
+            elif op in BRANCH_OPS:
+                a, b = get_reg(d.rs1), get_reg(d.rs2)
                 take = False
-                if op == "BEQ":
+                if op == OP_BEQ:
                     take = a == b
-                elif op == "BNE":
+                elif op == OP_BNE:
                     take = a != b
-                elif op == "BLT":
+                elif op == OP_BLT:
                     a_s = a if a < (1 << 31) else a - (1 << 32)
                     b_s = b if b < (1 << 31) else b - (1 << 32)
                     take = a_s < b_s
-                elif op == "BGE":
+                elif op == OP_BGE:
                     a_s = a if a < (1 << 31) else a - (1 << 32)
                     b_s = b if b < (1 << 31) else b - (1 << 32)
                     take = a_s >= b_s
                 if take:
-                    if label not in self.label_map:
+                    if d.target < 0:
                         self.halted = True
                     else:
-                        nxt_pc = self.label_map[label]
+                        nxt_pc = d.target
 
             else:
                 # unknown -> halt
                 self.halted = True
 
+        except MemoryFault as fault:
+            # the faulting instruction does not complete
+            self._fault(fault)
+            return
         except Exception:
             self.halted = True
 
         self.pc = nxt_pc
         self.cycle += 1
-        return self.get_state()
 
     def get_state(self):
         return {
@@ -189,6 +325,7 @@ class Simulator:
             "registers": [ _hex(r) for r in self.registers ],
             "cycle": self.cycle,
             "halted": self.halted,
+            "fault": self.fault,
         }
 
 
@@ -0,0 +1,135 @@
+"""
+RV32I instruction decoder for the subset the encoder supports.
+Turns 32-bit machine code words back into DecodedInstruction entries, so
+programs can run from a binary image in memory instead of assembly source.
+Fetch goes through DECODE_CACHE so hot loops decode each word once.
+"""
+from .encoder import OPCODES, FUNCT3, FUNCT7, decode_b_imm
+from .predecode import (
+    DecodedInstruction, OP_UNKNOWN, OP_LW, OP_SW, OP_SLLI,
+    R_TYPE_OPS, I_TYPE_OPS, BRANCH_OPS, OPCODE_NAMES,
+)
+
+DEFAULT_DECODE_CACHE_SIZE = 1 << 16  # entries
+
+# (funct3, funct7) -> op for OP, funct3 -> op for OP-IMM and BRANCH
+_R_OPS = {(FUNCT3[OPCODE_NAMES[op]], FUNCT7[OPCODE_NAMES[op]]): op for op in R_TYPE_OPS}
+_I_OPS = {FUNCT3[OPCODE_NAMES[op]]: op for op in I_TYPE_OPS}
+_BRANCH_OPS = {FUNCT3[OPCODE_NAMES[op]]: op for op in BRANCH_OPS}
+
+
+def _sign12(imm: int) -> int:
+    return imm - (1 << 12) if imm & 0x800 else imm
+
+
+def decode_word(word: int, addr: int) -> DecodedInstruction:
+    """
+    Decode one instruction word located at `addr`.
+    Words outside the supported subset decode to OP_UNKNOWN.
+    """
+    opcode = word & 0x7F
+    rd = (word >> 7) & 0x1F
+    funct3 = (word >> 12) & 0x7
+    rs1 = (word >> 15) & 0x1F
+    rs2 = (word >> 20) & 0x1F
+    funct7 = word >> 25
+
+    op = OP_UNKNOWN
+    if opcode == OPCODES["OP"]:
+        op = _R_OPS.get((funct3, funct7), OP_UNKNOWN)
+    elif opcode == OPCODES["OP_IMM"]:
+        op = _I_OPS.get(funct3, OP_UNKNOWN)
+        if op == OP_SLLI and funct7 != FUNCT7["SLLI"]:
+            op = OP_UNKNOWN
+    elif opcode == OPCODES["LOAD"]:
+        op = OP_LW if funct3 == FUNCT3["LW"] else OP_UNKNOWN
+    elif opcode == OPCODES["STORE"]:
+        op = OP_SW if funct3 == FUNCT3["SW"] else OP_UNKNOWN
+    elif opcode == OPCODES["BRANCH"]:
+        op = _BRANCH_OPS.get(funct3, OP_UNKNOWN)
+
+    name = OPCODE_NAMES.get(op, "UNKNOWN")
+    d = DecodedInstruction(addr, op, name, encoded=word)
+    if op in R_TYPE_OPS:
+        d.rd, d.rs1, d.rs2 = rd, rs1, rs2
+        d.raw = f"{name} x{rd}, x{rs1}, x{rs2}"
+    elif op in I_TYPE_OPS:
+        d.rd, d.rs1 = rd, rs1
+        d.imm = rs2 if op == OP_SLLI else _sign12(word >> 20)
+        d.raw = f"{name} x{rd}, x{rs1}, {d.imm}"
+    elif op == OP_LW:
+        d.rd, d.rs1 = rd, rs1
+        d.imm = _sign12(word >> 20)
+        d.raw = f"LW x{rd}, {d.imm}(x{rs1})"
+    elif op == OP_SW:
+        d.rs1, d.rs2 = rs1, rs2
+        d.imm = _sign12((funct7 << 5) | rd)
+        d.raw = f"SW x{rs2}, {d.imm}(x{rs1})"
+    elif op in BRANCH_OPS:
+        d.rs1, d.rs2 = rs1, rs2
+        d.imm = decode_b_imm(word)
+        d.target = (addr + d.imm) & 0xFFFFFFFF
+        d.raw = f"{name} x{rs1}, x{rs2}, 0x{d.target:08x}"
+    else:
+        d.raw = f".word 0x{word:08x}"
+    return d.finish()
+
+
+def disassemble(word: int, addr: int = 0) -> str:
+    return decode_word(word, addr).raw
+
+
+class DecodeCache:
+    """
+    Bounded cache of decoded instructions keyed by (address, word), shared by
+    every simulator in the process. Branch targets depend on the address, so
+    the address is part of the key; keying on the word as well means a store
+    that rewrites code simply misses, so no invalidation is needed. Entries
+    are never mutated, which makes sharing them across sessions safe.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_DECODE_CACHE_SIZE):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._entries = {}  # addr << 32 | word -> DecodedInstruction, oldest first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def decode(self, word: int, addr: int) -> DecodedInstruction:
+        key = addr << 32 | word
+        d = self._entries.get(key)
+        if d is not None:
+            self.hits += 1
+            return d
+        self.misses += 1
+        if len(self._entries) >= self.max_entries:
+            # drop the oldest entry
+            try:
+                del self._entries[next(iter(self._entries))]
+                self.evictions += 1
+            except (StopIteration, KeyError, RuntimeError):
+                pass  # another thread changed the dict first
+        d = self._entries[key] = decode_word(word, addr)
+        return d
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+DECODE_CACHE = DecodeCache()
@@ -120,6 +120,12 @@ def encode_b_type(opcode: int, funct3: int, rs1: int, rs2: int, imm: int) -> int
     return (imm_12 << 31) | (imm_10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (imm_4_1 << 8) | (imm_11 << 7) | opcode
 
 
+def decode_b_imm(word: int) -> int:
+    """Sign-extended branch offset held in a B-type instruction word"""
+    imm = (((word >> 31) & 0x1) << 12) | (((word >> 7) & 0x1) << 11) | (((word >> 25) & 0x3F) << 5) | (((word >> 8) & 0xF) << 1)
+    return imm - (1 << 13) if imm & 0x1000 else imm
+
+
 def encode_instruction(opcode: str, operands: list, current_addr: int, label_map: dict) -> int:
     """
     Encode a single RISC-V instruction to 32-bit machine code.
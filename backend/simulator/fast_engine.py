@@ -0,0 +1,221 @@
+"""
+Fast functional execution engine (threaded code).
+The predecoded program is compiled once into a table of specialised closures,
+one per instruction. Each closure updates the register file in place and
+returns the table index of the next instruction, so the run loop is a single
+indexed call per instruction with no per-step state construction.
+"""
+from .memory import MemoryFault
+from .predecode import (
+    OP_ADD, OP_SUB, OP_ADDI, OP_AND, OP_OR, OP_ORI, OP_SLL, OP_SLLI, OP_SLT,
+    OP_LW, OP_SW, OP_BEQ, OP_BNE, OP_BLT, OP_BGE,
+)
+
+MASK = 0xFFFFFFFF
+SIGN = 0x80000000  # xor with SIGN maps signed u32 order onto unsigned order
+
+
+def _halt_after(nxt: int):
+    """Instruction that halts the machine once executed (unknown opcode/label)"""
+    halt = -nxt - 1
+
+    def op(r):
+        return halt
+    return op
+
+
+def _nop(nxt: int):
+    def op(r):
+        return nxt
+    return op
+
+
+def _add(rd, rs1, rs2, nxt):
+    def op(r):
+        r[rd] = (r[rs1] + r[rs2]) & MASK
+        return nxt
+    return op
+
+
+def _sub(rd, rs1, rs2, nxt):
+    def op(r):
+        r[rd] = (r[rs1] - r[rs2]) & MASK
+        return nxt
+    return op
+
+
+def _and(rd, rs1, rs2, nxt):
+    def op(r):
+        r[rd] = r[rs1] & r[rs2]
+        return nxt
+    return op
+
+
+def _or(rd, rs1, rs2, nxt):
+    def op(r):
+        r[rd] = r[rs1] | r[rs2]
+        return nxt
+    return op
+
+
+def _sll(rd, rs1, rs2, nxt):
+    def op(r):
+        r[rd] = (r[rs1] << (r[rs2] & 0x1F)) & MASK
+        return nxt
+    return op
+
+
+def _slt(rd, rs1, rs2, nxt):
+    def op(r):
+        r[rd] = 1 if (r[rs1] ^ SIGN) < (r[rs2] ^ SIGN) else 0
+        return nxt
+    return op
+
+
+def _addi(rd, rs1, imm, nxt):
+    def op(r):
+        r[rd] = (r[rs1] + imm) & MASK
+        return nxt
+    return op
+
+
+def _ori(rd, rs1, imm, nxt):
+    def op(r):
+        r[rd] = (r[rs1] | imm) & MASK
+        return nxt
+    return op
+
+
+def _slli(rd, rs1, imm, nxt):
+    sh = imm & 0x1F
+
+    def op(r):
+        r[rd] = (r[rs1] << sh) & MASK
+        return nxt
+    return op
+
+
+def _lw(rd, rs1, imm, nxt, read_word):
+    def op(r):
+        r[rd] = read_word(r[rs1] + imm)
+        return nxt
+    return op
+
+
+def _lw_discard(rs1, imm, nxt, read_word):
+    def op(r):
+        read_word(r[rs1] + imm)
+        return nxt
+    return op
+
+
+def _sw(rs1, rs2, imm, nxt, write_word):
+    def op(r):
+        write_word(r[rs1] + imm, r[rs2])
+        return nxt
+    return op
+
+
+def _beq(rs1, rs2, taken, nxt):
+    def op(r):
+        return taken if r[rs1] == r[rs2] else nxt
+    return op
+
+
+def _bne(rs1, rs2, taken, nxt):
+    def op(r):
+        return taken if r[rs1] != r[rs2] else nxt
+    return op
+
+
+def _blt(rs1, rs2, taken, nxt):
+    def op(r):
+        return taken if (r[rs1] ^ SIGN) < (r[rs2] ^ SIGN) else nxt
+    return op
+
+
+def _bge(rs1, rs2, taken, nxt):
+    def op(r):
+        return taken if (r[rs1] ^ SIGN) >= (r[rs2] ^ SIGN) else nxt
+    return op
+
+
+_R_TYPE = {OP_ADD: _add, OP_SUB: _sub, OP_AND: _and, OP_OR: _or, OP_SLL: _sll, OP_SLT: _slt}
+_I_TYPE = {OP_ADDI: _addi, OP_ORI: _ori, OP_SLLI: _slli}
+_BRANCH = {OP_BEQ: _beq, OP_BNE: _bne, OP_BLT: _blt, OP_BGE: _bge}
+
+
+def compile_program(decoded: dict, base: int, read_word, write_word) -> tuple[list, dict]:
+    """
+    Compile a predecoded program into a threaded-code table.
+
+    Args:
+        decoded: addr -> DecodedInstruction, contiguous from `base`
+        base: Address of table index 0
+        read_word: Callable(addr) -> u32 used by loads
+        write_word: Callable(addr, value) used by stores
+
+    Returns:
+        (table, exits). The table lists callables indexed by (addr - base) // 4.
+        Each takes the register list and returns the next index; a negative
+        value -(i + 1) means the machine halts after this instruction with the
+        PC at index i. Branches to addresses outside the program return an
+        index past the table end that `exits` maps to the target address.
+    """
+    table = []
+    exits = {}  # index past the table -> branch target outside the program
+    for i in range(len(decoded)):
+        d = decoded[base + 4 * i]
+        op, nxt = d.op, i + 1
+        if op in _R_TYPE:
+            fn = _R_TYPE[op](d.rd, d.rs1, d.rs2, nxt) if d.rd else _nop(nxt)
+        elif op in _I_TYPE:
+            fn = _I_TYPE[op](d.rd, d.rs1, d.imm, nxt) if d.rd else _nop(nxt)
+        elif op == OP_LW:
+            fn = _lw(d.rd, d.rs1, d.imm, nxt, read_word) if d.rd else _lw_discard(d.rs1, d.imm, nxt, read_word)
+        elif op == OP_SW:
+            fn = _sw(d.rs1, d.rs2, d.imm, nxt, write_word)
+        elif op in _BRANCH:
+            if d.target < 0:
+                # taken branch to an unknown label halts
+                fn = _BRANCH[op](d.rs1, d.rs2, -nxt - 1, nxt)
+            elif (d.target - base) % 4 or not 0 <= d.target - base < 4 * len(decoded):
+                # target outside the program: the PC lands there and fetch halts
+                exit_index = len(decoded) + 1 + len(exits)
+                exits[exit_index] = d.target
+                fn = _BRANCH[op](d.rs1, d.rs2, exit_index, nxt)
+            else:
+                fn = _BRANCH[op](d.rs1, d.rs2, (d.target - base) // 4, nxt)
+        else:
+            fn = _halt_after(nxt)
+        table.append(fn)
+    return table, exits
+
+
+def run_table(table: list, registers: list, index: int, max_steps: int) -> tuple[int, int, bool]:
+    """
+    Execute a compiled table from `index` for at most `max_steps` instructions.
+
+    Returns:
+        (next index, instructions executed, halted). Running off the end of
+        the table within the budget counts as halted, like the failed fetch in
+        the single-step interpreter.
+
+    Raises:
+        MemoryFault from a load or store, annotated with `index` (the faulting
+        instruction) and `steps` (instructions completed before it)
+    """
+    size = len(table)
+    steps = 0
+    try:
+        while steps < max_steps and 0 <= index < size:
+            index = table[index](registers)
+            steps += 1
+    except MemoryFault as fault:
+        fault.index = index
+        fault.steps = steps
+        raise
+    if index < 0:
+        return -index - 1, steps, True
+    # stopping early means fetch ran off the program, which halts the machine
+    return index, steps, steps < max_steps
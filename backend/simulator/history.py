@@ -0,0 +1,76 @@
+"""
+Execution history for reverse stepping in the pipeline simulator.
+Every cycle appends an undo record holding only what the cycle changed: the
+scalar counters, the written-back register, stored memory words, the latch
+fields that differ and, for stateful predictors, the table before an update.
+Records live in a ring of `size` cycles. Keyframes (copy-on-write snapshots)
+are taken every `keyframe_interval` cycles, so seeking further back than the
+ring restores the nearest keyframe and replays forward.
+"""
+from collections import deque
+
+DEFAULT_HISTORY_SIZE = 1024  # cycles of undo records kept by interactive sessions
+DEFAULT_KEYFRAME_INTERVAL = 1024  # cycles between keyframes
+MAX_KEYFRAMES = 64  # besides the cycle-0 keyframe, which is always kept
+
+
+class UndoRecord:
+    """State needed to take the machine from cycle c + 1 back to cycle c"""
+    __slots__ = ("fields", "stall_breakdown", "register", "memory", "latches", "predictor")
+
+    def __init__(self, fields, stall_breakdown, register, memory, latches, predictor):
+        self.fields = fields  # values of SNAPSHOT_FIELDS
+        self.stall_breakdown = stall_breakdown  # dict, or None if unchanged
+        self.register = register  # (index, value, changed_at), or None
+        self.memory = memory  # [(address, word, changed_at or None)] in write order
+        self.latches = latches  # per latch: {field: old value} of changed fields
+        self.predictor = predictor  # predictor.state() before the cycle, or None if unchanged
+
+
+class History:
+    """Bounded undo ring plus keyframes for one PipelineSimulator"""
+
+    def __init__(self, size: int = DEFAULT_HISTORY_SIZE, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+        if size <= 0:
+            raise ValueError("history_size must be positive")
+        if keyframe_interval <= 0:
+            raise ValueError("keyframe_interval must be positive")
+        self.size = size
+        self.keyframe_interval = keyframe_interval
+        self.log = deque(maxlen=size)  # UndoRecord per cycle, the latest last
+        self.origin = None  # cycle-0 keyframe
+        self.keyframes = deque(maxlen=MAX_KEYFRAMES)  # Snapshots, oldest first
+
+    def clear(self):
+        self.log.clear()
+        self.origin = None
+        self.keyframes.clear()
+
+    def oldest_cycle(self, cycle: int) -> int:
+        """Earliest cycle reachable from `cycle` through the undo ring alone"""
+        return cycle - len(self.log)
+
+    def keyframe(self, cycle: int):
+        """Latest keyframe at or before `cycle`, or None"""
+        for snapshot in reversed(self.keyframes):
+            if snapshot.cycle <= cycle:
+                return snapshot
+        return self.origin if self.origin is not None and self.origin.cycle <= cycle else None
+
+    def truncate(self, cycle: int):
+        """Forget keyframes taken after `cycle` (the machine went back before them)"""
+        while self.keyframes and self.keyframes[-1].cycle > cycle:
+            self.keyframes.pop()
+
+    def needs_keyframe(self, cycle: int) -> bool:
+        if cycle % self.keyframe_interval:
+            return False
+        if cycle == 0:
+            return self.origin is None
+        return not self.keyframes or self.keyframes[-1].cycle < cycle
+
+    def add_keyframe(self, snapshot):
+        if snapshot.cycle == 0:
+            self.origin = snapshot
+        else:
+            self.keyframes.append(snapshot)
@@ -0,0 +1,22 @@
+"""
+Parsing of the initial register values given to a load, shared by the
+functional and pipeline simulators so both accept and reject the same input.
+"""
+
+
+def parse_registers(initial_regs: dict | None) -> dict | list:
+    """Register index -> u32 value of initial register values (int or hex string), or load errors"""
+    registers, errors = {}, []
+    for name, value in (initial_regs or {}).items():
+        idx = int(name[1:]) if isinstance(name, str) and name[:1] == "x" and name[1:].isdigit() else -1
+        try:
+            word = int(value, 0) if isinstance(value, str) else int(value)
+        except (TypeError, ValueError):
+            word = None
+        if not 0 <= idx < 32:
+            errors.append({"message": f"Initial registers: invalid register '{name}'", "severity": "error"})
+        elif word is None:
+            errors.append({"message": f"Initial registers: invalid value {value!r} for {name}", "severity": "error"})
+        else:
+            registers[idx] = word & 0xFFFFFFFF
+    return errors or registers
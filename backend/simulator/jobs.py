@@ -0,0 +1,206 @@
+"""
+Background simulation jobs.
+A job runs a session's simulator on a small worker thread pool in chunks of
+`check_interval` cycles. Between chunks it releases the session lock, publishes
+progress and checks for cancellation and its cycle/time quota, so long or
+runaway runs never hold a request thread and can always be stopped.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_CHECK_INTERVAL = 4096  # cycles between cancellation/progress checks (and lock releases)
+DEFAULT_MAX_JOB_CYCLES = 100_000_000  # quota ceiling per job
+DEFAULT_MAX_JOB_SECONDS = 60.0
+MAX_RETAINED_JOBS = 1024  # finished jobs kept for polling, oldest dropped first
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_CANCELLED, JOB_FAILED)
+
+# per-chunk stats that add up over a job
+_SUMMED_STATS = ("cycles", "instructions_retired", "stall_cycles", "flush_count", "branch_mispredicts")
+
+
+class JobNotFound(KeyError):
+    """Raised when a job id is unknown or has been dropped"""
+
+
+class JobBusy(RuntimeError):
+    """Raised when a session already has an unfinished job"""
+
+
+class Job:
+    """One background run of a session's simulator"""
+    __slots__ = ("id", "session", "max_cycles", "max_seconds", "run_options", "status",
+                 "cycles", "created", "started", "finished", "result", "error", "cancel_event")
+
+    def __init__(self, session, max_cycles: int, max_seconds: float, run_options: dict):
+        self.id = uuid.uuid4().hex
+        self.session = session
+        self.max_cycles = max_cycles
+        self.max_seconds = max_seconds
+        self.run_options = run_options  # breakpoints / watch_registers / watch_memory for sim.run()
+        self.status = JOB_QUEUED
+        self.cycles = 0  # cycles simulated so far
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None  # final run result, like /api/sim/run
+        self.error = None
+        self.cancel_event = threading.Event()
+
+    def info(self) -> dict:
+        elapsed = None
+        if self.started is not None:
+            elapsed = round((self.finished or time.time()) - self.started, 3)
+        return {
+            "job_id": self.id,
+            "session_id": self.session.id,
+            "status": self.status,
+            "progress": {
+                "cycles": self.cycles,
+                "max_cycles": self.max_cycles,
+                "fraction": round(self.cycles / self.max_cycles, 4) if self.max_cycles else None,
+                "elapsed_seconds": elapsed,
+                "max_seconds": self.max_seconds,
+            },
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobPool:
+    """Thread pool running Jobs, with server-wide quota ceilings"""
+
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS, check_interval: int = DEFAULT_CHECK_INTERVAL,
+                 max_cycles: int = DEFAULT_MAX_JOB_CYCLES, max_seconds: float = DEFAULT_MAX_JOB_SECONDS):
+        if check_interval <= 0:
+            raise ValueError("check_interval must be positive")
+        self.max_workers = max_workers
+        self.check_interval = check_interval
+        self.max_cycles = max_cycles
+        self.max_seconds = max_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sim-job")
+        self._jobs = OrderedDict()  # id -> Job, oldest first
+        self._active = {}  # session id -> unfinished Job
+        self._lock = threading.Lock()
+
+    def submit(self, session, max_cycles: int | None = None, max_seconds: float | None = None,
+               **run_options) -> Job:
+        """
+        Queue a run of `session`'s simulator. Quotas default to, and are capped
+        at, the pool's ceilings. Raises JobBusy if the session already has an
+        unfinished job.
+        """
+        max_cycles = self.max_cycles if max_cycles is None else max(0, min(max_cycles, self.max_cycles))
+        max_seconds = self.max_seconds if max_seconds is None else max(0.0, min(max_seconds, self.max_seconds))
+        job = Job(session, max_cycles, max_seconds, run_options)
+        with self._lock:
+            active = self._active.get(session.id)
+            if active is not None and active.status not in FINISHED_STATES:
+                raise JobBusy(f"Session '{session.id}' already has job '{active.id}' {active.status}")
+            self._active[session.id] = job
+            self._jobs[job.id] = job
+            self._drop_finished()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """Request cancellation; a running job stops at its next check"""
+        job = self.get(job_id)
+        job.cancel_event.set()
+        return job
+
+    def jobs(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _drop_finished(self):
+        """Keep at most MAX_RETAINED_JOBS (caller holds the pool lock)"""
+        excess = len(self._jobs) - MAX_RETAINED_JOBS
+        for job_id in [j.id for j in self._jobs.values() if j.status in FINISHED_STATES][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job):
+        job.started = time.time()
+        job.status = JOB_RUNNING
+        deadline = time.perf_counter() + job.max_seconds
+        stats = dict.fromkeys(_SUMMED_STATS, 0)
+        result = None
+        stop_reason = None
+        try:
+            while True:
+                if job.cancel_event.is_set():
+                    stop_reason = "cancelled"
+                    break
+                remaining = job.max_cycles - job.cycles
+                seconds = deadline - time.perf_counter()
+                if remaining <= 0:
+                    stop_reason = "max_cycles"
+                    break
+                if seconds <= 0:
+                    stop_reason = "max_seconds"
+                    break
+                with job.session.lock:
+                    result = job.session.sim.run(max_cycles=min(self.check_interval, remaining),
+                                                 max_seconds=seconds, **job.run_options)
+                for key in _SUMMED_STATS:
+                    stats[key] += result["stats"][key]
+                job.cycles = stats["cycles"]
+                if result["stop_reason"] not in ("max_cycles", "max_seconds"):
+                    stop_reason = result["stop_reason"]
+                    break
+            if result is None:
+                with job.session.lock:
+                    result = {"state": job.session.sim.get_state(), "stop_at": None}
+            job.finished = time.time()
+            stats["cpi"] = round(stats["cycles"] / stats["instructions_retired"], 4) if stats["instructions_retired"] else None
+            stats["elapsed_ms"] = round((job.finished - job.started) * 1000, 3)
+            job.result = {
+                "state": result["state"],
+                "stop_reason": stop_reason,
+                "stop_at": result["stop_at"] if stop_reason == result.get("stop_reason") else None,
+                "stats": stats,
+            }
+            job.status = JOB_CANCELLED if stop_reason == "cancelled" else JOB_DONE
+        except Exception as e:
+            job.finished = time.time()
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            # the session is no longer pinned by this job
+            with self._lock:
+                if self._active.get(job.session.id) is job:
+                    del self._active[job.session.id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.max_workers,
+            "check_interval": self.check_interval,
+            "max_cycles": self.max_cycles,
+            "max_seconds": self.max_seconds,
+            "jobs": counts,
+        }
+
+    def shutdown(self):
+        for job in self.jobs():
+            job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+"""
+Binary program images: raw little-endian binaries and Intel HEX files.
+An Image is a list of (address, bytes) segments plus an entry point. The
+simulators copy the segments into data memory and fetch instructions from
+there, decoding each word through decoder.DECODE_CACHE.
+"""
+from .assembler import Program
+from .decoder import DECODE_CACHE
+
+IMAGE_FORMATS = ("bin", "ihex")
+
+
+class Image:
+    """Loadable memory image"""
+
+    def __init__(self, segments: list, entry: int | None = None):
+        self.segments = [(addr, bytes(data)) for addr, data in segments if data]
+        if not self.segments:
+            raise ValueError("Image contains no data")
+        self.start = min(addr for addr, _ in self.segments)
+        self.end = max(addr + len(data) for addr, data in self.segments)  # exclusive
+        self.entry = self.start if entry is None else entry
+
+    def write_to(self, memory):
+        """Copy every segment into a PagedMemory (raises MemoryFault if it does not fit)"""
+        for addr, data in self.segments:
+            memory.write_bytes(addr, data)
+
+    def program(self) -> Program:
+        """Disassembled Program covering every aligned word of the image"""
+        program = Program((self.start + 3) & ~3)
+        for addr, data in sorted(self.segments):
+            first = (addr + 3) & ~3
+            for a in range(first, addr + len(data) - 3, 4):
+                word = int.from_bytes(data[a - addr:a - addr + 4], "little")
+                program.decoded[a] = DECODE_CACHE.decode(word, a)
+        return program
+
+
+def parse_binary(data: bytes, base: int) -> Image:
+    """Raw little-endian image loaded at `base`, entry at `base`"""
+    return Image([(base, data)], base)
+
+
+def parse_ihex(text: str) -> Image:
+    """
+    Parse Intel HEX text. Supports data, end-of-file, extended segment/linear
+    address and start address records; checksums are verified.
+    """
+    segments = []
+    upper = 0  # base added to 16-bit record addresses
+    entry = None
+    for n, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith(":"):
+            raise ValueError(f"Intel HEX line {n}: record must start with ':'")
+        try:
+            record = bytes.fromhex(line[1:])
+        except ValueError:
+            raise ValueError(f"Intel HEX line {n}: invalid hex digits")
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ValueError(f"Intel HEX line {n}: wrong record length")
+        if sum(record) & 0xFF:
+            raise ValueError(f"Intel HEX line {n}: checksum mismatch")
+
+        addr = (record[1] << 8) | record[2]
+        rtype = record[3]
+        data = record[4:-1]
+        if rtype == 0x00:
+            segments.append((upper + addr, data))
+        elif rtype == 0x01:
+            break
+        elif rtype == 0x02:
+            upper = int.from_bytes(data, "big") << 4
+        elif rtype == 0x03:
+            entry = (int.from_bytes(data[:2], "big") << 4) + int.from_bytes(data[2:], "big")
+        elif rtype == 0x04:
+            upper = int.from_bytes(data, "big") << 16
+        elif rtype == 0x05:
+            entry = int.from_bytes(data, "big")
+        else:
+            raise ValueError(f"Intel HEX line {n}: unsupported record type {rtype:02x}")
+    return Image(segments, entry)
+
+
+def parse_image(data: bytes | str, fmt: str, base: int) -> Image:
+    """
+    Parse an image in one of IMAGE_FORMATS.
+
+    Args:
+        data: Raw bytes for "bin"; text (or ASCII bytes) for "ihex"
+        fmt: "bin" or "ihex"
+        base: Load address of a raw binary; Intel HEX carries its own addresses
+    """
+    if fmt == "bin":
+        return parse_binary(data, base)
+    if fmt == "ihex":
+        return parse_ihex(data.decode("ascii") if isinstance(data, bytes) else data)
+    raise ValueError(f"Unknown image format '{fmt}'. Expected one of {', '.join(IMAGE_FORMATS)}")
@@ -0,0 +1,133 @@
+"""
+Sparse paged data memory shared by the functional and pipelined simulators.
+The address space is split into 4 KiB pages that are allocated on the first
+write, so a large configured size costs nothing until it is used. Reads of
+untouched pages return zero. Accesses outside the configured size raise
+MemoryFault instead of being silently ignored. snapshot() shares the pages
+copy-on-write, so snapshots and forked machines cost nothing until they write.
+"""
+import sys
+
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT  # 4 KiB
+PAGE_MASK = PAGE_SIZE - 1
+MAX_MEMORY_SIZE = 1 << 32
+DEFAULT_MEMORY_SIZE = 0x0100
+
+# Aligned words are read through a native uint32 view of each page, which is
+# only little-endian on little-endian hosts
+_WORD_VIEWS = sys.byteorder == "little"
+
+
+class MemoryFault(IndexError):
+    """Access outside the configured address space"""
+
+    def __init__(self, addr: int, access: str, size: int):
+        super().__init__(f"Memory {access} fault at {_hex_addr(addr)} (memory size 0x{size:x})")
+        self.addr = addr
+        self.access = access  # "read" or "write"
+        self.size = size
+
+    def info(self) -> dict:
+        """JSON-friendly description for simulator state"""
+        return {"addr": _hex_addr(self.addr), "access": self.access, "message": str(self)}
+
+
+def _hex_addr(addr: int) -> str:
+    # effective addresses below zero are shown as their u32 wrap-around
+    return f"0x{addr if addr >= 0 else addr & 0xFFFFFFFF:08x}"
+
+
+class PagedMemory:
+    """Byte-addressed little-endian memory of `size` bytes backed by lazily allocated pages"""
+
+    def __init__(self, size: int = DEFAULT_MEMORY_SIZE):
+        if not 4 <= size <= MAX_MEMORY_SIZE:
+            raise ValueError(f"memory_size must be between 4 and 0x{MAX_MEMORY_SIZE:x} bytes")
+        self.size = size
+        self._last_word = size - 4  # highest address a word access may start at
+        self.pages = {}  # page number -> bytearray(PAGE_SIZE)
+        self._words = {}  # page number -> uint32 memoryview of the same page
+        self._shared = set()  # pages also referenced by a snapshot; copied before the next write
+
+    def __len__(self):
+        return self.size
+
+    def _page(self, number: int) -> bytearray:
+        """Writable page `number`, allocated on first use and copied if shared"""
+        page = self.pages.get(number)
+        if page is None or number in self._shared:
+            page = self.pages[number] = bytearray(PAGE_SIZE) if page is None else bytearray(page)
+            self._shared.discard(number)
+            if _WORD_VIEWS:
+                self._words[number] = memoryview(page).cast("I")
+        return page
+
+    def snapshot(self) -> dict:
+        """Pages as of now (page number -> bytearray); shared, never to be modified"""
+        self._shared = set(self.pages)
+        return dict(self.pages)
+
+    def restore(self, pages: dict):
+        """Replace the contents with a snapshot(), sharing its pages copy-on-write"""
+        self.pages = dict(pages)
+        self._shared = set(pages)
+        self._words = {n: memoryview(p).cast("I") for n, p in pages.items()} if _WORD_VIEWS else {}
+
+    def read_word(self, addr: int) -> int:
+        if addr < 0 or addr > self._last_word:
+            raise MemoryFault(addr, "read", self.size)
+        if _WORD_VIEWS and not addr & 3:
+            words = self._words.get(addr >> PAGE_SHIFT)
+            return words[(addr & PAGE_MASK) >> 2] if words is not None else 0
+        return int.from_bytes(self.read_bytes(addr, 4), "little")
+
+    def write_word(self, addr: int, val: int):
+        if addr < 0 or addr > self._last_word:
+            raise MemoryFault(addr, "write", self.size)
+        if _WORD_VIEWS and not addr & 3:
+            number = addr >> PAGE_SHIFT
+            words = self._words.get(number)
+            if words is None or self._shared and number in self._shared:
+                self._page(number)
+                words = self._words[number]
+            words[(addr & PAGE_MASK) >> 2] = val & 0xFFFFFFFF
+            return
+        self.write_bytes(addr, (val & 0xFFFFFFFF).to_bytes(4, "little"))
+
+    def read_bytes(self, addr: int, length: int) -> bytes:
+        """Read `length` bytes, which may span pages"""
+        if addr < 0 or length < 0 or addr + length > self.size:
+            raise MemoryFault(addr, "read", self.size)
+        out = bytearray(length)
+        done = 0
+        while done < length:
+            a = addr + done
+            offset = a & PAGE_MASK
+            n = min(length - done, PAGE_SIZE - offset)
+            page = self.pages.get(a >> PAGE_SHIFT)
+            if page is not None:
+                out[done:done + n] = page[offset:offset + n]
+            done += n
+        return bytes(out)
+
+    def write_bytes(self, addr: int, data: bytes):
+        """Write a byte string, which may span pages"""
+        if addr < 0 or addr + len(data) > self.size:
+            raise MemoryFault(addr, "write", self.size)
+        done = 0
+        while done < len(data):
+            a = addr + done
+            offset = a & PAGE_MASK
+            n = min(len(data) - done, PAGE_SIZE - offset)
+            self._page(a >> PAGE_SHIFT)[offset:offset + n] = data[done:done + n]
+            done += n
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "page_size": PAGE_SIZE,
+            "pages_allocated": len(self.pages),
+            "pages_shared": len(self._shared),
+            "bytes_allocated": len(self.pages) * PAGE_SIZE,
+        }
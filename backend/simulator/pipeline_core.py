@@ -1,13 +1,54 @@
 """
 RISC-V 5-stage pipeline simulator with hazard detection.
-Implements IF, ID, EX, MEM, WB stages with data hazard stalls (no forwarding)
-and control hazard handling (predict-not-taken for Group 2).
+Implements IF, ID, EX, MEM, WB stages with a configurable hazard unit (stall-only,
+or EX->EX / MEM->EX forwarding) and control hazard handling through a pluggable
+branch predictor (predict-not-taken for Group 2 by default). Branches resolve in
+EX, or optionally in ID with a comparator there.
 """
-from .assembler import validate_program
-from .encoder import encode_instruction
+import itertools
+import time
 
-MEMORY_SIZE = 0x0100
-PROGRAM_START = 0x0080  # Program at 0x0080-0x00FF, data at 0x0000-0x007F
+from .assembler import Program
+from .branch_predictor import make_predictor, DEFAULT_BHT_SIZE, DEFAULT_BTB_SIZE
+from .decoder import DECODE_CACHE
+from .history import History, UndoRecord
+from .initial_state import parse_registers
+from .loader import Image
+from .memory import PagedMemory, MemoryFault, DEFAULT_MEMORY_SIZE
+from .predecode import (
+    OP_UNKNOWN, OP_ADD, OP_SUB, OP_ADDI, OP_AND, OP_OR, OP_ORI, OP_SLL,
+    OP_SLLI, OP_SLT, OP_LW, OP_SW, OP_BEQ, OP_BNE, OP_BLT, OP_BGE, BRANCH_OPS,
+)
+from .profiler import Profiler
+from .program_cache import PROGRAM_CACHE
+from .trace import TraceRecorder
+
+MEMORY_SIZE = DEFAULT_MEMORY_SIZE
+PROGRAM_START = 0x0080  # Program at 0x0080-0x00FF, data at 0x0000-0x007F (default layout)
+DEFAULT_RUN_CYCLES = 10000
+TIME_CHECK_INTERVAL = 256  # cycles between wall-clock budget checks
+FULL_STATE_INTERVAL = 100  # delta responses fall back to a full snapshot at this cycle period
+
+LATCH_NAMES = ("IF", "IF/ID", "ID/EX", "EX/MEM", "MEM/WB", "WB")
+COUNTER_NAMES = ("stall_cycles", "stall_breakdown", "branch_count", "flush_count", "branch_prediction")
+
+# Hazard unit policies
+HAZARD_STALL = "stall"  # no forwarding: stall until the producer has written back
+HAZARD_FORWARD = "forward"  # ideal forwarding, load data included: never stalls
+HAZARD_FORWARD_LOAD_USE = "forward_load_use"  # forwarding, one stall on load-use
+HAZARD_POLICIES = (HAZARD_STALL, HAZARD_FORWARD, HAZARD_FORWARD_LOAD_USE)
+
+# Stage that resolves branches
+BRANCH_IN_EX = "ex"  # mispredicts flush IF/ID and ID/EX
+BRANCH_IN_ID = "id"  # comparator in ID, mispredicts flush IF/ID only
+BRANCH_RESOLUTIONS = (BRANCH_IN_EX, BRANCH_IN_ID)
+
+# Stall causes reported in stall_breakdown. branch_ex/branch_load are the extra
+# stalls of a branch resolved in ID waiting for an ALU result one instruction
+# ahead or a load two instructions ahead.
+STALL_CAUSES = ("raw_ex", "raw_mem", "raw_wb", "load_use", "branch_ex", "branch_load")
+
+_EPOCHS = itertools.count(1)
 
 
 def _hex(x: int) -> str:
@@ -23,6 +64,17 @@ def _to_signed(x: int) -> int:
     return x if x < (1 << 31) else x - (1 << 32)
 
 
+def _branch_taken(op: int, a: int, b: int) -> bool:
+    """Branch comparator"""
+    if op == OP_BEQ:
+        return a == b
+    if op == OP_BNE:
+        return a != b
+    if op == OP_BLT:
+        return _to_signed(a) < _to_signed(b)
+    return _to_signed(a) >= _to_signed(b)
+
+
 class PipelineRegister:
     """Base class for pipeline registers between stages"""
     def __init__(self):
@@ -30,7 +82,11 @@ class PipelineRegister:
         
     def flush(self):
         """Clear to NOP/bubble"""
-        self.__init__()
+        blank = type(self).__dict__.get("_blank")
+        if blank is None:
+            # field defaults of a freshly constructed latch, built once per class
+            blank = type(self)._blank = dict(type(self)().__dict__)
+        self.__dict__.update(blank)
 
 
 class IFID(PipelineRegister):
@@ -42,6 +98,9 @@ class IFID(PipelineRegister):
         self.pc = 0  # current PC
         self.raw = ""  # raw instruction text
         self.addr = 0  # instruction address
+        self.instr = None  # DecodedInstruction fetched into this latch
+        self.predicted_taken = False  # IF fetched the branch target next
+        self.predicted_target = 0  # address IF fetched next when predicted_taken
 
 
 class IDEX(PipelineRegister):
@@ -60,11 +119,13 @@ class IDEX(PipelineRegister):
         self.raw = ""
         self.addr = 0
         # control signals
-        self.alu_op = ""
+        self.alu_op = OP_UNKNOWN
         self.mem_read = False
         self.mem_write = False
         self.branch = False
         self.reg_write = False
+        self.predicted_taken = False
+        self.predicted_target = 0
 
 
 class EXMEM(PipelineRegister):
@@ -100,17 +161,88 @@ class MEMWB(PipelineRegister):
         self.mem_to_reg = False  # True if LW
 
 
+# Scalar machine state captured by snapshots, in addition to registers, latches,
+# memory, predictor tables and the loaded program
+SNAPSHOT_FIELDS = (
+    "pc", "cycle", "halted", "fault", "stall",
+    "stall_cycles", "branch_count", "flush_count", "retired",
+    "branch_predictions", "branch_mispredicts", "flush_cycles",
+)
+
+
+class Snapshot:
+    """
+    Frozen copy of a PipelineSimulator. Memory pages are shared copy-on-write
+    with the machine it was taken from, and the loaded program is shared, so a
+    snapshot costs a few small copies regardless of memory size.
+    """
+    __slots__ = ("config", "fields", "registers", "latches", "stall_breakdown",
+                 "predictor", "pages", "program", "image", "mem_changed_at", "taken_at")
+
+    def __init__(self, sim):
+        self.config = sim.config()
+        self.fields = {name: getattr(sim, name) for name in SNAPSHOT_FIELDS}
+        self.registers = list(sim.registers)
+        self.latches = tuple(dict(latch.__dict__) for latch in (sim.ifid, sim.idex, sim.exmem, sim.memwb))
+        self.stall_breakdown = dict(sim.stall_breakdown)
+        self.predictor = sim.predictor.state()
+        self.pages = sim.memory.snapshot()
+        self.program = sim.program
+        self.image = sim.image
+        self.mem_changed_at = dict(sim.mem_changed_at)  # written words, listed in full states
+        self.taken_at = time.time()
+
+    @property
+    def cycle(self) -> int:
+        return self.fields["cycle"]
+
+    def info(self) -> dict:
+        return {"cycle": self.cycle, "pc": _hex(self.fields["pc"]), "halted": self.fields["halted"],
+                "taken_at": self.taken_at, "config": self.config}
+
+
 class PipelineSimulator:
     """5-stage pipelined RISC-V simulator"""
+
+    # Binary trace recorder (see start_trace). Set on the instance only while
+    # tracing, so it survives the __init__ re-run by reset() and restore().
+    tracer = None
     
-    def __init__(self):
-        self.memory = bytearray(MEMORY_SIZE)
+    def __init__(self, hazard_policy: str = HAZARD_STALL, branch_predictor: str = "not_taken",
+                 bht_size: int = DEFAULT_BHT_SIZE, btb_size: int = DEFAULT_BTB_SIZE,
+                 branch_resolution: str = BRANCH_IN_EX, memory_size: int = MEMORY_SIZE,
+                 history_size: int = 0, profile: bool = False):
+        if hazard_policy not in HAZARD_POLICIES:
+            raise ValueError(f"Unknown hazard policy '{hazard_policy}'. Expected one of {', '.join(HAZARD_POLICIES)}")
+        if branch_resolution not in BRANCH_RESOLUTIONS:
+            raise ValueError(f"Unknown branch resolution '{branch_resolution}'. Expected one of {', '.join(BRANCH_RESOLUTIONS)}")
+        if history_size < 0:
+            raise ValueError("history_size must not be negative")
+        # Everything that can reject an option is built before the first assignment,
+        # so a failed configure() leaves the running machine untouched
+        predictor = make_predictor(branch_predictor, bht_size, btb_size)
+        memory = PagedMemory(memory_size)
+
+        self.hazard_policy = hazard_policy
+        self.forwarding = hazard_policy != HAZARD_STALL
+        self.branch_resolution = branch_resolution
+        self.branch_in_id = branch_resolution == BRANCH_IN_ID
+        self.predictor = predictor
+        self.bht_size = bht_size
+        self.btb_size = btb_size
+
+        self.memory = memory
+        self.memory_size = memory_size
         self.registers = [0] * 32
         self.pc = PROGRAM_START
         self.cycle = 0
-        self.instructions = {}  # addr -> {'tokens', 'raw', 'opcode', 'encoded'}
+        self.program = None  # assembler.Program
+        self.decoded = {}  # addr -> DecodedInstruction
+        self.image = None  # loader.Image when running a binary image
+        self._fetch = self.decoded.get  # pc -> DecodedInstruction or None
         self.label_map = {}
         self.halted = False
+        self.fault = None  # memory fault that halted the machine
         
         # Pipeline registers
         self.ifid = IFID()
@@ -123,27 +255,193 @@ class PipelineSimulator:
         
         # Statistics
         self.stall_cycles = 0
-        self.branch_count = 0
+        self.stall_breakdown = dict.fromkeys(STALL_CAUSES, 0)  # stall cycles per cause
+        self.branch_count = 0  # taken branches
         self.flush_count = 0
+        self.retired = 0
+        self.branch_predictions = 0  # resolved branches
+        self.branch_mispredicts = 0
+        self.flush_cycles = 0  # pipeline stages flushed on mispredicts
+
+        # Change tracking for delta state responses
+        self.epoch = next(_EPOCHS)  # identifies this machine between resets
+        self.reg_changed_at = [0] * 32  # cycle of the last write that changed each register
+        self.mem_changed_at = {}  # word address -> cycle of the last write
+        self._delta_cache = {}  # latch/counter name -> (raw key, formatted value, cycle first seen)
+
+        # Reverse stepping: undo ring of history_size cycles (0 disables it)
+        self.history_size = history_size
+        self.history = History(history_size) if history_size else None
+        self._undo = None  # UndoRecord of the cycle being executed while recording
+
+        # Per-PC profiler; None when disabled so every hook is a single test
+        self.profiler = Profiler() if profile else None
+
+    def config(self) -> dict:
+        """Constructor options, preserved across reset()"""
+        return {
+            "hazard_policy": self.hazard_policy,
+            "branch_predictor": self.predictor.name,
+            "bht_size": self.bht_size,
+            "btb_size": self.btb_size,
+            "branch_resolution": self.branch_resolution,
+            "memory_size": self.memory_size,
+            "history_size": self.history_size,
+            "profile": self.profiler is not None,
+        }
+
+    @property
+    def branch_prediction(self) -> dict:
+        """Predictor name and accuracy statistics"""
+        return {
+            "predictor": self.predictor.name,
+            "resolved_in": self.branch_resolution,
+            "predictions": self.branch_predictions,
+            "mispredicts": self.branch_mispredicts,
+            "accuracy": round(1 - self.branch_mispredicts / self.branch_predictions, 4) if self.branch_predictions else None,
+            "flush_cycles": self.flush_cycles,
+        }
+
+    def configure(self, **options):
+        """Change constructor options and reset the machine"""
+        self.__init__(**{**self.config(), **options})
 
     def reset(self):
-        self.__init__()
+        self.__init__(**self.config())
+
+    def snapshot(self) -> Snapshot:
+        """Capture the complete machine state (see Snapshot)"""
+        return Snapshot(self)
+
+    def restore(self, snapshot: Snapshot):
+        """
+        Return to a snapshot, including its options. The machine gets a new
+        epoch, so delta clients resynchronise with a full state.
+        """
+        self.__init__(**snapshot.config)
+        for name, value in snapshot.fields.items():
+            setattr(self, name, value)
+        self.registers = list(snapshot.registers)
+        for latch, fields in zip((self.ifid, self.idex, self.exmem, self.memwb), snapshot.latches):
+            latch.__dict__.update(fields)
+        self.stall_breakdown = dict(snapshot.stall_breakdown)
+        self.predictor.restore(snapshot.predictor)
+        self.memory.restore(snapshot.pages)
+        self.mem_changed_at = dict(snapshot.mem_changed_at)
+        self.program = snapshot.program
+        self.image = snapshot.image
+        if self.program is not None:
+            self.decoded = self.program.decoded
+            self.label_map = self.program.labels
+        self._fetch = self._fetch_memory if self.image is not None else self.decoded.get
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "PipelineSimulator":
+        sim = cls(**snapshot.config)
+        sim.restore(snapshot)
+        return sim
+
+    def fork(self, count: int) -> list:
+        """`count` independent machines starting from the current state"""
+        snapshot = self.snapshot()
+        return [PipelineSimulator.from_snapshot(snapshot) for _ in range(count)]
+
+    def set_inputs(self, registers: dict | None = None, memory: dict | None = None) -> list:
+        """Overwrite registers and memory words mid-run, e.g. to make forks diverge; returns errors"""
+        if self.history is not None:
+            self.history.clear()  # earlier cycles no longer lead to this state
+        return self._set_initial_state(registers, memory)
+
+    def profile_report(self) -> dict:
+        """Per-PC profile rows plus run totals (requires profile=True)"""
+        if self.profiler is None:
+            raise ValueError("Profiling is disabled (load with profile=true)")
+        return {
+            "cycles": self.cycle,
+            "instructions_retired": self.retired,
+            "instructions": self.profiler.report(self.decoded),
+        }
+
+    def start_trace(self, path: str | None = None, **options) -> TraceRecorder:
+        """
+        Record every following cycle to a binary trace (see trace.TraceRecorder),
+        at `path` or in a temporary file. Replaces a trace already running.
+        """
+        self.stop_trace()
+        self.tracer = TraceRecorder(path, **options)
+        return self.tracer
+
+    def stop_trace(self) -> TraceRecorder | None:
+        """Detach and close the trace recorder; returns it, or None if none was running"""
+        tracer = self.tracer
+        if tracer is not None:
+            del self.tracer  # back to the class default
+            tracer.close()
+        return tracer
 
     def load_program(self, source: str, initial_regs: dict | None = None, initial_memory: dict | None = None):
         """Load and validate program, optionally set initial register values and memory"""
-        res = validate_program(source)
-        if res["errors"]:
-            return res
+        return self.load_assembled(PROGRAM_CACHE.get(source, PROGRAM_START), initial_regs, initial_memory)
+
+    def load_assembled(self, program: Program, initial_regs: dict | None = None,
+                       initial_memory: dict | None = None):
+        """Load an already assembled program (based at PROGRAM_START); it is shared, not copied"""
+        if program.errors:
+            return {"instructions": program.listing(), "errors": program.errors}
 
         self.reset()
+        errors = self._set_initial_state(initial_regs, initial_memory)
+        if errors:
+            return {"instructions": [], "errors": errors}
+        
+        self.program = program
+        self.decoded = program.decoded
+        self._fetch = self.decoded.get
+        self.label_map = program.labels
+        self.pc = PROGRAM_START
         
-        # Set initial register values if provided
-        if initial_regs:
-            for reg_name, value in initial_regs.items():
-                if reg_name.startswith('x'):
-                    idx = int(reg_name[1:])
-                    if 0 < idx < 32:  # x0 is always 0
-                        self.registers[idx] = _to_u32(value)
+        return {
+            "instructions": program.listing(),
+            "errors": [],
+            "labels": program.label_listing()
+        }
+
+    def load_image(self, image: Image, initial_regs: dict | None = None, initial_memory: dict | None = None):
+        """
+        Load a binary image (see loader) into data memory and start at its entry
+        point. Instructions are then fetched from memory and decoded on fetch.
+        """
+        self.reset()
+        try:
+            image.write_to(self.memory)
+        except MemoryFault as e:
+            return {"instructions": [], "errors": [{"message": f"Image: {e}", "severity": "error"}]}
+        errors = self._set_initial_state(initial_regs, initial_memory)
+        if errors:
+            return {"instructions": [], "errors": errors}
+
+        self.image = image
+        self.program = image.program()  # disassembly for display
+        self.decoded = self.program.decoded
+        self._fetch = self._fetch_memory
+        self.pc = image.entry
+
+        return {
+            "instructions": self.program.listing(),
+            "errors": [],
+            "labels": {},
+            "entry": _hex(image.entry)
+        }
+
+    def _set_initial_state(self, initial_regs: dict | None, initial_memory: dict | None) -> list:
+        """Apply initial register values and memory words; returns load errors"""
+        # Set initial register values if provided (int or hex string); checked before any is written
+        registers = parse_registers(initial_regs)
+        if isinstance(registers, list):
+            return registers
+        for idx, value in registers.items():
+            if idx:  # x0 is always 0
+                self.registers[idx] = value
 
         # Set initial memory if provided. Expect a mapping address->word (int or hex-string)
         if initial_memory:
@@ -158,132 +456,143 @@ class PipelineSimulator:
                     word = int(val, 0) if isinstance(val, str) else int(val)
                 except Exception:
                     continue
-                # write as a 32-bit little-endian word if within bounds
-                if 0 <= addr < MEMORY_SIZE and addr + 4 <= MEMORY_SIZE:
+                # write as a 32-bit little-endian word
+                try:
                     self._write_word(addr, _to_u32(word))
-        
-        addr = PROGRAM_START
-        lines = source.splitlines()
-        
-        for raw in lines:
-            line = raw.strip()
-            if not line:
-                continue
-                
-            # Handle labels
-            if ":" in line:
-                label, rest = line.split(":", 1)
-                label = label.strip()
-                if label:
-                    self.label_map[label] = addr
-                line = rest.strip()
-                if not line:
-                    continue
-
-            tokens = line.replace(",", "").split()
-            opcode = tokens[0].upper()
-            
-            # Encode instruction
-            encoded = encode_instruction(opcode, tokens[1:], addr, self.label_map)
-            
-            self.instructions[addr] = {
-                "tokens": tokens,
-                "raw": line,
-                "opcode": opcode,
-                "encoded": encoded
-            }
-            addr += 4
-
-        self.pc = PROGRAM_START
-        
-        return {
-            "instructions": [
-                {
-                    "line": i+1,
-                    "opcode": v["opcode"],
-                    "raw": v["raw"],
-                    "address": _hex(a),
-                    "hex": _hex(v["encoded"])
-                }
-                for i, (a, v) in enumerate(self.instructions.items())
-            ],
-            "errors": [],
-            "labels": {k: _hex(v) for k, v in self.label_map.items()}
-        }
+                except MemoryFault as e:
+                    return [{"message": f"Initial memory: {e}", "severity": "error"}]
+        return []
 
-    def _reg_index(self, r: str) -> int:
-        return int(r.lstrip("x"))
+    def _fetch_memory(self, pc: int):
+        """Fetch and decode the instruction word at `pc` (binary images); None outside the image"""
+        if pc & 3 or not self.image.start <= pc <= self.image.end - 4:
+            return None
+        return DECODE_CACHE.decode(self.memory.read_word(pc), pc)
 
     def _read_word(self, addr: int) -> int:
-        if addr < 0 or addr + 4 > MEMORY_SIZE:
-            return 0
-        return int.from_bytes(self.memory[addr:addr + 4], "little")
+        return self.memory.read_word(addr)
 
     def _write_word(self, addr: int, val: int):
-        if addr < 0 or addr + 4 > MEMORY_SIZE:
-            return
-        self.memory[addr:addr + 4] = _to_u32(val).to_bytes(4, "little")
+        if self._undo is not None:
+            try:
+                self._undo.memory.append((addr, self.memory.read_word(addr), self.mem_changed_at.get(addr)))
+            except MemoryFault:
+                pass  # the write below faults as well
+        self.memory.write_word(addr, val)
+        self.mem_changed_at[addr] = self.cycle + 1
 
-    def _detect_hazard(self) -> bool:
-        """Detect RAW hazard: ID stage needs value being computed in EX/MEM/WB"""
-        if self.ifid.nop:
-            return False
-            
-        instr = self.instructions.get(self.ifid.addr)
-        if not instr:
-            return False
-            
-        tokens = instr["tokens"]
-        opcode = instr["opcode"]
-        
-        # Determine source registers for current instruction in ID
-        src_regs = []
-        if opcode in ["ADD", "SUB", "AND", "OR", "SLT", "SLL"]:
-            src_regs = [self._reg_index(tokens[2]), self._reg_index(tokens[3])]
-        elif opcode in ["ADDI", "ORI", "SLLI"]:
-            src_regs = [self._reg_index(tokens[2])]
-        elif opcode == "LW":
-            base = tokens[2].split("(")[1].replace(")", "")
-            src_regs = [self._reg_index(base)]
-        elif opcode == "SW":
-            src_regs = [self._reg_index(tokens[1])]
-            base = tokens[2].split("(")[1].replace(")", "")
-            src_regs.append(self._reg_index(base))
-        elif opcode in ["BEQ", "BNE", "BLT", "BGE"]:
-            src_regs = [self._reg_index(tokens[1]), self._reg_index(tokens[2])]
-        
-        # Check if any source register is destination of instruction in EX/MEM/WB
+    def _fault(self, fault: MemoryFault):
+        """
+        Precise memory fault raised by the instruction in MEM: it does not
+        complete, younger instructions are squashed and fetch stops with the PC
+        at the faulting instruction. Older instructions have already retired.
+        """
+        self.fault = {"pc": _hex(self.exmem.addr), **fault.info()}
+        self.pc = self.exmem.addr
+        self.halted = True
+        # EX, ID and IF still run this cycle; freeze IF and squash what they would pass on
+        self.stall = True
+        self.memwb.flush()
+        self.idex.flush()
+        self.ifid.flush()
+
+    def _detect_hazard(self) -> str | None:
+        """
+        Detect a RAW hazard that must stall the instruction in ID.
+        Returns the stall cause (see STALL_CAUSES) or None.
+        """
+        if self.ifid.nop or self.ifid.instr is None:
+            return None
+
+        # Source registers of the instruction currently in ID
+        src_regs = self.ifid.instr.srcs
+        if not src_regs:
+            return None
+
+        if self.forwarding:
+            branch_in_id = self.branch_in_id and self.ifid.instr.op in BRANCH_OPS
+            load_ahead = not self.idex.nop and self.idex.mem_read and self.idex.rd in src_regs
+            if self.hazard_policy == HAZARD_FORWARD:
+                # Ideal forwarding only waits when ID itself needs data a load has not read yet
+                return "load_use" if branch_in_id and load_ahead else None
+            # A load directly ahead cannot be forwarded in time
+            if load_ahead:
+                return "load_use"
+            if branch_in_id:
+                # The ID comparator can only be fed from EX/MEM (ALU results) or the register file
+                if not self.idex.nop and self.idex.reg_write and self.idex.rd in src_regs:
+                    return "branch_ex"
+                if not self.exmem.nop and self.exmem.mem_read and self.exmem.rd in src_regs:
+                    return "branch_load"
+            return None
+
+        # No forwarding: wait for any producer in EX/MEM/WB
         for src in src_regs:
-            if src == 0:  # x0 never causes hazard
-                continue
             if not self.idex.nop and self.idex.rd == src and self.idex.reg_write:
-                return True
+                return "raw_ex"
             if not self.exmem.nop and self.exmem.rd == src and self.exmem.reg_write:
-                return True
+                return "raw_mem"
             if not self.memwb.nop and self.memwb.rd == src and self.memwb.reg_write:
-                return True
-                
-        return False
+                return "raw_wb"
+
+        return None
+
+    def _forward(self, reg: int, value: int) -> int:
+        """
+        Operand value for EX with forwarding enabled. Stages run WB -> IF, so when
+        EX runs the register file already holds every older result except that of
+        the instruction directly ahead, which has just moved into MEM/WB.
+        """
+        if reg <= 0:
+            return value
+        ahead = self.memwb
+        if not ahead.nop and ahead.reg_write and ahead.rd == reg:
+            return ahead.lmd if ahead.mem_to_reg else ahead.alu_output
+        return self.registers[reg]
+
+    def _forward_id(self, reg: int, value: int) -> int:
+        """
+        Operand value for a branch resolved in ID with forwarding enabled. EX and
+        MEM have already run this cycle: EX/MEM holds the instruction one ahead
+        (usable only under ideal forwarding, the hazard unit stalls otherwise) and
+        MEM/WB the instruction two ahead.
+        """
+        if reg <= 0:
+            return value
+        ex = self.exmem
+        if not ex.nop and ex.reg_write and ex.rd == reg and not ex.mem_read:
+            return ex.alu_output
+        mw = self.memwb
+        if not mw.nop and mw.reg_write and mw.rd == reg:
+            return mw.lmd if mw.mem_to_reg else mw.alu_output
+        return self.registers[reg]
 
     def stage_if(self):
         """Instruction Fetch stage"""
         if self.stall:
             return  # Keep IF frozen
             
-        instr = self.instructions.get(self.pc)
-        if not instr:
+        d = self._fetch(self.pc)
+        if not d:
             self.ifid.nop = True
             self.halted = True
             return
             
         self.ifid.nop = False
-        self.ifid.ir = instr["encoded"]
+        self.ifid.ir = d.encoded
         self.ifid.pc = self.pc
         self.ifid.npc = self.pc + 4
-        self.ifid.raw = instr["raw"]
+        self.ifid.raw = d.raw
         self.ifid.addr = self.pc
-        
+        self.ifid.instr = d
+        self.ifid.predicted_taken = False
+
         self.pc = self.ifid.npc
+        if d.op in BRANCH_OPS and d.target >= 0:
+            target = self.predictor.predict_target(d.addr, d.target)
+            if target is not None:
+                self.ifid.predicted_taken = True
+                self.ifid.predicted_target = self.pc = target
 
     def stage_id(self):
         """Instruction Decode stage"""
@@ -296,88 +605,56 @@ class PipelineSimulator:
             self.idex.flush()
             return
             
-        instr = self.instructions.get(self.ifid.addr)
-        if not instr:
+        d = self.ifid.instr
+        if d is None:
             self.idex.flush()
             return
-            
-        tokens = instr["tokens"]
-        opcode = instr["opcode"]
-        
-        self.idex.nop = False
-        self.idex.ir = self.ifid.ir
-        self.idex.npc = self.ifid.npc
-        self.idex.opcode = opcode
-        self.idex.raw = instr["raw"]
-        self.idex.addr = self.ifid.addr
-        
+
+        op = d.op
+        idex = self.idex
+        idex.nop = False
+        idex.ir = self.ifid.ir
+        idex.npc = self.ifid.npc
+        idex.opcode = d.opcode
+        idex.raw = d.raw
+        idex.addr = self.ifid.addr
+
         # Decode and read registers
-        self.idex.rd = -1
-        self.idex.rs1 = -1
-        self.idex.rs2 = -1
-        
-        if opcode in ["ADD", "SUB", "AND", "OR", "SLT", "SLL"]:
-            self.idex.rd = self._reg_index(tokens[1])
-            self.idex.rs1 = self._reg_index(tokens[2])
-            self.idex.rs2 = self._reg_index(tokens[3])
-            self.idex.a = self.registers[self.idex.rs1]
-            self.idex.b = self.registers[self.idex.rs2]
-            self.idex.alu_op = opcode
-            self.idex.reg_write = True
-            
-        elif opcode in ["ADDI", "ORI"]:
-            self.idex.rd = self._reg_index(tokens[1])
-            self.idex.rs1 = self._reg_index(tokens[2])
-            self.idex.a = self.registers[self.idex.rs1]
-            self.idex.imm = int(tokens[3])
-            self.idex.alu_op = opcode
-            self.idex.reg_write = True
-            
-        elif opcode == "SLLI":
-            self.idex.rd = self._reg_index(tokens[1])
-            self.idex.rs1 = self._reg_index(tokens[2])
-            self.idex.a = self.registers[self.idex.rs1]
-            self.idex.imm = int(tokens[3])
-            self.idex.alu_op = opcode
-            self.idex.reg_write = True
-            
-        elif opcode == "LW":
-            self.idex.rd = self._reg_index(tokens[1])
-            offset, base = tokens[2].replace(")", "").split("(")
-            self.idex.rs1 = self._reg_index(base)
-            self.idex.a = self.registers[self.idex.rs1]
-            self.idex.imm = int(offset)
-            self.idex.alu_op = "ADD"
-            self.idex.mem_read = True
-            self.idex.reg_write = True
-            
-        elif opcode == "SW":
-            self.idex.rs2 = self._reg_index(tokens[1])
-            offset, base = tokens[2].replace(")", "").split("(")
-            self.idex.rs1 = self._reg_index(base)
-            self.idex.a = self.registers[self.idex.rs1]
-            self.idex.b = self.registers[self.idex.rs2]
-            self.idex.imm = int(offset)
-            self.idex.alu_op = "ADD"
-            self.idex.mem_write = True
-            
-        elif opcode in ["BEQ", "BNE", "BLT", "BGE"]:
-            self.idex.rs1 = self._reg_index(tokens[1])
-            self.idex.rs2 = self._reg_index(tokens[2])
-            self.idex.a = self.registers[self.idex.rs1]
-            self.idex.b = self.registers[self.idex.rs2]
-            label = tokens[3]
-            target = self.label_map.get(label, self.idex.npc)
-            self.idex.imm = target
-            self.idex.alu_op = opcode
-            self.idex.branch = True
+        idex.rd = d.rd
+        idex.rs1 = d.rs1
+        idex.rs2 = d.rs2
+        idex.a = self.registers[d.rs1] if d.rs1 >= 0 else 0
+        idex.b = self.registers[d.rs2] if d.rs2 >= 0 else 0
+        idex.imm = d.imm
+
+        # Control signals are set for every instruction so none leak from the
+        # previous occupant of the latch
+        idex.alu_op = OP_ADD if op in (OP_LW, OP_SW) else op
+        idex.mem_read = op == OP_LW
+        idex.mem_write = op == OP_SW
+        idex.branch = op in BRANCH_OPS
+        idex.reg_write = d.rd >= 0
+        idex.predicted_taken = self.ifid.predicted_taken
+        idex.predicted_target = self.ifid.predicted_target
+        if idex.branch:
+            # branch target = PC + the B-type immediate decoded from the IR word
+            idex.imm = d.addr + d.imm if d.target >= 0 else idex.npc
+            if self.branch_in_id:
+                if self.forwarding:
+                    idex.a = self._forward_id(d.rs1, idex.a)
+                    idex.b = self._forward_id(d.rs2, idex.b)
+                self._resolve_branch(idex, _branch_taken(op, idex.a, idex.b))
 
     def stage_ex(self):
         """Execute stage"""
         if self.idex.nop:
             self.exmem.flush()
             return
-            
+
+        if self.forwarding:
+            self.idex.a = self._forward(self.idex.rs1, self.idex.a)
+            self.idex.b = self._forward(self.idex.rs2, self.idex.b)
+
         self.exmem.nop = False
         self.exmem.ir = self.idex.ir
         self.exmem.raw = self.idex.raw
@@ -387,47 +664,68 @@ class PipelineSimulator:
         self.exmem.mem_read = self.idex.mem_read
         self.exmem.mem_write = self.idex.mem_write
         self.exmem.reg_write = self.idex.reg_write
-        
+        self.exmem.cond = False
+        self.exmem.branch_taken = False
+
         # ALU operation
         op = self.idex.alu_op
-        if op == "ADD":
+        if op == OP_ADD:
             self.exmem.alu_output = _to_u32(self.idex.a + self.idex.imm if self.idex.mem_read or self.idex.mem_write else self.idex.a + self.idex.b)
-        elif op == "SUB":
+        elif op == OP_SUB:
             self.exmem.alu_output = _to_u32(self.idex.a - self.idex.b)
-        elif op == "ADDI":
+        elif op == OP_ADDI:
             self.exmem.alu_output = _to_u32(self.idex.a + self.idex.imm)
-        elif op == "AND":
+        elif op == OP_AND:
             self.exmem.alu_output = self.idex.a & self.idex.b
-        elif op == "OR":
+        elif op == OP_OR:
             self.exmem.alu_output = self.idex.a | self.idex.b
-        elif op == "ORI":
-            self.exmem.alu_output = self.idex.a | self.idex.imm
-        elif op == "SLL":
+        elif op == OP_ORI:
+            self.exmem.alu_output = _to_u32(self.idex.a | self.idex.imm)
+        elif op == OP_SLL:
             self.exmem.alu_output = _to_u32(self.idex.a << (self.idex.b & 0x1F))
-        elif op == "SLLI":
+        elif op == OP_SLLI:
             self.exmem.alu_output = _to_u32(self.idex.a << (self.idex.imm & 0x1F))
-        elif op == "SLT":
+        elif op == OP_SLT:
             self.exmem.alu_output = 1 if _to_signed(self.idex.a) < _to_signed(self.idex.b) else 0
-        elif op in ["BEQ", "BNE", "BLT", "BGE"]:
+        elif op in BRANCH_OPS:
             # Branch condition evaluation
-            if op == "BEQ":
-                self.exmem.cond = (self.idex.a == self.idex.b)
-            elif op == "BNE":
-                self.exmem.cond = (self.idex.a != self.idex.b)
-            elif op == "BLT":
-                self.exmem.cond = (_to_signed(self.idex.a) < _to_signed(self.idex.b))
-            elif op == "BGE":
-                self.exmem.cond = (_to_signed(self.idex.a) >= _to_signed(self.idex.b))
-                
-            # Group 2: predict-not-taken, flush if taken
-            if self.exmem.cond:
-                self.exmem.branch_taken = True
-                self.pc = self.idex.imm  # Update PC to branch target
-                # Flush IF and ID stages
-                self.ifid.flush()
-                self.idex.flush()
-                self.branch_count += 1
-                self.flush_count += 1
+            self.exmem.cond = _branch_taken(op, self.idex.a, self.idex.b)
+            self.exmem.branch_taken = self.exmem.cond
+            if not self.branch_in_id:
+                self._resolve_branch(self.idex, self.exmem.cond)
+
+    def _resolve_branch(self, latch, taken: bool):
+        """
+        Check the prediction made in IF against the real outcome; flush on a mispredict.
+        `latch` is ID/EX, read in EX or just written by ID.
+        """
+        self.branch_predictions += 1
+        if taken:
+            self.branch_count += 1
+        if self._undo is not None and self._undo.predictor is None:
+            self._undo.predictor = self.predictor.state()
+        self.predictor.update(latch.addr, latch.imm, taken)
+        if taken == latch.predicted_taken and (not taken or latch.predicted_target == latch.imm):
+            if self.profiler is not None:
+                self.profiler.branch(latch.addr, taken, 0)
+            return
+        self.branch_mispredicts += 1
+        addr = latch.addr  # latch may be ID/EX, which is flushed below
+        # Redirect fetch to the correct path (latch.imm holds the branch target)
+        self.pc = latch.imm if taken else latch.npc
+        self.halted = False
+        self.flush_count += 1
+        if self.branch_in_id:
+            # Only the IF/ID slot behind the branch is lost
+            self.ifid.flush()
+            self.flush_cycles += 1
+        else:
+            # Flush IF and ID stages
+            self.ifid.flush()
+            self.idex.flush()
+            self.flush_cycles += 2
+        if self.profiler is not None:
+            self.profiler.branch(addr, taken, 1 if self.branch_in_id else 2)
 
     def stage_mem(self):
         """Memory stage"""
@@ -443,34 +741,75 @@ class PipelineSimulator:
         self.memwb.addr = self.exmem.addr
         self.memwb.reg_write = self.exmem.reg_write
         
-        if self.exmem.mem_read:
-            self.memwb.lmd = self._read_word(self.exmem.alu_output)
-            self.memwb.mem_to_reg = True
-        elif self.exmem.mem_write:
-            self._write_word(self.exmem.alu_output, self.exmem.b)
-            self.memwb.mem_to_reg = False
-        else:
-            self.memwb.lmd = 0
-            self.memwb.mem_to_reg = False
+        try:
+            if self.exmem.mem_read:
+                self.memwb.lmd = self._read_word(self.exmem.alu_output)
+                self.memwb.mem_to_reg = True
+            elif self.exmem.mem_write:
+                self._write_word(self.exmem.alu_output, self.exmem.b)
+                self.memwb.mem_to_reg = False
+            else:
+                self.memwb.lmd = 0
+                self.memwb.mem_to_reg = False
+        except MemoryFault as fault:
+            self._fault(fault)
 
     def stage_wb(self):
         """Write Back stage"""
         if self.memwb.nop:
             return
             
+        self.retired += 1
+        if self.profiler is not None:
+            self.profiler.retire(self.memwb.addr)
         if self.memwb.reg_write and self.memwb.rd > 0:
-            value = self.memwb.lmd if self.memwb.mem_to_reg else self.memwb.alu_output
-            self.registers[self.memwb.rd] = _to_u32(value)
+            value = _to_u32(self.memwb.lmd if self.memwb.mem_to_reg else self.memwb.alu_output)
+            if self.registers[self.memwb.rd] != value:
+                self.registers[self.memwb.rd] = value
+                self.reg_changed_at[self.memwb.rd] = self.cycle + 1
+
+    def is_finished(self) -> bool:
+        """True once fetch has halted and every pipeline latch has drained"""
+        return self.halted and self.ifid.nop and self.idex.nop and self.exmem.nop and self.memwb.nop
 
     def step(self):
         """Advance pipeline by one cycle"""
-        if self.halted and self.ifid.nop and self.idex.nop and self.exmem.nop and self.memwb.nop:
-            return self.get_state()
-        
+        if not self.is_finished():
+            self._cycle()
+        return self.get_state()
+
+    def step_delta(self, since: int | None = None, epoch: int | None = None):
+        """Advance one cycle and return a delta state (by default, changes made by this step)"""
+        if since is None:
+            since = self.cycle
+        if not self.is_finished():
+            self._cycle()
+        return self.get_state_delta(since, epoch)
+
+    def _cycle(self):
+        """Advance every stage by one cycle without building a state snapshot"""
+        profiler = self.profiler
+        if profiler is not None and self.cycle < profiler.until:
+            # running again a cycle profiled before a reverse step: count it once
+            self.profiler = None
+            try:
+                self._cycle()
+            finally:
+                self.profiler = profiler
+            return
+        if self.history is not None:
+            self._begin_undo()
         # Check for hazards
-        self.stall = self._detect_hazard()
-        if self.stall:
+        cause = self._detect_hazard()
+        self.stall = cause is not None
+        if cause:
             self.stall_cycles += 1
+            self.stall_breakdown[cause] += 1
+            if self.profiler is not None:
+                self.profiler.stall(self, cause)
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.begin(self, cause)
         
         # Execute stages in reverse order (WB -> IF) to avoid race conditions
         self.stage_wb()
@@ -479,9 +818,287 @@ class PipelineSimulator:
         self.stage_id()
         self.stage_if()
         
+        if tracer is not None:
+            tracer.end(self)
         self.cycle += 1
+        if self._undo is not None:
+            self._end_undo()
+
+    def _begin_undo(self):
+        """Start recording the cycle about to run (keyframe first when one is due)"""
+        if self.history.needs_keyframe(self.cycle):
+            self.history.add_keyframe(self.snapshot())
+        memwb = self.memwb
+        # registers are only written in WB, by the instruction now in MEM/WB
+        rd = memwb.rd if not memwb.nop and memwb.reg_write and memwb.rd > 0 else 0
+        self._undo = UndoRecord(
+            tuple(getattr(self, name) for name in SNAPSHOT_FIELDS),
+            dict(self.stall_breakdown),
+            (rd, self.registers[rd], self.reg_changed_at[rd]) if rd else None,
+            [],
+            tuple(dict(latch.__dict__) for latch in (self.ifid, self.idex, self.exmem, memwb)),
+            None,
+        )
+
+    def _end_undo(self):
+        """Reduce the record to what the cycle changed and append it to the ring"""
+        undo = self._undo
+        self._undo = None
+        if undo.stall_breakdown == self.stall_breakdown:
+            undo.stall_breakdown = None
+        # latch fields are all hashable, so the changed ones are a set difference
+        undo.latches = tuple(
+            dict(old.items() - latch.__dict__.items())
+            for latch, old in zip((self.ifid, self.idex, self.exmem, self.memwb), undo.latches)
+        )
+        self.history.log.append(undo)
+
+    def _undo_cycle(self):
+        """Revert the latest recorded cycle"""
+        undo = self.history.log.pop()
+        for name, value in zip(SNAPSHOT_FIELDS, undo.fields):
+            setattr(self, name, value)
+        if undo.stall_breakdown is not None:
+            self.stall_breakdown = undo.stall_breakdown
+        if undo.register is not None:
+            rd, value, changed_at = undo.register
+            self.registers[rd] = value
+            self.reg_changed_at[rd] = changed_at
+        for addr, word, changed_at in reversed(undo.memory):
+            self.memory.write_word(addr, word)
+            if changed_at is None:
+                del self.mem_changed_at[addr]
+            else:
+                self.mem_changed_at[addr] = changed_at
+        for latch, fields in zip((self.ifid, self.idex, self.exmem, self.memwb), undo.latches):
+            latch.__dict__.update(fields)
+        if undo.predictor is not None:
+            self.predictor.restore(undo.predictor)
+
+    def seek(self, cycle: int):
+        """
+        Move to `cycle`. Backwards within the undo ring each cycle is reverted
+        from its record; further back the latest keyframe at or before `cycle`
+        is restored and replayed forward. Forwards simply runs (stopping early
+        if the program finishes).
+        """
+        if self.history is None:
+            raise ValueError("Reverse stepping is disabled (history_size is 0)")
+        cycle = max(0, cycle)
+        profiler = self.profiler
+        if profiler is not None:
+            # cycles before this one are counted; running them again must not count them twice
+            profiler.until = max(profiler.until, self.cycle)
+        if cycle < self.history.oldest_cycle(self.cycle):
+            keyframe = self.history.keyframe(cycle)
+            if keyframe is None:
+                raise ValueError(f"Cycle {cycle} is no longer in the history")
+            # restore() re-runs __init__; the history and profile outlive it
+            history = self.history
+            self.restore(keyframe)
+            self.history, self.profiler = history, profiler
+            history.log.clear()
+        while self.cycle > cycle:
+            self._undo_cycle()
+        self.history.truncate(self.cycle)
+        if cycle - self.cycle > self.history.size:
+            self.fast_forward(cycle - self.cycle - self.history.size)
+        if cycle > self.cycle:
+            self._replay(cycle - self.cycle)
+        self._delta_cache = {}
+
+    def back(self, cycles: int = 1):
+        """Step `cycles` cycles backwards and return the state"""
+        self.seek(self.cycle - max(0, cycles))
         return self.get_state()
 
+    def fast_forward(self, max_cycles: int) -> int:
+        """
+        Advance up to max_cycles without building any state, stopping early once
+        the pipeline has drained. Timing and statistics are identical to calling
+        step() repeatedly. Returns the number of cycles executed.
+        """
+        profiler = self.profiler
+        if profiler is not None and self.cycle < profiler.until and max_cycles > 0:
+            # cycles profiled before a reverse step run unprofiled, so they count once
+            chunk = min(max_cycles, profiler.until - self.cycle)
+            self.profiler = None
+            try:
+                executed = self.fast_forward(chunk)
+            finally:
+                self.profiler = profiler
+            if executed < chunk:
+                return executed  # finished
+            return executed + self.fast_forward(max_cycles - executed)
+        if self.history is not None:
+            return self._fast_forward_keyframed(max_cycles)
+        if self.tracer is not None and not self._trace_full():
+            return self._fast_forward_traced(max_cycles)
+        # Same sequence as _cycle(), with the per-cycle attribute lookups hoisted
+        ifid, idex, exmem, memwb = self.ifid, self.idex, self.exmem, self.memwb
+        detect_hazard = self._detect_hazard
+        stage_wb, stage_mem, stage_ex = self.stage_wb, self.stage_mem, self.stage_ex
+        stage_id, stage_if = self.stage_id, self.stage_if
+        executed = 0
+        while executed < max_cycles:
+            if self.halted and ifid.nop and idex.nop and exmem.nop and memwb.nop:
+                break
+            cause = detect_hazard()
+            self.stall = cause is not None
+            if cause:
+                self.stall_cycles += 1
+                self.stall_breakdown[cause] += 1
+                if self.profiler is not None:
+                    self.profiler.stall(self, cause)
+            stage_wb()
+            stage_mem()
+            stage_ex()
+            stage_id()
+            stage_if()
+            self.cycle += 1
+            executed += 1
+        return executed
+
+    def _fast_forward_keyframed(self, max_cycles: int) -> int:
+        """
+        fast_forward() with history enabled: cycles are not recorded, only a
+        keyframe is taken at each interval boundary, so reverse steps after a
+        run replay from the nearest keyframe instead of undoing records.
+        """
+        history = self.history
+        self.history = None  # plain fast_forward() below
+        executed = 0
+        try:
+            while executed < max_cycles and not self.is_finished():
+                if history.needs_keyframe(self.cycle):
+                    history.add_keyframe(self.snapshot())
+                history.log.clear()  # the ring no longer reaches the current cycle
+                chunk = min(max_cycles - executed, history.keyframe_interval - self.cycle % history.keyframe_interval)
+                executed += self.fast_forward(chunk)
+        finally:
+            self.history = history
+        return executed
+
+    def _fast_forward_traced(self, max_cycles: int) -> int:
+        """fast_forward() while tracing: cycle by cycle, so each one is recorded"""
+        executed = 0
+        while executed < max_cycles and not self.is_finished():
+            if self._trace_full():
+                # nothing more gets recorded: finish on the untraced path
+                return executed + self.fast_forward(max_cycles - executed)
+            self._cycle()
+            executed += 1
+        return executed
+
+    def _trace_full(self) -> bool:
+        """The trace dropped its last cycle and the machine has not gone back since"""
+        return self.tracer.full and self.cycle > self.tracer.last_cycle
+
+    def _replay(self, cycles: int):
+        """Run up to `cycles` recorded cycles"""
+        while cycles > 0 and not self.is_finished():
+            self._cycle()
+            cycles -= 1
+
+    def run(self, max_cycles: int = DEFAULT_RUN_CYCLES, max_seconds: float | None = None,
+            breakpoints=None, watch_registers=None, watch_memory=None,
+            delta: bool = False, since: int | None = None, epoch: int | None = None):
+        """
+        Advance the pipeline until a stop condition is met.
+
+        Args:
+            max_cycles: Cycle budget for this call
+            max_seconds: Optional wall-clock budget
+            breakpoints: Instruction addresses that stop the run once fetched
+            watch_registers: Register indices that stop the run when their value changes
+            watch_memory: Word addresses that stop the run when their value changes
+            delta: Return a delta state relative to `since` (default: the starting cycle)
+
+        Returns:
+            Dict with the final state and aggregate stats for the run
+        """
+        breakpoints = set(breakpoints or ())
+        watch_registers = list(watch_registers or ())
+        watch_memory = list(watch_memory or ())
+        reg_values = [self.registers[r] for r in watch_registers]
+        mem_values = [self._read_word(a) for a in watch_memory]
+
+        start_cycle = self.cycle
+        start_retired = self.retired
+        start_stalls = self.stall_cycles
+        start_breakdown = dict(self.stall_breakdown)
+        start_flushes = self.flush_count
+        start_mispredicts = self.branch_mispredicts
+        started = time.perf_counter()
+        deadline = started + max_seconds if max_seconds is not None else None
+
+        if breakpoints or watch_registers or watch_memory:
+            stop_reason, hit = self._run_checked(max_cycles, deadline, breakpoints,
+                                                 watch_registers, reg_values, watch_memory, mem_values)
+        else:
+            stop_reason, hit = self._run_unchecked(max_cycles, deadline), None
+        if stop_reason == "halted" and self.fault:
+            stop_reason, hit = "fault", self.fault["pc"]
+
+        elapsed = time.perf_counter() - started
+        retired = self.retired - start_retired
+        if delta:
+            state = self.get_state_delta(start_cycle if since is None else since, epoch)
+        else:
+            state = self.get_state()
+        return {
+            "state": state,
+            "stop_reason": stop_reason,
+            "stop_at": hit,
+            "stats": {
+                "cycles": self.cycle - start_cycle,
+                "instructions_retired": retired,
+                "cpi": round((self.cycle - start_cycle) / retired, 4) if retired else None,
+                "stall_cycles": self.stall_cycles - start_stalls,
+                "stall_breakdown": {k: v - start_breakdown[k] for k, v in self.stall_breakdown.items()},
+                "flush_count": self.flush_count - start_flushes,
+                "branch_mispredicts": self.branch_mispredicts - start_mispredicts,
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "cycles_per_second": round((self.cycle - start_cycle) / elapsed) if elapsed > 0 else None,
+            },
+        }
+
+    def _run_unchecked(self, max_cycles: int, deadline: float | None) -> str:
+        """Fast-forward with only halt and budget checks; returns the stop reason"""
+        chunk = TIME_CHECK_INTERVAL if deadline is not None else max_cycles
+        executed = 0
+        while executed < max_cycles:
+            executed += self.fast_forward(min(chunk, max_cycles - executed))
+            if self.is_finished():
+                return "halted"
+            if deadline is not None and executed < max_cycles and time.perf_counter() >= deadline:
+                return "max_seconds"
+        return "halted" if self.is_finished() else "max_cycles"
+
+    def _run_checked(self, max_cycles, deadline, breakpoints, watch_registers, reg_values,
+                     watch_memory, mem_values) -> tuple[str, str | None]:
+        """Cycle-by-cycle run evaluating breakpoints and watches; returns (reason, hit)"""
+        executed = 0
+        while executed < max_cycles:
+            if self.is_finished():
+                return "halted", None
+            self._cycle()
+            executed += 1
+
+            if breakpoints and not self.stall and not self.ifid.nop and self.ifid.addr in breakpoints:
+                return "breakpoint", _hex(self.ifid.addr)
+            if watch_registers:
+                changed = [r for r, old in zip(watch_registers, reg_values) if self.registers[r] != old]
+                if changed:
+                    return "register_watch", f"x{changed[0]}"
+            if watch_memory:
+                changed = [a for a, old in zip(watch_memory, mem_values) if self._read_word(a) != old]
+                if changed:
+                    return "memory_watch", _hex(changed[0])
+            if deadline is not None and executed % TIME_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline:
+                return "max_seconds", None
+        return ("halted" if self.is_finished() else "max_cycles"), None
+
     def get_state(self):
         """Return current pipeline state"""
         return {
@@ -489,50 +1106,146 @@ class PipelineSimulator:
             "registers": [_hex(r) for r in self.registers],
             "cycle": self.cycle,
             "halted": self.halted,
+            "fault": self.fault,
             "stall_cycles": self.stall_cycles,
+            "stall_breakdown": dict(self.stall_breakdown),
+            "hazard_policy": self.hazard_policy,
             "branch_count": self.branch_count,
             "flush_count": self.flush_count,
-            "pipeline": {
-                "IF": {
-                    "PC": _hex(self.pc),
-                    "stalled": self.stall
-                },
-                "IF/ID": {
-                    "nop": self.ifid.nop,
-                    "IR": _hex(self.ifid.ir),
-                    "NPC": _hex(self.ifid.npc),
-                    "PC": _hex(self.ifid.pc),
-                    "raw": self.ifid.raw if not self.ifid.nop else ""
-                },
-                "ID/EX": {
-                    "nop": self.idex.nop,
-                    "IR": _hex(self.idex.ir),
-                    "A": _hex(self.idex.a),
-                    "B": _hex(self.idex.b),
-                    "IMM": _hex(self.idex.imm),
-                    "NPC": _hex(self.idex.npc),
-                    "raw": self.idex.raw if not self.idex.nop else ""
-                },
-                "EX/MEM": {
-                    "nop": self.exmem.nop,
-                    "IR": _hex(self.exmem.ir),
-                    "ALUOutput": _hex(self.exmem.alu_output),
-                    "B": _hex(self.exmem.b),
-                    "cond": self.exmem.cond,
-                    "raw": self.exmem.raw if not self.exmem.nop else ""
-                },
-                "MEM/WB": {
-                    "nop": self.memwb.nop,
-                    "IR": _hex(self.memwb.ir),
-                    "LMD": _hex(self.memwb.lmd),
-                    "ALUOutput": _hex(self.memwb.alu_output),
-                    "raw": self.memwb.raw if not self.memwb.nop else ""
-                },
-                "WB": {
-                    "register_written": f"x{self.memwb.rd}" if not self.memwb.nop and self.memwb.reg_write and self.memwb.rd > 0 else None,
-                    "value_written": _hex(self.memwb.lmd if self.memwb.mem_to_reg else self.memwb.alu_output) if not self.memwb.nop and self.memwb.reg_write and self.memwb.rd > 0 else None
-                }
+            "branch_prediction": self.branch_prediction,
+            "pipeline": {name: self._latch_state(name) for name in LATCH_NAMES}
+        }
+
+    def get_state_delta(self, since: int | None = None, epoch: int | None = None):
+        """
+        Return only the registers, memory words, latches and counters that changed
+        after cycle `since` (the cycle of an earlier response).
+
+        Falls back to a full snapshot when `since` is missing, comes from another
+        epoch (the machine was reset or reloaded), or lies before the latest
+        FULL_STATE_INTERVAL boundary, so clients resynchronise periodically.
+        """
+        cycle = self.cycle
+        full = (
+            since is None
+            or (epoch is not None and epoch != self.epoch)
+            or since > cycle
+            or since // FULL_STATE_INTERVAL != cycle // FULL_STATE_INTERVAL
+        )
+
+        pipeline = {}
+        for name in LATCH_NAMES:
+            entry = self._delta_entry(name, self._latch_key(name), self._latch_state)
+            if full or entry[2] > since:
+                pipeline[name] = entry[1]
+        counters = {}
+        for name in COUNTER_NAMES:
+            value = getattr(self, name)
+            if isinstance(value, dict):
+                entry = self._delta_entry(name, tuple(value.values()), lambda _: dict(value))
+            else:
+                entry = self._delta_entry(name, value, None)
+            if full or entry[2] > since:
+                counters[name] = entry[1]
+
+        state = {
+            "delta": True,
+            "full": full,
+            "epoch": self.epoch,
+            "since": None if full else since,
+            "pc": _hex(self.pc),
+            "cycle": cycle,
+            "halted": self.halted,
+            "fault": self.fault,
+            "hazard_policy": self.hazard_policy,
+            **counters,
+            "pipeline": pipeline,
+        }
+        if full:
+            state["registers"] = [_hex(r) for r in self.registers]
+            state["memory"] = {_hex(a): _hex(self._read_word(a)) for a in self.mem_changed_at}
+        else:
+            state["registers"] = {
+                f"x{i}": _hex(r) for i, r in enumerate(self.registers) if self.reg_changed_at[i] > since
+            }
+            state["memory"] = {
+                _hex(a): _hex(self._read_word(a)) for a, c in self.mem_changed_at.items() if c > since
             }
+        return state
+
+    def _delta_entry(self, name: str, key, formatter):
+        """Cached (key, formatted value, cycle first seen) for a latch or counter"""
+        entry = self._delta_cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, formatter(name) if formatter else key, self.cycle)
+            self._delta_cache[name] = entry
+        return entry
+
+    def _latch_key(self, name: str):
+        """Raw field values that determine the formatted view of a latch"""
+        if name == "IF":
+            return (self.pc, self.stall)
+        if name == "IF/ID":
+            l = self.ifid
+            return (l.nop, l.ir, l.npc, l.pc, l.raw)
+        if name == "ID/EX":
+            l = self.idex
+            return (l.nop, l.ir, l.a, l.b, l.imm, l.npc, l.raw)
+        if name == "EX/MEM":
+            l = self.exmem
+            return (l.nop, l.ir, l.alu_output, l.b, l.cond, l.raw)
+        if name == "MEM/WB":
+            l = self.memwb
+            return (l.nop, l.ir, l.lmd, l.alu_output, l.raw)
+        l = self.memwb
+        return (l.nop, l.reg_write, l.rd, l.mem_to_reg, l.lmd, l.alu_output)
+
+    def _latch_state(self, name: str) -> dict:
+        """Formatted view of one pipeline latch"""
+        if name == "IF":
+            return {
+                "PC": _hex(self.pc),
+                "stalled": self.stall
+            }
+        if name == "IF/ID":
+            return {
+                "nop": self.ifid.nop,
+                "IR": _hex(self.ifid.ir),
+                "NPC": _hex(self.ifid.npc),
+                "PC": _hex(self.ifid.pc),
+                "raw": self.ifid.raw if not self.ifid.nop else ""
+            }
+        if name == "ID/EX":
+            return {
+                "nop": self.idex.nop,
+                "IR": _hex(self.idex.ir),
+                "A": _hex(self.idex.a),
+                "B": _hex(self.idex.b),
+                "IMM": _hex(self.idex.imm),
+                "NPC": _hex(self.idex.npc),
+                "raw": self.idex.raw if not self.idex.nop else ""
+            }
+        if name == "EX/MEM":
+            return {
+                "nop": self.exmem.nop,
+                "IR": _hex(self.exmem.ir),
+                "ALUOutput": _hex(self.exmem.alu_output),
+                "B": _hex(self.exmem.b),
+                "cond": self.exmem.cond,
+                "raw": self.exmem.raw if not self.exmem.nop else ""
+            }
+        if name == "MEM/WB":
+            return {
+                "nop": self.memwb.nop,
+                "IR": _hex(self.memwb.ir),
+                "LMD": _hex(self.memwb.lmd),
+                "ALUOutput": _hex(self.memwb.alu_output),
+                "raw": self.memwb.raw if not self.memwb.nop else ""
+            }
+        written = not self.memwb.nop and self.memwb.reg_write and self.memwb.rd > 0
+        return {
+            "register_written": f"x{self.memwb.rd}" if written else None,
+            "value_written": _hex(self.memwb.lmd if self.memwb.mem_to_reg else self.memwb.alu_output) if written else None
         }
 
 
@@ -0,0 +1,123 @@
+"""
+Predecoded instruction table shared by the functional and pipelined simulators.
+Each instruction is parsed once at load time into integer fields so the
+per-cycle paths never look at the source tokens again.
+"""
+
+from .encoder import decode_b_imm
+
+# Integer opcode ids
+OP_UNKNOWN = 0
+OP_LW = 1
+OP_SW = 2
+OP_ADD = 3
+OP_SUB = 4
+OP_ADDI = 5
+OP_AND = 6
+OP_OR = 7
+OP_ORI = 8
+OP_SLL = 9
+OP_SLLI = 10
+OP_SLT = 11
+OP_BEQ = 12
+OP_BNE = 13
+OP_BLT = 14
+OP_BGE = 15
+
+OPCODE_IDS = {
+    "LW": OP_LW,
+    "SW": OP_SW,
+    "ADD": OP_ADD,
+    "SUB": OP_SUB,
+    "ADDI": OP_ADDI,
+    "AND": OP_AND,
+    "OR": OP_OR,
+    "ORI": OP_ORI,
+    "SLL": OP_SLL,
+    "SLLI": OP_SLLI,
+    "SLT": OP_SLT,
+    "BEQ": OP_BEQ,
+    "BNE": OP_BNE,
+    "BLT": OP_BLT,
+    "BGE": OP_BGE,
+}
+
+OPCODE_NAMES = {v: k for k, v in OPCODE_IDS.items()}
+
+# Opcode groups by instruction format
+R_TYPE_OPS = frozenset({OP_ADD, OP_SUB, OP_AND, OP_OR, OP_SLL, OP_SLT})
+I_TYPE_OPS = frozenset({OP_ADDI, OP_ORI, OP_SLLI})
+BRANCH_OPS = frozenset({OP_BEQ, OP_BNE, OP_BLT, OP_BGE})
+
+
+class DecodedInstruction:
+    """Integer fields of one instruction. Unused register fields are -1."""
+    __slots__ = ("addr", "op", "opcode", "rd", "rs1", "rs2", "imm", "target", "raw", "encoded", "srcs")
+
+    def __init__(self, addr: int, op: int, opcode: str, raw: str = "", encoded: int = 0):
+        self.addr = addr
+        self.op = op
+        self.opcode = opcode  # mnemonic, kept for display
+        self.rd = -1
+        self.rs1 = -1
+        self.rs2 = -1
+        self.imm = 0  # sign-extended immediate / offset / shift amount
+        self.target = -1  # resolved branch target (-1 if the label is unknown)
+        self.raw = raw
+        self.encoded = encoded
+        self.srcs = ()  # source registers read, x0 excluded (see finish())
+
+    def finish(self):
+        """Derive cached fields once the register fields are set"""
+        self.srcs = tuple(r for r in (self.rs1, self.rs2) if r > 0)
+        return self
+
+
+def _reg(tok: str) -> int:
+    return int(tok.lstrip("x"))
+
+
+def _mem_operand(tok: str) -> tuple[int, int]:
+    """Split 'offset(base)' into (offset, base register index)"""
+    offset, base = tok.replace(")", "").split("(")
+    return int(offset), _reg(base)
+
+
+def predecode(tokens: list, addr: int, label_map: dict, raw: str = "", encoded: int = 0) -> DecodedInstruction:
+    """
+    Decode one tokenized source instruction into a DecodedInstruction.
+
+    Args:
+        tokens: Instruction tokens with commas removed (mnemonic first)
+        addr: Address of the instruction
+        label_map: Fully populated label -> address map
+        raw: Source text for display
+        encoded: 32-bit machine code word, encoded with label_map complete
+
+    Returns:
+        DecodedInstruction; unknown mnemonics decode to OP_UNKNOWN
+    """
+    opcode = tokens[0].upper()
+    op = OPCODE_IDS.get(opcode, OP_UNKNOWN)
+    d = DecodedInstruction(addr, op, opcode, raw, encoded)
+
+    if op in R_TYPE_OPS:
+        d.rd, d.rs1, d.rs2 = _reg(tokens[1]), _reg(tokens[2]), _reg(tokens[3])
+    elif op in I_TYPE_OPS:
+        d.rd, d.rs1 = _reg(tokens[1]), _reg(tokens[2])
+        d.imm = int(tokens[3])
+    elif op == OP_LW:
+        d.rd = _reg(tokens[1])
+        d.imm, d.rs1 = _mem_operand(tokens[2])
+    elif op == OP_SW:
+        d.rs2 = _reg(tokens[1])
+        d.imm, d.rs1 = _mem_operand(tokens[2])
+    elif op in BRANCH_OPS:
+        d.rs1, d.rs2 = _reg(tokens[1]), _reg(tokens[2])
+        if tokens[3] in label_map:
+            # the offset comes from the encoded word, so the machine-code image
+            # and both simulators always agree on the target
+            d.imm = decode_b_imm(encoded)
+            d.target = addr + d.imm
+
+    return d.finish()
@@ -0,0 +1,108 @@
+"""
+Per-instruction profiler for the pipeline simulator.
+When enabled, the pipeline reports retirements, hazard stalls and resolved
+branches here, and the profiler aggregates them by instruction address, so the
+instructions that dominate CPI stand out. When disabled the simulator holds
+None instead and the hooks are skipped by a single `is not None` test.
+"""
+import csv
+import io
+
+# stall cause -> latch holding the producer the stalled instruction waits for
+_PRODUCER_LATCH = {
+    "raw_ex": "idex", "load_use": "idex", "branch_ex": "idex",
+    "raw_mem": "exmem", "branch_load": "exmem",
+    "raw_wb": "memwb",
+}
+
+CSV_FIELDS = (
+    "address", "instruction", "executions", "stall_cycles", "stalls_caused", "flush_cycles",
+    "branch_taken", "branch_not_taken", "mispredicts", "hazards",
+)
+
+
+class PCProfile:
+    """Counters of one instruction address"""
+    __slots__ = ("executions", "stall_cycles", "stalls_caused", "flush_cycles",
+                 "branch_taken", "branch_not_taken", "mispredicts", "hazards")
+
+    def __init__(self):
+        self.executions = 0  # instructions retired from this address
+        self.stall_cycles = 0  # cycles this instruction waited in ID
+        self.stalls_caused = 0  # cycles other instructions waited for its result
+        self.flush_cycles = 0  # pipeline stages flushed by its mispredicts
+        self.branch_taken = 0
+        self.branch_not_taken = 0
+        self.mispredicts = 0
+        self.hazards = {}  # "cause:xN" -> stall cycles, N being the register waited for
+
+
+class Profiler:
+    """Per-PC execution, stall, flush and branch counters"""
+
+    def __init__(self):
+        self.pcs = {}  # address -> PCProfile
+        self.until = 0  # cycles before this are counted; the simulator runs them again unprofiled
+
+    def _entry(self, addr: int) -> PCProfile:
+        entry = self.pcs.get(addr)
+        if entry is None:
+            entry = self.pcs[addr] = PCProfile()
+        return entry
+
+    def retire(self, addr: int):
+        self._entry(addr).executions += 1
+
+    def stall(self, sim, cause: str):
+        """Charge one stall cycle to the instruction in ID and to the producer it waits for"""
+        waiting = self._entry(sim.ifid.addr)
+        waiting.stall_cycles += 1
+        producer = getattr(sim, _PRODUCER_LATCH[cause])
+        key = f"{cause}:x{producer.rd}" if producer.rd >= 0 else cause
+        waiting.hazards[key] = waiting.hazards.get(key, 0) + 1
+        if not producer.nop:
+            self._entry(producer.addr).stalls_caused += 1
+
+    def branch(self, addr: int, taken: bool, flush_cycles: int):
+        entry = self._entry(addr)
+        if taken:
+            entry.branch_taken += 1
+        else:
+            entry.branch_not_taken += 1
+        if flush_cycles:
+            entry.mispredicts += 1
+            entry.flush_cycles += flush_cycles
+
+    def clear(self):
+        self.pcs.clear()
+
+    def report(self, decoded: dict | None = None) -> list:
+        """Rows ordered by address; `decoded` (address -> DecodedInstruction) adds the disassembly"""
+        decoded = decoded or {}
+        rows = []
+        for addr in sorted(self.pcs):
+            entry = self.pcs[addr]
+            d = decoded.get(addr)
+            rows.append({
+                "address": f"0x{addr:08x}",
+                "instruction": d.raw if d is not None else None,
+                "executions": entry.executions,
+                "stall_cycles": entry.stall_cycles,
+                "stalls_caused": entry.stalls_caused,
+                "flush_cycles": entry.flush_cycles,
+                "branch_taken": entry.branch_taken,
+                "branch_not_taken": entry.branch_not_taken,
+                "mispredicts": entry.mispredicts,
+                "hazards": dict(entry.hazards),
+            })
+        return rows
+
+    def to_csv(self, decoded: dict | None = None) -> str:
+        """report() as CSV; hazards are written as `cause:xN=count` joined by spaces"""
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for row in self.report(decoded):
+            row["hazards"] = " ".join(f"{k}={v}" for k, v in row["hazards"].items())
+            writer.writerow(row)
+        return out.getvalue()
@@ -0,0 +1,84 @@
+"""
+Process-wide LRU cache of assembled programs.
+Programs are keyed by a hash of the normalised source plus the load address,
+so reloading the same program (even with different comments or indentation)
+skips validation, encoding and label resolution. Cached Programs are shared by
+every simulator that loads them and must not be mutated.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .assembler import Program, assemble
+
+DEFAULT_PROGRAM_CACHE_SIZE = 512  # programs
+
+
+def normalize_source(source: str) -> str:
+    """
+    Drop comments, surrounding whitespace and trailing blank lines. Line
+    numbers are kept, so the listing and error lines of the assembled program
+    are the same as for the original source.
+    """
+    lines = [line.split("#", 1)[0].strip() for line in source.split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def source_key(source: str, base: int) -> bytes:
+    return hashlib.blake2b(f"{base:x}\n{normalize_source(source)}".encode(), digest_size=16).digest()
+
+
+class ProgramCache:
+    """Bounded LRU cache of assemble() results, including programs with errors"""
+
+    def __init__(self, max_entries: int = DEFAULT_PROGRAM_CACHE_SIZE):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._programs = OrderedDict()  # source key -> Program, least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._programs)
+
+    def get(self, source: str, base: int) -> Program:
+        """Program for `source` placed at `base`, assembled on a miss"""
+        key = source_key(source, base)
+        with self._lock:
+            program = self._programs.get(key)
+            if program is not None:
+                self._programs.move_to_end(key)
+                self.hits += 1
+                return program
+            self.misses += 1
+        program = assemble(source, base)
+        with self._lock:
+            self._programs[key] = program
+            self._programs.move_to_end(key)
+            while len(self._programs) > self.max_entries:
+                self._programs.popitem(last=False)
+                self.evictions += 1
+        return program
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._programs),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+PROGRAM_CACHE = ProgramCache()
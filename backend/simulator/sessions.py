@@ -0,0 +1,107 @@
+"""
+Session-scoped simulator pool.
+Each session owns its own simulator and lock. Sessions are kept in LRU order
+and evicted when idle for too long or when the pool is over capacity.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+DEFAULT_MAX_SESSIONS = 256
+DEFAULT_IDLE_TIMEOUT = 30 * 60  # seconds
+MAX_SNAPSHOTS = 32  # per session; the oldest is dropped first
+
+
+class SessionNotFound(KeyError):
+    """Raised when a session id is unknown or has been evicted"""
+
+
+class Session:
+    """One user's simulator plus the lock serialising access to it"""
+    __slots__ = ("id", "sim", "lock", "created", "last_used", "snapshots")
+
+    def __init__(self, session_id: str, sim):
+        self.id = session_id
+        self.sim = sim
+        self.lock = threading.Lock()
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.snapshots = OrderedDict()  # snapshot id -> simulator snapshot, oldest first
+
+    def add_snapshot(self, snapshot) -> str:
+        """Keep a snapshot under a new id, dropping the oldest past MAX_SNAPSHOTS"""
+        snapshot_id = uuid.uuid4().hex[:12]
+        self.snapshots[snapshot_id] = snapshot
+        while len(self.snapshots) > MAX_SNAPSHOTS:
+            self.snapshots.popitem(last=False)
+        return snapshot_id
+
+
+class SessionPool:
+    """Bounded pool of simulator sessions with LRU and idle-timeout eviction"""
+
+    def __init__(self, factory, max_sessions: int = DEFAULT_MAX_SESSIONS,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.factory = factory  # zero-argument callable returning a fresh simulator
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()  # id -> Session, least recently used first
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, session_id: str | None = None, sim=None) -> Session:
+        """Create a new session, evicting idle/LRU sessions to make room; `sim` defaults to a fresh one"""
+        session = Session(session_id or uuid.uuid4().hex, sim if sim is not None else self.factory())
+        with self._lock:
+            self._evict_idle()
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Session:
+        """Look up a session and mark it as recently used"""
+        with self._lock:
+            self._evict_idle()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionNotFound(session_id)
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: str) -> Session:
+        try:
+            return self.get(session_id)
+        except SessionNotFound:
+            return self.create(session_id)
+
+    def close(self, session_id: str):
+        with self._lock:
+            if self._sessions.pop(session_id, None) is None:
+                raise SessionNotFound(session_id)
+
+    def _evict_idle(self):
+        """Drop sessions idle longer than idle_timeout (caller holds the pool lock)"""
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._evict_idle()
+            return {
+                "live_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "idle_timeout": self.idle_timeout,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,269 @@
+"""
+Compact binary pipeline traces.
+A TraceRecorder attached to a PipelineSimulator appends one fixed-size record
+per cycle (the address in each stage, stall/flush/register-write flags and the
+register written back) to an in-memory buffer that is spilled to a file, so a
+million-cycle trace takes about 32 MB. A TraceReader memory-maps the file and
+produces records, cycle ranges and the pipeline diagram lazily.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import weakref
+from collections import deque
+
+TRACE_MAGIC = b"RVTRACE\x00"
+TRACE_VERSION = 1
+HEADER = struct.Struct("<8sII")  # magic, version, record size
+# cycle, IF, ID, EX, MEM, WB addresses, flags, rd, padding, value written back
+RECORD = struct.Struct("<6IBBxxI")
+
+NO_PC = 0xFFFFFFFF  # stage holds a bubble
+FLAG_STALL = 1  # ID stalled on a hazard (IF frozen)
+FLAG_FLUSH = 2  # a mispredict flushed the younger stages
+FLAG_REG_WRITE = 4  # WB wrote register rd
+
+STAGES = ("IF", "ID", "EX", "MEM", "WB")
+DEFAULT_BUFFER_RECORDS = 4096  # records buffered before spilling to the file
+DEFAULT_MAX_TRACE_CYCLES = 10_000_000  # recording stops past this many records
+
+
+class TraceRecorder:
+    """
+    Appends per-cycle records for a simulator. A cycle at or before the last
+    recorded one (reverse steps, restores, reloads) first truncates the trace
+    there, so the file always describes the machine's current timeline.
+    """
+
+    def __init__(self, path: str | None = None, buffer_records: int = DEFAULT_BUFFER_RECORDS,
+                 max_cycles: int = DEFAULT_MAX_TRACE_CYCLES):
+        if buffer_records <= 0:
+            raise ValueError("buffer_records must be positive")
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="rvtrace-", suffix=".bin")
+            self._file = os.fdopen(fd, "w+b")
+            # temporary traces are removed with the recorder
+            self._finalizer = weakref.finalize(self, _remove, self._file, path)
+        else:
+            self._file = open(path, "w+b")
+            self._finalizer = None
+        self.path = path
+        self.max_cycles = max_cycles
+        self._file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size))
+        self._buffer = bytearray()
+        self._spill_size = buffer_records * RECORD.size
+        self.records = 0
+        self.last_cycle = -1
+        self.full = False  # max_cycles reached; later cycles are dropped
+        self._pending = None  # record of the cycle being executed
+
+    def begin(self, sim, cause: str | None):
+        """Capture the ID..WB stages before `sim` runs a cycle (`cause` is its stall cause)"""
+        cycle = sim.cycle
+        if cycle <= self.last_cycle:
+            self.truncate(cycle)
+        if self.records >= self.max_cycles:
+            self.full = True
+            return
+        ifid, idex, exmem, memwb = sim.ifid, sim.idex, sim.exmem, sim.memwb
+        flags = FLAG_STALL if cause else 0
+        rd = value = 0
+        if not memwb.nop and memwb.reg_write and memwb.rd > 0:
+            flags |= FLAG_REG_WRITE
+            rd = memwb.rd
+            value = (memwb.lmd if memwb.mem_to_reg else memwb.alu_output) & 0xFFFFFFFF
+        self._pending = (
+            cycle,
+            NO_PC if ifid.nop else ifid.addr,
+            NO_PC if idex.nop else idex.addr,
+            NO_PC if exmem.nop else exmem.addr,
+            NO_PC if memwb.nop else memwb.addr,
+            flags, rd, value, sim.flush_count,
+        )
+
+    def end(self, sim):
+        """Complete the record with the fetch of the cycle just run"""
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        cycle, id_pc, ex_pc, mem_pc, wb_pc, flags, rd, value, flush_count = pending
+        if flags & FLAG_STALL:
+            # IF is frozen on the instruction at PC
+            if_pc = sim.pc if sim._fetch(sim.pc) else NO_PC
+        else:
+            if_pc = NO_PC if sim.ifid.nop else sim.ifid.addr
+        if sim.flush_count != flush_count:
+            flags |= FLAG_FLUSH
+        self._buffer += RECORD.pack(cycle, if_pc, id_pc, ex_pc, mem_pc, wb_pc, flags, rd, value)
+        self.records += 1
+        self.last_cycle = cycle
+        if len(self._buffer) >= self._spill_size:
+            self.flush()
+
+    def flush(self):
+        """Spill buffered records to the file"""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def _cycle_at(self, index: int) -> int:
+        self._file.seek(HEADER.size + index * RECORD.size)
+        return RECORD.unpack(self._file.read(RECORD.size))[0]
+
+    def truncate(self, cycle: int):
+        """Drop the records of `cycle` and later"""
+        self.flush()
+        # records are in increasing cycle order
+        lo, hi = 0, self.records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._cycle_at(mid) < cycle:
+                lo = mid + 1
+            else:
+                hi = mid
+        self.last_cycle = self._cycle_at(lo - 1) if lo else -1
+        self.records = lo
+        self._file.truncate(HEADER.size + lo * RECORD.size)
+        self._file.seek(0, os.SEEK_END)
+        self.full = False
+
+    def close(self):
+        """Spill and close the file; a temporary trace file is deleted"""
+        if self._file.closed:
+            return
+        self.flush()
+        if self._finalizer is not None:
+            self._finalizer()
+        else:
+            self._file.close()
+
+    def info(self) -> dict:
+        return {
+            "path": self.path,
+            "records": self.records,
+            "bytes": HEADER.size + self.records * RECORD.size,
+            "last_cycle": self.last_cycle if self.records else None,
+            "full": self.full,
+            "max_cycles": self.max_cycles,
+        }
+
+
+def _remove(file, path: str):
+    file.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class TraceReader:
+    """Memory-mapped view of a trace file; records are decoded on demand"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path}: not a pipeline trace")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self._map)
+        if magic != TRACE_MAGIC or record_size != RECORD.size:
+            self._map.close()
+            raise ValueError(f"{path}: not a pipeline trace")
+        if version != TRACE_VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: unsupported trace version {version}")
+        self._count = (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def record(self, index: int) -> tuple:
+        """(cycle, if, id, ex, mem, wb, flags, rd, value) of the index-th record"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def index_of(self, cycle: int) -> int:
+        """Index of the first record at or after `cycle` (records are in cycle order)"""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if RECORD.unpack_from(self._map, HEADER.size + mid * RECORD.size)[0] < cycle:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def records(self, first_cycle: int | None = None, last_cycle: int | None = None):
+        """Yield the records of cycles first_cycle..last_cycle (inclusive)"""
+        start = self.index_of(first_cycle) if first_cycle is not None else 0
+        offset = HEADER.size + start * RECORD.size
+        end = HEADER.size + self._count * RECORD.size
+        view = memoryview(self._map)
+        try:
+            for record in RECORD.iter_unpack(view[offset:end]):
+                if last_cycle is not None and record[0] > last_cycle:
+                    break
+                yield record
+        finally:
+            view.release()
+
+    def diagram(self, first_cycle: int | None = None, last_cycle: int | None = None):
+        """
+        Yield pipeline diagram rows in fetch order, one per dynamic instruction:
+        {"address", "first_cycle", "stages", "flushed"}, where stages[i] names the
+        stage the instruction was in at first_cycle + i (repeated while stalled).
+        Only the instructions in flight are held, so any slice streams in
+        constant memory. Instructions already in flight at first_cycle start
+        mid-pipeline.
+        """
+        rows = deque()  # rows in fetch order, finished or not
+        in_flight = {}  # stage index -> row, as of the previous record
+        previous = None
+        for record in self.records(first_cycle, last_cycle):
+            cycle = record[0]
+            if previous is None or cycle != previous[0] + 1:
+                in_flight = {}  # gap in the trace: nothing can be followed across it
+                stalled = False
+            else:
+                stalled = previous[6] & FLAG_STALL
+            current = {}
+            # oldest stage first, so rows opened mid-pipeline keep fetch order
+            for stage in range(4, -1, -1):
+                pc = record[1 + stage]
+                if pc == NO_PC:
+                    continue
+                # IF and ID hold their instruction through a stall, everything else advances
+                row = in_flight.get(stage if stalled and stage < 2 else stage - 1)
+                if row is None or row["address"] != pc:
+                    row = {"address": pc, "first_cycle": cycle, "stages": [], "flushed": False, "done": False}
+                    rows.append(row)
+                row["stages"].append(STAGES[stage])
+                current[stage] = row
+            for stage, row in in_flight.items():
+                if current.get(stage + 1) is not row and current.get(stage) is not row:
+                    row["done"] = True
+                    row["flushed"] = stage < 4  # left the pipeline before WB
+            in_flight = current
+            previous = record
+            while rows and rows[0]["done"]:
+                yield _row(rows.popleft())
+        for row in rows:
+            yield _row(row)
+
+
+def _row(row: dict) -> dict:
+    return {"address": f"0x{row['address']:08x}", "first_cycle": row["first_cycle"],
+            "stages": row["stages"], "flushed": row["flushed"]}
@@ -0,0 +1,193 @@
+"""
+NumPy batch engine: runs one program across N independent lanes (initial
+register/memory sets) at once, with the same semantics as core.Simulator.
+Registers are an (N, 32) uint32 array and memories an (N, memory_size) uint8
+array. Each iteration executes the instruction at the lowest PC still active
+for every lane sitting at that PC, so lanes that diverge at a branch run
+masked and reconverge when their PCs meet again.
+"""
+try:
+    import numpy as np
+except ImportError as e:  # optional dependency
+    raise ImportError("simulator.vector_engine requires numpy (pip install numpy)") from e
+
+from .assembler import Program, assemble
+from .core import MEMORY_SIZE, PROGRAM_START, DEFAULT_MAX_STEPS
+from .predecode import (
+    OP_ADD, OP_SUB, OP_ADDI, OP_AND, OP_OR, OP_ORI, OP_SLL, OP_SLLI, OP_SLT,
+    OP_LW, OP_SW, OP_BEQ, OP_BNE, OP_BLT, OP_BGE, BRANCH_OPS,
+)
+
+
+def _hex(x: int) -> str:
+    return f"0x{x:08x}"
+
+
+def _parse_int(value) -> int:
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+
+class VectorSimulator:
+    """N lanes of core.Simulator executing the same program"""
+
+    def __init__(self, program: Program, lanes: int, memory_size: int = MEMORY_SIZE):
+        if lanes <= 0:
+            raise ValueError("lanes must be positive")
+        if program.errors:
+            raise ValueError(f"Program has errors: {program.errors[0]['message']}")
+        self.program = program
+        self.lanes = lanes
+        self.memory_size = memory_size
+        self.registers = np.zeros((lanes, 32), dtype=np.uint32)
+        self.memory = np.zeros((lanes, memory_size), dtype=np.uint8)
+        self.pc = np.full(lanes, program.base, dtype=np.int64)
+        self.cycle = np.zeros(lanes, dtype=np.int64)  # instructions executed per lane
+        self.halted = np.zeros(lanes, dtype=bool)
+        self.faulted = np.zeros(lanes, dtype=bool)  # halted on an out-of-range load/store
+
+    def set_registers(self, initial: list):
+        """Per-lane {"x1": value, ...} mappings (None leaves a lane untouched)"""
+        for lane, regs in enumerate(initial):
+            for name, value in (regs or {}).items():
+                idx = int(name[1:]) if isinstance(name, str) and name.startswith("x") else int(name)
+                if 0 < idx < 32:  # x0 is always 0
+                    self.registers[lane, idx] = _parse_int(value) & 0xFFFFFFFF
+
+    def set_memory(self, initial: list):
+        """Per-lane {address: word} mappings, written as little-endian words"""
+        for lane, words in enumerate(initial):
+            for addr, value in (words or {}).items():
+                addr = _parse_int(addr)
+                if addr < 0 or addr + 4 > self.memory_size:
+                    raise ValueError(f"Initial memory address {_hex(addr)} out of range for lane {lane}")
+                self.memory[lane, addr:addr + 4] = np.frombuffer(
+                    (_parse_int(value) & 0xFFFFFFFF).to_bytes(4, "little"), dtype=np.uint8)
+
+    def run(self, max_steps: int = DEFAULT_MAX_STEPS):
+        """Run every lane until it halts or has executed max_steps instructions"""
+        decoded = self.program.decoded
+        regs, pcs = self.registers, self.pc
+        while True:
+            active = ~self.halted & (self.cycle < max_steps)
+            if not active.any():
+                break
+            pc = int(pcs[active].min())
+            lanes = np.flatnonzero(active & (pcs == pc))
+            d = decoded.get(pc)
+            if d is None:
+                # fetch outside the program halts without executing anything
+                self.halted[lanes] = True
+                continue
+            self._execute(d, lanes, regs, pcs)
+        return self
+
+    def _execute(self, d, lanes, regs, pcs):
+        """Execute one instruction on the given lanes"""
+        op, rd = d.op, d.rd
+        nxt = d.addr + 4
+        ok = lanes  # lanes that complete the instruction
+        if op in (OP_ADD, OP_SUB, OP_AND, OP_OR, OP_SLL, OP_SLT):
+            if rd > 0:
+                a, b = regs[lanes, d.rs1], regs[lanes, d.rs2]
+                if op == OP_ADD:
+                    r = a + b
+                elif op == OP_SUB:
+                    r = a - b
+                elif op == OP_AND:
+                    r = a & b
+                elif op == OP_OR:
+                    r = a | b
+                elif op == OP_SLL:
+                    r = a << (b & np.uint32(31))
+                else:
+                    r = (a.view(np.int32) < b.view(np.int32)).astype(np.uint32)
+                regs[lanes, rd] = r
+        elif op in (OP_ADDI, OP_ORI, OP_SLLI):
+            if rd > 0:
+                a = regs[lanes, d.rs1]
+                if op == OP_ADDI:
+                    r = a + np.uint32(d.imm & 0xFFFFFFFF)
+                elif op == OP_ORI:
+                    r = a | np.uint32(d.imm & 0xFFFFFFFF)
+                else:
+                    r = a << np.uint32(d.imm & 0x1F)
+                regs[lanes, rd] = r
+        elif op in (OP_LW, OP_SW):
+            addr = regs[lanes, d.rs1].astype(np.int64) + d.imm
+            in_range = (addr >= 0) & (addr + 4 <= self.memory_size)
+            if not in_range.all():
+                # faulting lanes halt at this instruction without completing it
+                bad = lanes[~in_range]
+                self.halted[bad] = True
+                self.faulted[bad] = True
+                ok, addr = lanes[in_range], addr[in_range]
+            if op == OP_LW:
+                m = self.memory
+                word = (m[ok, addr].astype(np.uint32)
+                        | (m[ok, addr + 1].astype(np.uint32) << 8)
+                        | (m[ok, addr + 2].astype(np.uint32) << 16)
+                        | (m[ok, addr + 3].astype(np.uint32) << 24))
+                if rd > 0:
+                    regs[ok, rd] = word
+            else:
+                value = regs[ok, d.rs2]
+                for k in range(4):
+                    self.memory[ok, addr + k] = (value >> np.uint32(8 * k)).astype(np.uint8)
+        elif op in BRANCH_OPS:
+            a, b = regs[lanes, d.rs1], regs[lanes, d.rs2]
+            if op == OP_BEQ:
+                taken = a == b
+            elif op == OP_BNE:
+                taken = a != b
+            elif op == OP_BLT:
+                taken = a.view(np.int32) < b.view(np.int32)
+            else:
+                taken = a.view(np.int32) >= b.view(np.int32)
+            if d.target >= 0:
+                pcs[lanes] = np.where(taken, d.target, nxt)
+            else:
+                # taken branch to an unknown label halts
+                pcs[lanes] = nxt
+                self.halted[lanes[taken]] = True
+            self.cycle[lanes] += 1
+            return
+        else:
+            # unknown instruction halts after executing
+            self.halted[lanes] = True
+        pcs[ok] = nxt
+        self.cycle[ok] += 1
+
+    def lane_state(self, lane: int) -> dict:
+        """State of one lane in core.Simulator.get_state() form (fault reduced to a flag)"""
+        return {
+            "pc": _hex(int(self.pc[lane])),
+            "registers": [_hex(int(r)) for r in self.registers[lane]],
+            "cycle": int(self.cycle[lane]),
+            "halted": bool(self.halted[lane]),
+            "faulted": bool(self.faulted[lane]),
+        }
+
+
+def run_batch(source: str, initial_registers: list | None = None, initial_memory: list | None = None,
+              lanes: int | None = None, max_steps: int = DEFAULT_MAX_STEPS,
+              memory_size: int = MEMORY_SIZE) -> VectorSimulator:
+    """
+    Assemble `source` once and run it for every initial register/memory set.
+
+    Args:
+        initial_registers: One {"xN": value} mapping (or None) per lane
+        initial_memory: One {address: word} mapping (or None) per lane
+        lanes: Lane count; defaults to the longest of the two initial lists
+
+    Returns:
+        The finished VectorSimulator; read results from its arrays
+    """
+    program = assemble(source, PROGRAM_START)
+    if lanes is None:
+        lanes = max(len(initial_registers or ()), len(initial_memory or ()), 1)
+    sim = VectorSimulator(program, lanes, memory_size)
+    if initial_registers:
+        sim.set_registers(initial_registers)
+    if initial_memory:
+        sim.set_memory(initial_memory)
+    return sim.run(max_steps)
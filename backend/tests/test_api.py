@@ -0,0 +1,108 @@
+import json
+
+from fastapi.testclient import TestClient
+
+import app
+from benchmarks.run import CORPUS_DIR
+from simulator import core
+from simulator.history import DEFAULT_HISTORY_SIZE
+from simulator.pipeline_core import PipelineSimulator
+
+client = TestClient(app.app)
+SPIN = """
+loop: ADDI x1, x1, 1
+BNE x1, x0, loop
+"""
+
+
+def _session() -> str:
+    return client.post("/api/sessions").json()["session_id"]
+
+
+def test_run_is_bounded(monkeypatch):
+    monkeypatch.setattr(app, "SIM_RUN_MAX_SECONDS", 0.2)
+    session_id = _session()
+    client.post(f"/api/sim/load?session_id={session_id}", json={"source": SPIN})
+    result = client.post(f"/api/sim/run?session_id={session_id}", json={"max_cycles": 10**15}).json()
+    assert result["stop_reason"] == "max_seconds"
+
+    monkeypatch.setattr(app.JOBS, "max_cycles", 1000)
+    result = client.post(f"/api/sim/run?session_id={session_id}", json={"max_cycles": 10**15, "max_seconds": 10**9}).json()
+    assert result["stop_reason"] == "max_cycles"
+    assert result["stats"]["cycles"] == 1000
+
+
+def test_initial_registers_accept_hex_and_report_errors():
+    session_id = _session()
+    load = f"/api/sim/load?session_id={session_id}"
+    result = client.post(load, json={"source": "ADDI x1, x5, 1", "initial_registers": {"x5": "0x10", "x6": -1}}).json()
+    assert result["success"]
+    registers = client.get(f"/api/sim/state?session_id={session_id}").json()["registers"]
+    assert registers[5:7] == ["0x00000010", "0xffffffff"]
+
+    result = client.post(load, json={"source": "ADDI x1, x0, 1", "initial_registers": {"x5": "0xZZ", "t0": 1, "x32": 1}}).json()
+    assert not result["success"]
+    assert len(result["errors"]) == 3
+
+    fork = client.post(f"/api/sim/fork?session_id={session_id}", json={"count": 2, "registers": [{"x7": "0x20"}, {"x7": "zz"}]})
+    assert fork.status_code == 200
+    assert fork.json()["errors"][0]["message"] == "Initial registers: invalid value 'zz' for x7"
+
+
+def test_functional_simulator_parses_registers_the_same_way():
+    sim = core.Simulator()
+    assert sim.load_program("ADDI x1, x5, 1", {"x5": "0x10"})["errors"] == []
+    assert sim.registers[5] == 0x10
+    assert sim.load_program("ADDI x1, x0, 1", {"x5": None})["errors"]
+
+
+def test_only_sessions_keep_history():
+    assert app.SESSIONS.create().sim.history_size == DEFAULT_HISTORY_SIZE
+    assert PipelineSimulator().history is None
+
+
+def test_trace_diagram_lists_stall_and_flush_cycles():
+    session_id = _session()
+    query = f"?session_id={session_id}"
+    client.post(f"/api/sim/load{query}", json={"source": (CORPUS_DIR / "hazards.asm").read_text()})
+    client.post(f"/api/sim/trace{query}")
+    stats = client.post(f"/api/sim/run{query}", json={"max_cycles": 400}).json()["stats"]
+    diagram = client.get(f"/api/sim/trace/diagram{query}&first_cycle=0&last_cycle=399").json()
+    assert len(diagram["stall_cycles"]) == stats["stall_cycles"]
+    assert len(diagram["flush_cycles"]) == stats["flush_count"]
+    assert diagram["flush_cycles"] == sorted(diagram["flush_cycles"])
+
+
+def test_trace_is_capped_at_max_cycles():
+    session_id = _session()
+    query = f"?session_id={session_id}"
+    client.post(f"/api/sim/load{query}", json={"source": SPIN})
+    assert client.post(f"/api/sim/trace{query}&max_cycles=0").json()["max_cycles"] == 1
+    assert client.post(f"/api/sim/trace{query}&max_cycles=100").json()["max_cycles"] == 100
+    client.post(f"/api/sim/run{query}", json={"max_cycles": 1000})
+    info = client.get(f"/api/sim/trace{query}").json()
+    assert info["records"] == 100 and info["full"]
+
+
+def test_batch_jobs_are_bounded(monkeypatch):
+    monkeypatch.setattr(app, "SIM_RUN_MAX_SECONDS", 0.2)
+    monkeypatch.setattr(app.JOBS, "max_cycles", 5000)
+    jobs = [
+        {"id": "cycles", "source": SPIN, "max_cycles": 10**12, "max_seconds": 10**9},
+        {"id": "pipeline", "source": SPIN, "max_cycles": 10**12},
+        {"id": "fast", "source": SPIN, "max_cycles": 10**12, "engine": "fast"},
+    ]
+    lines = client.post("/api/sim/batch", json={"jobs": jobs}).text.splitlines()
+    results = {r["id"]: r for r in map(json.loads, lines)}
+    assert results["cycles"]["stop_reason"] == "max_cycles"
+    assert results["cycles"]["stats"]["cycles"] == 5000
+    monkeypatch.setattr(app.JOBS, "max_cycles", 10**12)
+    lines = client.post("/api/sim/batch", json={"jobs": jobs[1:]}).text.splitlines()
+    assert {r["id"]: r["stop_reason"] for r in map(json.loads, lines)} == {"pipeline": "max_seconds", "fast": "max_seconds"}
+
+
+def test_invalid_initial_memory_entries_are_skipped_by_both_simulators():
+    for sim in (core.Simulator(), PipelineSimulator()):
+        result = sim.load_program("ADDI x1, x0, 1", None, {"0x10": None, "zz": 1, "0x14": "0x7"})
+        assert result["errors"] == []
+        assert sim.memory.read_word(0x14) == 7
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from simulator.assembler import assemble
+
+client = TestClient(app.app)
+
+
+@pytest.mark.parametrize("line, message", [
+    ("MUL x1, x2, x3", "Invalid opcode 'MUL'"),
+    ("ADD x1, x2", "Wrong format for ADD"),
+    ("ADD x1, x2, x32", "Invalid register 'x32'"),
+    ("ADDI x1, x0, five", "Immediate 'five' must be an integer"),
+    ("SLLI x1, x1, a", "Shift amount 'a' must be an integer"),
+    ("LW x1, 4", "Invalid memory format '4'"),
+    ("LW x1, 4(r2)", "Invalid base register 'r2'"),
+    ("SW x1, four(x2)", "Offset 'four' must be an integer"),
+    ("SW y1, 0(x2)", "Invalid destination/source register 'y1'"),
+    ("BEQ x1, x2, 1abel", "Invalid label name '1abel'"),
+    ("9lives: ADD x1, x2, x3", "Invalid label name '9lives'"),
+    ("BNE x1, x0, nowhere", "Undefined label 'nowhere'"),
+])
+def test_errors_name_the_line_and_skip_it(line, message):
+    program = assemble(f"ADDI x1, x0, 1\n{line}\nADDI x2, x0, 2")
+    assert [(e["line"], e["severity"]) for e in program.errors] == [(2, "error")]
+    assert program.errors[0]["message"].startswith(message)
+    # the other lines are still assembled
+    assert [d.raw for d in program.decoded.values()] == ["ADDI x1, x0, 1", "ADDI x2, x0, 2"]
+
+
+def test_duplicate_labels_keep_the_first_definition():
+    program = assemble("top: ADDI x1, x0, 1\ntop: ADDI x2, x0, 2\nBEQ x0, x0, top")
+    assert program.errors == [{"line": 2, "message": "Duplicate label 'top'", "severity": "error"}]
+    assert program.labels == {"top": 0}
+
+
+def test_branches_out_of_range_are_rejected():
+    filler = "ADDI x1, x1, 1\n" * 1100  # 4400 bytes
+    program = assemble(f"BEQ x0, x0, far\n{filler}far: ADDI x2, x0, 1\n{filler}BEQ x0, x0, far\nBEQ x0, x0, near\nnear:")
+    assert [e["line"] for e in program.errors] == [1, 2203]
+    assert all("out of range" in e["message"] for e in program.errors)
+
+
+def test_errors_are_reported_in_line_order():
+    program = assemble("BEQ x0, x0, missing\nADD x1\nlabel-only:\n")
+    assert [e["line"] for e in program.errors] == [1, 2, 3]
+
+
+def test_labels_comments_and_blank_lines():
+    program = assemble("# setup\n\nstart:\n  ADDI x1, x0, 3   # counter\nloop: ADDI x1, x1, -1\nBNE x1, x0, loop\n", 0x80)
+    assert program.errors == []
+    assert program.labels == {"start": 0x80, "loop": 0x84}
+    assert [program.lines[a] for a in program.decoded] == [4, 5, 6]
+    assert program.decoded[0x88].target == 0x84
+
+
+def test_assemble_endpoint_reports_errors():
+    res = client.post("/api/assemble", json={"source": "ADDI x1, x0, 1\nJAL x1, 0"}).json()
+    assert not res["success"]
+    assert res["errors"][0]["line"] == 2
+    assert [i["raw"] for i in res["instructions"]] == ["ADDI x1, x0, 1"]
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from simulator.batch import BatchRunner, run_batch, run_job
+
+client = TestClient(app.app)
+SUM = """
+ADDI x2, x0, 0
+loop: ADD x2, x2, x1
+ADDI x1, x1, -1
+BNE x1, x0, loop
+SW x2, 0(x0)
+"""
+
+
+@pytest.mark.parametrize("engine", ["pipeline", "interp", "fast", "block"])
+def test_run_job_on_every_engine(engine):
+    result = run_job({"source": SUM, "engine": engine, "initial_registers": {"x1": 10}}, 3)
+    assert result["id"] == 3 and result["success"] and result["engine"] == engine
+    assert result["stop_reason"] == "halted"
+    assert result["state"]["registers"][2] == "0x00000037"
+
+
+@pytest.mark.parametrize("job, message", [
+    ({"source": SUM, "engine": "gpu"}, "Unknown engine 'gpu'"),
+    ({"engine": "fast"}, "Invalid job"),
+    ({"source": SUM, "options": {"hazard_policy": "bogus"}}, "Invalid job"),
+    ({"source": "ADDI x1, x0"}, "Wrong format for ADDI"),
+    ({"source": SUM, "initial_registers": {"x1": "ten"}}, "x1"),
+])
+def test_invalid_jobs_fail_alone(job, message):
+    result = run_job({"id": "j", **job})
+    assert result["id"] == "j" and not result["success"]
+    assert message in result["errors"][0]["message"]
+
+
+def test_faults_and_budgets_stop_functional_jobs():
+    fault = run_job({"source": "LW x1, 4096(x0)", "engine": "fast"})
+    assert fault["stop_reason"] == "fault" and fault["stop_at"] == "0x00000000"
+    budget = run_job({"source": SUM, "engine": "block", "initial_registers": {"x1": 1000}, "max_cycles": 100})
+    assert budget["stop_reason"] == "max_cycles" and budget["stats"]["cycles"] == 100
+
+
+def test_runner_yields_every_job_once():
+    jobs = [{"source": SUM, "initial_registers": {"x1": n}, "engine": "fast"} for n in range(1, 12)]
+    with BatchRunner(max_workers=2, chunk_size=3) as runner:
+        indexed = list(runner.run_indexed(jobs))
+    assert sorted(index for index, _ in indexed) == list(range(11))
+    assert all(result["id"] == index for index, result in indexed)
+    ordered = run_batch(jobs, max_workers=2, chunk_size=4)
+    assert [int(r["state"]["registers"][2], 16) for r in ordered] == [n * (n + 1) // 2 for n in range(1, 12)]
+    with pytest.raises(ValueError):
+        BatchRunner(chunk_size=0)
+
+
+def test_batch_endpoint_streams_ndjson():
+    jobs = [
+        {"id": "a", "source": SUM, "initial_registers": {"x1": 4}},
+        {"source": SUM, "initial_registers": {"x1": 5}, "engine": "fast"},
+        {"id": "bad-option", "source": SUM, "memory_size": "lots"},
+        {"id": "bad-source", "source": "MUL x1, x2, x3"},
+    ]
+    response = client.post("/api/sim/batch", json={"jobs": jobs})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == len(jobs)
+    results = {r["id"]: r for r in map(json.loads, lines)}
+    # options that fail validation are reported first
+    assert json.loads(lines[0])["id"] == "bad-option"
+    assert results["a"]["state"]["registers"][2] == "0x0000000a"
+    assert results[1]["engine"] == "fast" and results[1]["state"]["registers"][2] == "0x0000000f"
+    assert not results["bad-option"]["success"] and not results["bad-source"]["success"]
+    assert client.post("/api/sim/batch", json={"jobs": []}).text == ""
@@ -0,0 +1,65 @@
+import pytest
+
+from simulator import core
+from simulator.assembler import assemble
+from simulator.block_engine import MAX_BLOCK_LENGTH, BlockCache, translate
+
+LOOP = """
+ADDI x1, x0, 50
+ADDI x2, x0, 0
+loop: ADDI x2, x2, 3
+SW x2, 0(x0)
+ADDI x1, x1, -1
+BNE x1, x0, loop
+LW x3, 0(x0)
+"""
+
+
+def _sim(source: str = LOOP, **options) -> core.Simulator:
+    sim = core.Simulator(**options)
+    sim.load_program(source)
+    return sim
+
+
+@pytest.mark.parametrize("budget", [1, 3, 7, 50])
+def test_budgets_split_blocks_like_the_interpreter(budget):
+    blocks, interp = _sim(), _sim()
+    while not interp.halted:
+        blocks.run(budget, engine="block")
+        interp.run(budget, engine="interp")
+        assert (blocks.pc, blocks.cycle, blocks.halted, blocks.registers) == \
+               (interp.pc, interp.cycle, interp.halted, interp.registers)
+    assert interp.registers[3] == 150
+
+
+def test_blocks_are_translated_once_per_program():
+    sim = _sim()
+    sim.run(engine="block")
+    cache = sim._blocks
+    # the entry block, the loop body and the block after the loop
+    assert sorted(cache.blocks) == [0, 8, 24]
+    assert cache.stats() == {"blocks": 3, "max_blocks": cache.max_blocks, "translations": 3, "evictions": 0}
+    # loading drops the translations of the old program
+    sim.load_program("ADDI x4, x0, 4")
+    assert sim._blocks is None
+    sim.run(engine="block")
+    assert sim.registers[4] == 4 and sorted(sim._blocks.blocks) == [0]
+
+
+def test_evicted_blocks_are_translated_again():
+    sim = _sim(max_blocks=1)
+    sim.run(engine="block")
+    assert sim.registers[3] == 150
+    assert len(sim._blocks) == 1 and sim._blocks.evictions == sim._blocks.translations - 1 > 0
+    with pytest.raises(ValueError):
+        BlockCache({}, None, None, max_blocks=0)
+
+
+def test_long_straight_line_code_is_split():
+    program = assemble("ADDI x1, x1, 1\n" * (MAX_BLOCK_LENGTH + 10))
+    first = translate(program.decoded, 0, None, None)
+    assert first.length == MAX_BLOCK_LENGTH
+    assert translate(program.decoded, 4 * MAX_BLOCK_LENGTH, None, None).length == 10
+    assert translate(program.decoded, 4 * (MAX_BLOCK_LENGTH + 10), None, None) is None
+    regs = [0] * 32
+    assert first.fn(regs) == 4 * MAX_BLOCK_LENGTH and regs[1] == MAX_BLOCK_LENGTH
@@ -0,0 +1,40 @@
+import pytest
+
+from simulator import core
+from simulator.assembler import assemble
+from simulator.encoder import decode_b_imm, encode_b_type
+from simulator.pipeline_core import PipelineSimulator
+
+FORWARD = """
+ADDI x1, x0, 1
+BEQ x0, x0, skip
+ADDI x1, x0, 99
+ADDI x2, x0, 99
+skip: ADDI x3, x0, 3
+BNE x3, x0, end
+ADDI x4, x0, 99
+end: ADDI x5, x1, 4
+"""
+
+
+@pytest.mark.parametrize("offset", [-4096, -2050, -8, -2, 2, 8, 2046, 2048, 4094])
+def test_b_type_immediates_round_trip(offset):
+    assert decode_b_imm(encode_b_type(0x63, 0, 1, 2, offset)) == offset
+
+
+def test_forward_branches_are_encoded_with_their_offset():
+    program = assemble("BEQ x0, x0, skip\nADDI x1, x0, 1\nskip: ADDI x2, x0, 2")
+    assert program.words[0] == 0x00000463  # beq x0, x0, +8
+    branch = program.decoded[0]
+    assert branch.imm == 8 and branch.target == program.labels["skip"] == 8
+
+
+def test_forward_branches_run_on_both_simulators():
+    functional = core.Simulator()
+    functional.load_program(FORWARD)
+    functional.run()
+    pipeline = PipelineSimulator()
+    pipeline.load_program(FORWARD)
+    pipeline.run(max_cycles=200)
+    for registers in (functional.registers, pipeline.registers):
+        assert registers[1:6] == [1, 0, 3, 0, 5]
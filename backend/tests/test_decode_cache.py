@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from benchmarks.run import CORPUS_DIR
+from simulator import core
+from simulator.assembler import assemble
+from simulator.decoder import DECODE_CACHE, DecodeCache, decode_word
+from simulator.loader import parse_binary
+from simulator.pipeline_core import PipelineSimulator, PROGRAM_START
+
+client = TestClient(app.app)
+BEQ_8 = 0x00000463  # beq x0, x0, +8
+# rewrites the ADDI at `patch` to `ADDI x5, x0, 2` (0x00200293) before fetching it
+SELF_MODIFYING = f"""
+ADDI x3, x0, 512
+SLLI x3, x3, 12
+ORI x3, x3, 659
+SW x3, {PROGRAM_START + 32}(x0)
+ADDI x6, x0, 0
+ADDI x6, x0, 0
+ADDI x6, x0, 0
+ADDI x6, x0, 0
+patch: ADDI x5, x0, 1
+"""
+
+
+def _fields(d):
+    return (d.addr, d.op, d.rd, d.rs1, d.rs2, d.imm, d.target, d.encoded)
+
+
+@pytest.mark.parametrize("name", ["branches", "hazards", "loops", "memory"])
+def test_decoded_words_match_the_assembler(name):
+    program = assemble((CORPUS_DIR / f"{name}.asm").read_text(), PROGRAM_START)
+    for addr, d in program.decoded.items():
+        assert _fields(decode_word(d.encoded, addr)) == _fields(d)
+
+
+def test_entries_are_keyed_by_address_and_word():
+    cache = DecodeCache()
+    first = cache.decode(BEQ_8, 0x80)
+    assert cache.decode(BEQ_8, 0x80) is first
+    other = cache.decode(BEQ_8, 0x100)
+    assert (first.target, other.target) == (0x88, 0x108)
+    assert cache.stats() == {"entries": 2, "max_entries": DecodeCache().max_entries, "hits": 1,
+                             "misses": 2, "evictions": 0, "hit_rate": 0.3333}
+
+
+def test_the_oldest_entries_are_evicted():
+    cache = DecodeCache(max_entries=2)
+    for addr in (0, 4, 8):
+        cache.decode(BEQ_8, addr)
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.decode(BEQ_8, 8)
+    cache.decode(BEQ_8, 0)
+    assert (cache.hits, cache.misses) == (1, 4)
+    with pytest.raises(ValueError):
+        DecodeCache(max_entries=0)
+
+
+def _image():
+    program = assemble(SELF_MODIFYING, PROGRAM_START)
+    assert program.errors == []
+    return parse_binary(b"".join(w.to_bytes(4, "little") for w in program.words), PROGRAM_START)
+
+
+def test_stores_into_code_run_the_new_instruction():
+    sim = PipelineSimulator(memory_size=0x1000)
+    sim.load_image(_image())
+    sim.run(max_cycles=200)
+    functional = core.Simulator(memory_size=0x1000)
+    functional.load_image(_image())
+    functional.run(engine="interp")
+    assert sim.registers[5] == functional.registers[5] == 2
+
+
+def test_image_runs_hit_the_shared_cache():
+    loop = assemble("ADDI x1, x0, 100\nloop: ADDI x1, x1, -1\nBNE x1, x0, loop", PROGRAM_START).words
+    sim = PipelineSimulator()
+    sim.load_image(parse_binary(b"".join(w.to_bytes(4, "little") for w in loop), PROGRAM_START))
+    before = client.get("/api/decode_cache").json()
+    sim.run(max_cycles=1000)
+    after = DECODE_CACHE.stats()
+    assert after["hits"] - before["hits"] >= 190
+    assert after["misses"] - before["misses"] <= 3
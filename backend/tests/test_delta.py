@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+
+import app
+from simulator.pipeline_core import FULL_STATE_INTERVAL, PipelineSimulator
+
+client = TestClient(app.app)
+PROGRAM = """
+ADDI x1, x0, 5
+ADDI x2, x1, 7
+SW x2, 0(x0)
+loop: ADDI x3, x3, 1
+BNE x3, x0, loop
+"""
+
+
+def _sim() -> PipelineSimulator:
+    sim = PipelineSimulator()
+    sim.load_program(PROGRAM)
+    return sim
+
+
+def test_a_step_delta_lists_only_what_the_step_changed():
+    sim = _sim()
+    start = sim.get_state_delta()
+    assert start["full"] and len(start["registers"]) == 32
+    deltas = [sim.step_delta(epoch=start["epoch"]) for _ in range(12)]
+    assert not any(d["full"] for d in deltas)
+    # with stalls on RAW hazards x1 is written in cycle 5, x2 in cycle 9 and the word in cycle 12
+    assert [d["cycle"] for d in deltas if d["registers"]] == [5, 9]
+    assert deltas[4]["registers"] == {"x1": "0x00000005"}
+    assert deltas[8]["registers"] == {"x2": "0x0000000c"}
+    assert [d["memory"] for d in deltas if d["memory"]] == [{"0x00000000": "0x0000000c"}]
+    assert deltas[11]["memory"]
+    assert all(d["since"] == d["cycle"] - 1 for d in deltas)
+    # nothing changed since the current cycle
+    quiet = sim.get_state_delta(sim.cycle, start["epoch"])
+    assert quiet["registers"] == {} and quiet["memory"] == {} and quiet["pipeline"] == {}
+
+
+def test_deltas_fall_back_to_a_full_state():
+    sim = _sim()
+    epoch = sim.epoch
+    sim.run(max_cycles=FULL_STATE_INTERVAL - 2)
+    assert not sim.get_state_delta(sim.cycle - 1, epoch)["full"]
+    # since lies before the latest FULL_STATE_INTERVAL boundary
+    sim.run(max_cycles=4)
+    assert sim.get_state_delta(sim.cycle - 4, epoch)["full"]
+    assert not sim.get_state_delta(sim.cycle - 1, epoch)["full"]
+    # since is ahead of the machine or comes from before a reload
+    assert sim.get_state_delta(sim.cycle + 1, epoch)["full"]
+    sim.load_program(PROGRAM)
+    assert sim.epoch != epoch
+    assert sim.get_state_delta(0, epoch)["full"]
+
+
+def test_delta_endpoints():
+    session_id = client.post("/api/sessions").json()["session_id"]
+    query = f"?session_id={session_id}"
+    client.post(f"/api/sim/load{query}", json={"source": PROGRAM})
+    full = client.get(f"/api/sim/state{query}&delta=true").json()
+    assert full["full"]
+    for _ in range(5):
+        step = client.post(f"/api/sim/step{query}&delta=true&epoch={full['epoch']}").json()
+    assert not step["full"] and step["registers"] == {"x1": "0x00000005"}
+    run = client.post(f"/api/sim/run{query}", json={"max_cycles": 10, "delta": True, "epoch": full["epoch"]}).json()
+    assert not run["state"]["full"] and run["state"]["since"] == 5
+    assert client.get(f"/api/sim/state{query}").json()["cycle"] == run["state"]["cycle"]
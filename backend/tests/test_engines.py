@@ -0,0 +1,77 @@
+import struct
+
+import pytest
+
+from benchmarks.run import CORPUS_DIR, PIPELINE_MODES
+from simulator import core, pipeline_core
+from simulator.assembler import assemble
+from simulator.encoder import encode_b_type, encode_i_type
+from simulator.loader import parse_binary
+from simulator.vector_engine import VectorSimulator
+
+PROGRAMS = sorted(CORPUS_DIR.glob("*.asm"))
+MAX_CYCLES = 10_000_000
+
+
+def _reference(path):
+    sim = core.Simulator()
+    sim.load_program(path.read_text())
+    sim.run(MAX_CYCLES, "interp")
+    assert sim.halted
+    return sim
+
+
+def _memory(sim) -> bytes:
+    return sim.memory.read_bytes(0, sim.memory_size)
+
+
+@pytest.mark.parametrize("engine", ["fast", "block"])
+@pytest.mark.parametrize("path", PROGRAMS, ids=lambda p: p.stem)
+def test_functional_engines_match_interpreter(path, engine):
+    reference = _reference(path)
+    sim = core.Simulator()
+    sim.load_program(path.read_text())
+    sim.run(MAX_CYCLES, engine)
+    assert sim.registers == reference.registers
+    assert _memory(sim) == _memory(reference)
+    assert sim.cycle == reference.cycle
+
+
+@pytest.mark.parametrize("path", PROGRAMS, ids=lambda p: p.stem)
+def test_vector_engine_matches_interpreter(path):
+    reference = _reference(path)
+    sim = VectorSimulator(assemble(path.read_text(), core.PROGRAM_START), 4, core.MEMORY_SIZE).run(MAX_CYCLES)
+    for lane in range(sim.lanes):
+        assert list(map(int, sim.registers[lane])) == reference.registers
+
+
+@pytest.mark.parametrize("mode", PIPELINE_MODES)
+@pytest.mark.parametrize("path", PROGRAMS, ids=lambda p: p.stem)
+def test_pipeline_matches_interpreter(path, mode):
+    reference = _reference(path)
+    sim = pipeline_core.PipelineSimulator(**PIPELINE_MODES[mode])
+    sim.load_program(path.read_text())
+    sim.run(MAX_CYCLES)
+    assert sim.is_finished()
+    assert sim.registers == reference.registers
+    assert _memory(sim) == _memory(reference)
+    assert sim.retired == reference.cycle
+
+
+def _far_branch_image():
+    """ADDI x1, x0, 1; BEQ x1, x1, +64 (outside the image); ADDI x2, x0, 2"""
+    words = [encode_i_type(0x13, 1, 0, 0, 1), encode_b_type(0x63, 0, 1, 1, 64), encode_i_type(0x13, 2, 0, 0, 2)]
+    return parse_binary(b"".join(struct.pack("<I", w) for w in words), 0)
+
+
+@pytest.mark.parametrize("budgets", [[100], [2, 100], [1, 1, 1]])
+@pytest.mark.parametrize("engine", core.ENGINES)
+def test_branch_out_of_an_image_halts_at_the_target(engine, budgets):
+    sim = core.Simulator()
+    sim.load_image(_far_branch_image())
+    for budget in budgets:
+        state = sim.run(budget, engine)
+    assert state["halted"]
+    assert state["pc"] == "0x00000044"
+    assert state["cycle"] == 2
+    assert sim.registers[1:3] == [1, 0]
@@ -0,0 +1,90 @@
+import json
+import random
+
+import pytest
+
+from benchmarks.run import CORPUS_DIR
+from simulator.pipeline_core import PipelineSimulator
+
+SOURCE = (CORPUS_DIR / "hazards.asm").read_text()
+OPTIONS = [
+    {"history_size": 64},
+    {"history_size": 300, "hazard_policy": "forward", "branch_predictor": "2bit"},
+    {"history_size": 1024, "branch_predictor": "btb", "branch_resolution": "id"},
+]
+
+
+def _state(sim) -> str:
+    """Everything the machine carries forward, so a reverse step must restore all of it"""
+    return (json.dumps(sim.get_state(), sort_keys=True) + sim.memory.read_bytes(0, sim.memory_size).hex()
+            + json.dumps(sim.predictor.state()) + json.dumps(sorted(sim.mem_changed_at.items())))
+
+
+def _recorded(options: dict, cycles: int) -> list:
+    """State after each cycle 0..cycles of a straight run"""
+    sim = PipelineSimulator(**options)
+    sim.load_program(SOURCE, {"x20": 5}, {"0x0": 7})
+    states = [_state(sim)]
+    for _ in range(cycles):
+        sim.step()
+        states.append(_state(sim))
+    return states
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_seek_and_back_match_recorded_states(options):
+    states = _recorded(options, 3000)
+    rng = random.Random(3)
+    sim = PipelineSimulator(**options)
+    sim.load_program(SOURCE, {"x20": 5}, {"0x0": 7})
+    for _ in range(40):
+        action = rng.choice(["step", "run", "back", "seek"])
+        if action == "step":
+            for _ in range(rng.randint(1, 80)):
+                sim.step()
+        elif action == "run":
+            sim.run(rng.randint(1, 3000 - sim.cycle))
+        elif action == "back":
+            sim.back(rng.randint(1, 1500))
+        else:
+            sim.seek(rng.randint(0, 3000))
+        assert _state(sim) == states[sim.cycle], (action, sim.cycle)
+
+
+def _apply(view: dict, delta: dict):
+    """What a client does with get_state_delta(): patch its copy of the state"""
+    if delta["full"]:
+        view.clear()
+        view.update(delta)
+        view["registers"] = list(delta["registers"])
+        view["pipeline"] = dict(delta["pipeline"])
+        view["memory"] = dict(delta["memory"])
+        return
+    for key, value in delta.items():
+        if key not in ("registers", "pipeline", "memory"):
+            view[key] = value
+    for name, value in delta["registers"].items():
+        view["registers"][int(name[1:])] = value
+    view["pipeline"].update(delta["pipeline"])
+    view["memory"].update(delta["memory"])
+
+
+@pytest.mark.parametrize("name", ["hazards", "memory"])
+def test_deltas_rebuild_the_full_state(name):
+    sim = PipelineSimulator(history_size=1024)
+    sim.load_program((CORPUS_DIR / f"{name}.asm").read_text(), None, {"0x0": 7, "0x4": 9})
+    rng = random.Random(5)
+    view = {}
+    _apply(view, sim.get_state_delta())
+    for _ in range(400):
+        if rng.random() < 0.1:
+            sim.back(rng.randint(1, 20))  # `since` is then ahead of the machine: a full state
+        else:
+            for _ in range(rng.randint(1, 4)):
+                sim.step()
+        delta = sim.get_state_delta(view["cycle"], view["epoch"])
+        _apply(view, delta)
+        state = sim.get_state()
+        assert {key: view[key] for key in state} == state
+        # the delta memory view holds every word stored so far
+        assert view["memory"] == {f"0x{addr:08x}": f"0x{sim._read_word(addr):08x}" for addr in sim.mem_changed_at}
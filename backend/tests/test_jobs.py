@@ -0,0 +1,51 @@
+import time
+
+from simulator.jobs import JOB_CANCELLED, JOB_DONE, JOB_FAILED, FINISHED_STATES, JobPool
+from simulator.pipeline_core import PipelineSimulator
+from simulator.sessions import Session
+
+LOOP = """
+ADDI x1, x0, 0
+ADDI x2, x0, 2000
+loop: ADDI x1, x1, 1
+BLT x1, x2, loop
+"""
+SPIN = """
+loop: ADDI x1, x1, 1
+BNE x1, x0, loop
+"""
+
+
+def _session(source: str) -> Session:
+    sim = PipelineSimulator(history_size=0)
+    sim.load_program(source)
+    return Session("s", sim)
+
+
+def _wait(pool: JobPool, job, timeout: float = 10.0):
+    # finished and released: the pool drops its reference right after the status changes
+    deadline = time.monotonic() + timeout
+    while job.status not in FINISHED_STATES or pool._active.get(job.session.id) is job:
+        assert time.monotonic() < deadline, f"job still {job.status} after {timeout}s"
+        time.sleep(0.001)
+    return job
+
+
+def test_finished_jobs_release_the_session():
+    pool = JobPool(max_workers=1, check_interval=256)
+    try:
+        done = _wait(pool, pool.submit(_session(LOOP)))
+        assert done.status == JOB_DONE
+        assert done.result["stop_reason"] == "halted"
+
+        session = _session(SPIN)
+        running = pool.submit(session)
+        pool.cancel(running.id)
+        assert _wait(pool, running).status == JOB_CANCELLED
+
+        session.sim = None  # the next chunk raises
+        failed = _wait(pool, pool.submit(session))
+        assert failed.status == JOB_FAILED
+        assert pool._active == {}
+    finally:
+        pool.shutdown()
@@ -0,0 +1,99 @@
+import base64
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from simulator import core
+from simulator.assembler import assemble
+from simulator.loader import parse_binary, parse_ihex, parse_image
+from simulator.pipeline_core import PipelineSimulator, PROGRAM_START
+
+client = TestClient(app.app)
+SOURCE = """
+ADDI x1, x0, 3
+loop: ADDI x2, x2, 5
+ADDI x1, x1, -1
+BNE x1, x0, loop
+SW x2, 0(x0)
+"""
+
+
+def _record(rtype: int, addr: int, data: bytes) -> str:
+    body = bytes([len(data), addr >> 8, addr & 0xFF, rtype]) + data
+    return ":" + (body + bytes([-sum(body) & 0xFF])).hex().upper()
+
+
+def _ihex(code: bytes, base: int) -> str:
+    """Intel HEX text placing `code` at `base` in 16-byte records, entry at `base`"""
+    records = [_record(0x04, 0, (base >> 16).to_bytes(2, "big"))]
+    for i in range(0, len(code), 16):
+        records.append(_record(0x00, (base + i) & 0xFFFF, code[i:i + 16]))
+    records.append(_record(0x05, 0, base.to_bytes(4, "big")))
+    records.append(_record(0x01, 0, b""))
+    return "\n".join(records)
+
+
+def _code(base: int = PROGRAM_START) -> bytes:
+    return b"".join(w.to_bytes(4, "little") for w in assemble(SOURCE, base).words)
+
+
+def test_intel_hex_records():
+    image = parse_ihex(_ihex(_code(0x10080), 0x10080))
+    assert image.segments == [(0x10080, _code(0x10080)[:16]), (0x10090, _code(0x10080)[16:])]
+    assert (image.start, image.end, image.entry) == (0x10080, 0x10094, 0x10080)
+    # extended segment address and start segment address records
+    text = "\n".join([_record(0x02, 0, b"\x10\x00"), _record(0x00, 4, b"\x01\x02"),
+                      _record(0x03, 0, b"\x10\x00\x00\x04"), _record(0x01, 0, b""), _record(0x00, 0, b"\xff")])
+    image = parse_ihex(text)
+    assert image.segments == [(0x10004, b"\x01\x02")] and image.entry == 0x10004
+
+
+@pytest.mark.parametrize("text, message", [
+    ("0200000001FF", "must start with ':'"),
+    (":02000000ZZ01FD", "invalid hex digits"),
+    (":0300000001FF", "wrong record length"),
+    (":0200000001FF00", "checksum mismatch"),
+    (_record(0x07, 0, b""), "unsupported record type 07"),
+    (_record(0x01, 0, b""), "no data"),
+])
+def test_malformed_intel_hex_is_rejected(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_ihex(text)
+
+
+def test_unknown_image_format():
+    with pytest.raises(ValueError, match="Unknown image format"):
+        parse_image(b"", "elf", 0)
+
+
+def test_images_run_like_the_assembled_program():
+    source = PipelineSimulator()
+    source.load_program(SOURCE)
+    source.run(max_cycles=500)
+    for image in (parse_binary(_code(), PROGRAM_START), parse_ihex(_ihex(_code(), PROGRAM_START))):
+        sim = PipelineSimulator()
+        assert sim.load_image(image)["errors"] == []
+        sim.run(max_cycles=500)
+        assert sim.registers == source.registers and sim.cycle == source.cycle
+        assert sim.memory.read_word(0) == 15
+    functional = core.Simulator()
+    functional.load_image(parse_binary(_code(0), 0))
+    functional.run()
+    assert functional.registers == source.registers
+
+
+def test_load_image_endpoint():
+    session_id = client.post("/api/sessions").json()["session_id"]
+    query = f"?session_id={session_id}"
+    res = client.post(f"/api/sim/load_image{query}", json={"image": base64.b64encode(_code()).decode()}).json()
+    assert res["success"] and res["entry"] == f"0x{PROGRAM_START:08x}"
+    assert [i["hex"] for i in res["instructions"]] == [f"0x{w:08x}" for w in assemble(SOURCE, PROGRAM_START).words]
+    res = client.post(f"/api/sim/load_image{query}", json={"image": _ihex(_code(), PROGRAM_START), "format": "ihex"}).json()
+    assert res["success"]
+    run = client.post(f"/api/sim/run{query}", json={"max_cycles": 500}).json()
+    assert run["stop_reason"] == "halted" and run["state"]["registers"][2] == "0x0000000f"
+    # errors: bad base64, and an image that does not fit the memory
+    for body in ({"image": "not base64!"}, {"image": base64.b64encode(_code()).decode(), "base": "0xfffffff0"}):
+        res = client.post(f"/api/sim/load_image{query}", json=body).json()
+        assert not res["success"] and res["errors"][0]["severity"] == "error"
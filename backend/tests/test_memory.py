@@ -0,0 +1,98 @@
+import pytest
+
+from simulator import core
+from simulator.memory import PAGE_SIZE, MemoryFault, PagedMemory
+from simulator.pipeline_core import PipelineSimulator, PROGRAM_START
+
+FAULT = """
+ADDI x1, x0, 5
+SW x1, 252(x0)
+LW x2, 256(x0)
+ADDI x3, x0, 1
+"""
+
+
+def test_untouched_pages_read_zero_without_allocating():
+    memory = PagedMemory(1 << 32)
+    assert memory.read_word(0xFFFFFFFC) == 0
+    assert memory.read_bytes(0x1000_0000, 8) == bytes(8)
+    assert memory.stats()["pages_allocated"] == 0
+    memory.write_word(0x1000_0000, 1)
+    assert memory.stats()["pages_allocated"] == 1
+
+
+def test_accesses_across_a_page_boundary():
+    memory = PagedMemory(4 * PAGE_SIZE)
+    memory.write_word(PAGE_SIZE - 2, 0x44332211)  # unaligned, half in each page
+    assert memory.read_bytes(PAGE_SIZE - 2, 4) == bytes([0x11, 0x22, 0x33, 0x44])
+    assert memory.read_word(PAGE_SIZE - 4) == 0x22110000
+    assert memory.read_word(PAGE_SIZE) == 0x00004433
+    assert memory.stats()["pages_allocated"] == 2
+    data = bytes(range(256)) * 20  # spans three pages
+    memory.write_bytes(PAGE_SIZE - 100, data)
+    assert memory.read_bytes(PAGE_SIZE - 100, len(data)) == data
+
+
+@pytest.mark.parametrize("addr", [-4, -1, 0xFD, 0x100, 0x1000])
+def test_accesses_outside_the_memory_fault(addr):
+    memory = PagedMemory(0x100)
+    with pytest.raises(MemoryFault) as fault:
+        memory.read_word(addr)
+    assert fault.value.access == "read"
+    with pytest.raises(MemoryFault) as fault:
+        memory.write_word(addr, 1)
+    assert fault.value.info()["access"] == "write"
+    assert memory.stats()["pages_allocated"] == 0
+    memory.write_word(0xFC, 7)  # the last word is still in range
+    assert memory.read_word(0xFC) == 7
+
+
+def test_sizes_are_checked():
+    for size in (0, 3, (1 << 32) + 1):
+        with pytest.raises(ValueError):
+            PagedMemory(size)
+
+
+def test_snapshots_share_pages_until_written():
+    memory = PagedMemory(2 * PAGE_SIZE)
+    memory.write_word(0, 1)
+    pages = memory.snapshot()
+    memory.write_word(0, 2)
+    memory.write_word(PAGE_SIZE, 3)
+    assert int.from_bytes(pages[0][:4], "little") == 1 and 1 not in pages
+    memory.restore(pages)
+    assert memory.read_word(0) == 1 and memory.read_word(PAGE_SIZE) == 0
+
+
+def _assert_faulted(fault, pc, registers, read_word):
+    assert fault["pc"] == f"0x{pc:08x}"
+    assert fault["addr"] == "0x00000100" and fault["access"] == "read"
+    assert registers[1] == 5 and registers[2] == 0 and registers[3] == 0
+    assert read_word(252) == 5
+
+
+@pytest.mark.parametrize("engine", core.ENGINES)
+def test_functional_engines_stop_at_a_fault(engine):
+    sim = core.Simulator()
+    sim.load_program(FAULT)
+    sim.run(engine=engine)
+    assert sim.halted
+    assert sim.pc == core.PROGRAM_START + 8
+    _assert_faulted(sim.fault, sim.pc, sim.registers, sim.memory.read_word)
+
+
+@pytest.mark.parametrize("options", [{}, {"hazard_policy": "forward"}])
+def test_pipeline_faults_are_precise(options):
+    sim = PipelineSimulator(**options)
+    sim.load_program(FAULT)
+    sim.run(max_cycles=100)
+    assert sim.is_finished()
+    assert sim.pc == PROGRAM_START + 8
+    _assert_faulted(sim.fault, sim.pc, sim.registers, sim.memory.read_word)
+
+
+def test_a_larger_memory_moves_the_fault():
+    sim = PipelineSimulator(memory_size=0x200)
+    sim.load_program(FAULT)
+    sim.run(max_cycles=100)
+    assert sim.fault is None and sim.registers[3] == 1
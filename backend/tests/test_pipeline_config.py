@@ -0,0 +1,29 @@
+import pytest
+
+from simulator.pipeline_core import PipelineSimulator
+
+PROGRAM = """
+ADDI x1, x0, 5
+ADDI x2, x1, 7
+SW x2, 0(x0)
+"""
+
+
+@pytest.mark.parametrize("options", [
+    {"history_size": -1},
+    {"hazard_policy": "forward", "branch_predictor": "bogus"},
+    {"hazard_policy": "forward", "memory_size": 3},
+    {"hazard_policy": "bogus"},
+])
+def test_rejected_configure_leaves_machine_untouched(options):
+    sim = PipelineSimulator(hazard_policy="stall")
+    sim.load_program(PROGRAM)
+    sim.step()
+    sim.step()
+    before = sim.get_state()
+    with pytest.raises(ValueError):
+        sim.configure(**options)
+    assert sim.get_state() == before
+    assert sim.config() == PipelineSimulator(hazard_policy="stall").config()
+    sim.run(max_cycles=100)
+    assert sim.registers[2] == 12
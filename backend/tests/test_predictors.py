@@ -0,0 +1,103 @@
+import pytest
+
+from simulator.branch_predictor import BTBPredictor, CounterPredictor, make_predictor
+from simulator.pipeline_core import PipelineSimulator, PROGRAM_START
+
+LOOP = """
+ADDI x1, x0, 3
+loop: ADDI x1, x1, -1
+BNE x1, x0, loop
+ADDI x2, x0, 7
+"""
+BRANCH = PROGRAM_START + 8
+# an inner loop of 6 iterations entered 4 times: 28 branches, 23 taken
+NESTED = """
+ADDI x4, x0, 4
+ADDI x5, x0, 0
+outer: ADDI x1, x0, 0
+ADDI x2, x0, 6
+inner: ADDI x1, x1, 1
+BLT x1, x2, inner
+ADDI x5, x5, 1
+BLT x5, x4, outer
+"""
+MISPREDICTS = {
+    "not_taken": 23,  # every taken branch
+    "btfn": 5,  # every loop exit
+    "1bit": 10,  # every loop entry and exit
+    "2bit": 7,  # the first entries and every exit
+    "btb": 7,
+}
+
+
+def _run(**options) -> PipelineSimulator:
+    sim = PipelineSimulator(**options)
+    sim.load_program(LOOP)
+    sim.run(max_cycles=1000)
+    return sim
+
+
+def test_btb_hit_fetches_the_stored_target():
+    sim = PipelineSimulator(branch_predictor="btb")
+    sim.load_program(LOOP)
+    # a stale entry for the branch points back to the first instruction
+    sim.predictor.entries[sim.predictor._index(BRANCH)] = (BRANCH, PROGRAM_START, 3)
+    while sim.ifid.nop or sim.ifid.addr != BRANCH:
+        sim.step()
+    assert sim.pc == PROGRAM_START
+    # the resolving stage flushes the wrong path and the program still completes
+    sim.run(max_cycles=1000)
+    seeded = PipelineSimulator(branch_predictor="btb")
+    seeded.load_program(LOOP)
+    seeded.predictor.entries[seeded.predictor._index(BRANCH)] = (BRANCH, PROGRAM_START + 4, 3)
+    seeded.run(max_cycles=1000)
+    assert sim.registers == seeded.registers == _run().registers
+    assert sim.branch_mispredicts == seeded.branch_mispredicts + 1
+
+
+@pytest.mark.parametrize("resolution", ["ex", "id"])
+@pytest.mark.parametrize("name", sorted(MISPREDICTS))
+def test_mispredicts_per_predictor(name, resolution):
+    sim = PipelineSimulator(branch_predictor=name, branch_resolution=resolution)
+    sim.load_program(NESTED)
+    sim.run(max_cycles=5000)
+    assert sim.halted and sim.registers[5] == 4
+    assert (sim.branch_predictions, sim.branch_count) == (28, 23)
+    assert sim.branch_mispredicts == MISPREDICTS[name]
+    assert sim.flush_cycles == sim.branch_mispredicts * (1 if resolution == "id" else 2)
+
+
+def test_counters_saturate():
+    predictor = CounterPredictor(2)
+    for _ in range(5):
+        predictor.update(0x80, 0x40, True)
+    assert predictor.table[predictor._index(0x80)] == 3
+    predictor.update(0x80, 0x40, False)
+    assert predictor.predict(0x80, 0x40)  # one not-taken outcome leaves it weakly taken
+    predictor.update(0x80, 0x40, False)
+    assert not predictor.predict(0x80, 0x40)
+    # branches 4 * bht_size bytes apart share a counter
+    assert predictor._index(0x80) == predictor._index(0x80 + 4 * predictor.bht_size)
+
+
+def test_btb_entries_are_evicted_by_aliasing_branches():
+    predictor = BTBPredictor(btb_size=4)
+    predictor.update(0x80, 0x40, False)
+    assert predictor.predict_target(0x80, 0x40) is None  # allocated on the first taken execution
+    predictor.update(0x80, 0x40, True)
+    assert predictor.predict_target(0x80, 0x40) == 0x40
+    saved = predictor.state()
+    predictor.update(0x90, 0x60, True)  # same index, other tag
+    assert predictor.predict_target(0x80, 0x40) is None
+    assert predictor.predict_target(0x90, 0x60) == 0x60
+    predictor.restore(saved)
+    assert predictor.predict_target(0x80, 0x40) == 0x40
+
+
+def test_unknown_predictor_and_table_sizes_are_rejected():
+    with pytest.raises(ValueError):
+        make_predictor("bogus")
+    with pytest.raises(ValueError):
+        make_predictor("2bit", bht_size=0)
+    with pytest.raises(ValueError):
+        make_predictor("btb", btb_size=0)
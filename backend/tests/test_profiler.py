@@ -0,0 +1,69 @@
+from simulator.pipeline_core import PipelineSimulator
+
+LOOP = """
+ADDI x1, x0, 0
+ADDI x2, x0, 500
+loop: ADD x3, x3, x1
+SW x3, 0(x0)
+LW x4, 0(x0)
+ADDI x1, x1, 1
+BLT x1, x2, loop
+"""
+
+
+def _executions(sim):
+    return sum(row["executions"] for row in sim.profile_report()["instructions"])
+
+
+def test_profile_totals_match_counters():
+    sim = PipelineSimulator(profile=True, history_size=1024)
+    sim.load_program(LOOP)
+    sim.run(max_cycles=100_000)
+    rows = sim.profile_report()["instructions"]
+    assert sum(r["executions"] for r in rows) == sim.retired
+    assert sum(r["stall_cycles"] for r in rows) == sim.stall_cycles
+    assert sum(r["flush_cycles"] for r in rows) == sim.flush_cycles
+    assert sum(r["mispredicts"] for r in rows) == sim.branch_mispredicts
+    assert all(r["instruction"] for r in rows)
+
+
+def test_reverse_step_keeps_profile():
+    # seeking past the undo ring restores a keyframe; the profile must survive it
+    sim = PipelineSimulator(profile=True, history_size=1024)
+    sim.load_program(LOOP)
+    sim.run(max_cycles=5000)
+    executions = _executions(sim)
+    assert executions == sim.retired
+    sim.back(1)
+    assert _executions(sim) == executions
+    sim.seek(10)
+    assert _executions(sim) == executions
+    # replaying cycles that were already profiled adds nothing; new cycles count
+    sim.seek(5000)
+    assert _executions(sim) == executions
+    sim.run(max_cycles=100)
+    assert _executions(sim) > executions
+
+
+def test_stepping_forward_after_back_counts_once():
+    sim = PipelineSimulator(profile=True, history_size=1024)
+    sim.load_program(LOOP)
+    for _ in range(200):
+        sim.step()
+    executions = _executions(sim)
+    sim.back(50)
+    for _ in range(50):
+        sim.step()
+    assert _executions(sim) == executions
+    sim.back(50)
+    sim.run(max_cycles=50)
+    assert _executions(sim) == executions
+
+
+def test_csv_export():
+    sim = PipelineSimulator(profile=True)
+    sim.load_program(LOOP)
+    sim.run(max_cycles=1000)
+    lines = sim.profiler.to_csv(sim.decoded).splitlines()
+    assert lines[0].startswith("address,instruction,executions")
+    assert len(lines) == len(sim.profiler.pcs) + 1
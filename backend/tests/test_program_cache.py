@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from simulator import core
+from simulator.pipeline_core import PipelineSimulator, PROGRAM_START
+from simulator.program_cache import PROGRAM_CACHE, ProgramCache, normalize_source
+
+client = TestClient(app.app)
+SOURCE = "ADDI x1, x0, 3\nloop: ADDI x1, x1, -1\nBNE x1, x0, loop\n"
+
+
+def test_comments_and_indentation_share_an_entry():
+    cache = ProgramCache()
+    program = cache.get(SOURCE, 0)
+    variant = "  ADDI x1, x0, 3   # counter\nloop: ADDI x1, x1, -1\n\tBNE x1, x0, loop\n\n\n"
+    assert normalize_source(variant) == normalize_source(SOURCE)
+    assert cache.get(variant, 0) is program
+    # line numbers are kept: a comment line shifts them, so it is another entry
+    assert cache.get("# header\n" + SOURCE, 0) is not program
+    assert cache.get(SOURCE, 0x80) is not program and cache.get(SOURCE, 0x80).base == 0x80
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_least_recently_used_programs_are_evicted():
+    cache = ProgramCache(max_entries=2)
+    a = cache.get("ADDI x1, x0, 1", 0)
+    cache.get("ADDI x1, x0, 2", 0)
+    assert cache.get("ADDI x1, x0, 1", 0) is a  # now the most recent
+    cache.get("ADDI x1, x0, 3", 0)
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.get("ADDI x1, x0, 1", 0) is a
+    cache.get("ADDI x1, x0, 2", 0)
+    assert cache.stats()["misses"] == 4
+    cache.clear()
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        ProgramCache(max_entries=0)
+
+
+def test_programs_with_errors_are_cached():
+    cache = ProgramCache()
+    program = cache.get("ADDI x1, x0\nADDI x2, x0, 2", 0)
+    assert program.errors and cache.get("ADDI x1, x0\nADDI x2, x0, 2", 0) is program
+
+
+def test_simulators_share_the_cached_program():
+    first = PipelineSimulator()
+    first.load_program(SOURCE)
+    second = PipelineSimulator()
+    second.load_program(SOURCE + "\n")
+    assert second.program is first.program is PROGRAM_CACHE.get(SOURCE, PROGRAM_START)
+    before = [(a, d.target, d.encoded) for a, d in first.program.decoded.items()]
+    first.run(max_cycles=100)
+    second.run(max_cycles=100)
+    assert second.registers == first.registers
+    assert [(a, d.target, d.encoded) for a, d in first.program.decoded.items()] == before
+    functional = core.Simulator()
+    functional.load_program(SOURCE)
+    assert functional.program is PROGRAM_CACHE.get(SOURCE, core.PROGRAM_START)
+
+
+def test_assemble_and_load_hit_the_cache():
+    source = "ADDI x7, x0, 77\n"
+    before = client.get("/api/program_cache").json()
+    client.post("/api/assemble", json={"source": source})
+    client.post("/api/sim/load", json={"source": source + "# loaded\n"})
+    after = client.get("/api/program_cache").json()
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 1)
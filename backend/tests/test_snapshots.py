@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from benchmarks.run import CORPUS_DIR
+from simulator.pipeline_core import PipelineSimulator
+
+SOURCE = (CORPUS_DIR / "memory.asm").read_text()
+END_CYCLE = 8000  # machines are compared here, well into the program
+
+
+def _final(sim) -> str:
+    sim.run(END_CYCLE - sim.cycle)
+    return json.dumps(sim.get_state(), sort_keys=True) + sim.memory.read_bytes(0, sim.memory_size).hex()
+
+
+@pytest.mark.parametrize("options", [{}, {"hazard_policy": "forward", "branch_predictor": "2bit", "history_size": 64}])
+@pytest.mark.parametrize("cycle", [1, 50, 3333])
+def test_restored_and_forked_machines_continue_like_the_original(options, cycle):
+    reference = PipelineSimulator(**options)
+    reference.load_program(SOURCE, {"x20": 5}, {"0x0": 7})
+    expected = _final(reference)
+
+    sim = PipelineSimulator(**options)
+    sim.load_program(SOURCE, {"x20": 5}, {"0x0": 7})
+    sim.run(cycle)
+    snapshot = sim.snapshot()
+    forks = sim.fork(2)
+    assert _final(sim) == expected
+    sim.restore(snapshot)
+    assert _final(sim) == expected
+    assert [_final(fork) for fork in forks] == [expected, expected]
+    assert _final(PipelineSimulator.from_snapshot(snapshot)) == expected
+
+
+def test_forks_do_not_share_state():
+    sim = PipelineSimulator()
+    sim.load_program("LW x1, 0(x0)\nADDI x1, x1, 1\nSW x1, 4(x0)", None, {"0x0": 1})
+    sim.run(2)
+    snapshot = sim.snapshot()
+    first, second = sim.fork(2)
+    assert first.set_inputs({"x9": 9}, {"0x0": 100}) == []
+    for machine in (sim, first, second):
+        machine.run(100)
+    assert [m.memory.read_word(4) for m in (sim, first, second)] == [2, 101, 2]
+    assert [m.registers[9] for m in (sim, first, second)] == [0, 9, 0]
+    # the snapshot still holds the state it was taken at
+    restored = PipelineSimulator.from_snapshot(snapshot)
+    assert restored.memory.read_word(0) == 1
+    assert restored.memory.read_word(4) == 0
+    assert restored.cycle == 2
@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+
+client = TestClient(app.app)
+SPIN = """
+loop: ADDI x1, x1, 1
+BNE x1, x0, loop
+"""
+
+
+def _connect():
+    session_id = client.post("/api/sessions").json()["session_id"]
+    client.post(f"/api/sim/load?session_id={session_id}", json={"source": SPIN})
+    return client.websocket_connect(f"/api/sim/stream?session_id={session_id}")
+
+
+def test_malformed_frames_are_reported_and_the_stream_goes_on():
+    with _connect() as ws:
+        assert ws.receive_json()["type"] == "frame"
+        ws.send_text("{not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_bytes(b"{}")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"action": "step", "cycles": 3})
+        frame = ws.receive_json()
+        assert frame["type"] == "frame" and frame["state"]["cycle"] == 3
+
+
+def _frame(ws) -> dict:
+    message = ws.receive_json()
+    assert message["type"] == "frame", message
+    return message
+
+
+def test_unknown_sessions_are_closed():
+    with client.websocket_connect("/api/sim/stream?session_id=nope") as ws:
+        assert ws.receive_json()["type"] == "error"
+        assert ws.receive()["code"] == 4404
+
+
+def test_steps_send_deltas_until_full_mode():
+    with _connect() as ws:
+        first = _frame(ws)["state"]
+        assert first["full"] and first["cycle"] == 0
+        ws.send_json({"action": "step", "cycles": 2})
+        delta = _frame(ws)["state"]
+        assert not delta["full"] and delta["since"] == 0 and delta["cycle"] == 2
+        ws.send_json({"action": "mode", "delta": False})
+        ws.send_json({"action": "step"})
+        state = _frame(ws)["state"]
+        assert "delta" not in state and state["cycle"] == 3 and len(state["registers"]) == 32
+
+
+def test_run_at_a_speed_and_pause():
+    with _connect() as ws:
+        _frame(ws)
+        ws.send_json({"action": "speed", "cycles_per_second": 2 * app.STREAM_MAX_FPS})
+        ws.send_json({"action": "run"})
+        frames = [_frame(ws) for _ in range(4)]
+        assert all(f["running"] for f in frames)
+        cycles = [f["state"]["cycle"] for f in frames]
+        assert [b - a for a, b in zip(cycles, cycles[1:])] == [2, 2, 2]
+        ws.send_json({"action": "pause"})
+        ws.send_json({"action": "step"})
+        last = cycles[-1]
+        frame = _frame(ws)
+        while frame["running"]:  # computed before the pause arrived
+            last = frame["state"]["cycle"]
+            frame = _frame(ws)
+        assert frame["state"]["cycle"] == last + 1
+
+
+def test_breakpoints_stop_the_run():
+    with _connect() as ws:
+        _frame(ws)
+        ws.send_json({"action": "breakpoints", "addresses": ["0x84"]})
+        ws.send_json({"action": "run"})
+        frame = _frame(ws)
+        while frame["running"]:
+            frame = _frame(ws)
+        assert frame["stop_reason"] == "breakpoint" and frame["stop_at"] == "0x00000084"
+
+
+@pytest.mark.parametrize("message", [
+    {"action": "jump"},
+    {"action": "speed", "cycles_per_second": "fast"},
+    {"action": "breakpoints", "addresses": ["zz"]},
+    {"action": "step", "cycles": "many"},
+    ["run"],
+])
+def test_bad_control_messages_are_reported(message):
+    with _connect() as ws:
+        _frame(ws)
+        ws.send_json(message)
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"action": "step"})
+        assert _frame(ws)["state"]["cycle"] == 1
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from benchmarks.run import CORPUS_DIR
+from simulator.pipeline_core import PipelineSimulator
+from simulator.trace import FLAG_FLUSH, FLAG_STALL, TraceReader
+
+SOURCE = (CORPUS_DIR / "branches.asm").read_text()
+CYCLES = 6000
+OPTIONS = [{}, {"hazard_policy": "forward_load_use"}, {"branch_resolution": "id", "branch_predictor": "2bit"}]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_trace_round_trip(options, tmp_path):
+    sim = PipelineSimulator(**options)
+    sim.load_program(SOURCE)
+    trace = sim.start_trace(str(tmp_path / "run.bin"), buffer_records=16)
+    sim.run(CYCLES)
+    trace.flush()
+    with TraceReader(trace.path) as reader:
+        records = list(reader.records())
+        assert [r[0] for r in records] == list(range(sim.cycle))
+        assert sum(1 for r in records if r[6] & FLAG_STALL) == sim.stall_cycles
+        assert sum(1 for r in records if r[6] & FLAG_FLUSH) == sim.flush_count
+        rows = list(reader.diagram())
+        retired = [row for row in rows if row["stages"][-1] == "WB"]
+        assert len(retired) == sim.retired
+        assert not any(row["flushed"] for row in retired)
+        # a slice starts with the instructions already in flight
+        rows = list(reader.diagram(100, 120))
+        assert min(row["first_cycle"] for row in rows) == 100
+        assert max(row["first_cycle"] + len(row["stages"]) - 1 for row in rows) == 120
+    sim.stop_trace()
+
+
+def test_tracing_does_not_change_the_run():
+    plain = PipelineSimulator()
+    plain.load_program(SOURCE)
+    plain.run(CYCLES)
+    traced = PipelineSimulator()
+    traced.load_program(SOURCE)
+    traced.start_trace()
+    traced.run(CYCLES)
+    assert traced.get_state() == plain.get_state()
+    traced.stop_trace()
+
+
+def test_a_full_trace_stops_recording_but_not_the_run():
+    plain = PipelineSimulator()
+    plain.load_program(SOURCE)
+    plain.run(CYCLES)
+    traced = PipelineSimulator()
+    traced.load_program(SOURCE)
+    trace = traced.start_trace(max_cycles=100)
+    traced.run(CYCLES)
+    assert traced.get_state() == plain.get_state()
+    assert trace.full and trace.records == 100 and trace.last_cycle == 99
+    # reloading goes back to cycle 0, which records again
+    traced.load_program(SOURCE)
+    traced.run(50)
+    assert not trace.full and trace.last_cycle == 49
+    traced.stop_trace()
+
+
+def test_reverse_steps_truncate_the_trace():
+    sim = PipelineSimulator(history_size=1024)
+    sim.load_program(SOURCE)
+    trace = sim.start_trace()
+    for _ in range(60):
+        sim.step()
+    sim.back(10)
+    for _ in range(5):
+        sim.step()
+    trace.flush()
+    with TraceReader(trace.path) as reader:
+        assert [r[0] for r in reader.records()] == list(range(sim.cycle))
+    path = trace.path
+    assert sim.stop_trace() is trace
+    assert not os.path.exists(path)  # temporary traces are removed
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a trace at all")
+    with pytest.raises(ValueError):
+        TraceReader(str(path))
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from simulator import core
+from simulator.assembler import assemble
+from simulator.vector_engine import VectorSimulator, run_batch
+
+# lanes take different trip counts and branch directions, and some fault
+DIVERGENT = """
+LW x11, 0(x0)
+ADDI x2, x0, 0
+loop: BGE x0, x10, done
+ADD x2, x2, x11
+SLT x3, x2, x11
+SLL x4, x11, x10
+SW x2, 4(x12)
+ADDI x10, x10, -1
+BEQ x0, x0, loop
+done: OR x5, x2, x3
+"""
+LANES = 24
+
+
+def _inputs(seed: int):
+    rng = random.Random(seed)
+    registers = [{"x10": rng.randint(-3, 20), "x12": rng.choice([0, 8, 16, 300, -8])} for _ in range(LANES)]
+    memory = [{0: rng.getrandbits(32)} for _ in range(LANES)]
+    return registers, memory
+
+
+@pytest.mark.parametrize("max_steps", [7, 40, core.DEFAULT_MAX_STEPS])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_every_lane_matches_the_interpreter(seed, max_steps):
+    registers, memory = _inputs(seed)
+    vector = run_batch(DIVERGENT, registers, memory, max_steps=max_steps)
+    for lane in range(LANES):
+        sim = core.Simulator()
+        sim.load_program(DIVERGENT, registers[lane], memory[lane])
+        sim.run(max_steps, "interp")
+        state = vector.lane_state(lane)
+        assert state["registers"] == [f"0x{r:08x}" for r in sim.registers], lane
+        assert (state["pc"], state["cycle"]) == (f"0x{sim.pc:08x}", sim.cycle), lane
+        assert (state["halted"], state["faulted"]) == (sim.halted, sim.fault is not None), lane
+        assert bytes(vector.memory[lane]) == sim.memory.read_bytes(0, sim.memory_size), lane
+
+
+def test_lanes_and_inputs_are_checked():
+    program = assemble(DIVERGENT, core.PROGRAM_START)
+    with pytest.raises(ValueError):
+        VectorSimulator(program, 0)
+    with pytest.raises(ValueError):
+        VectorSimulator(assemble("ADDI x1, x0", core.PROGRAM_START), 2)
+    with pytest.raises(ValueError):
+        VectorSimulator(program, 2).set_memory([None, {"0xfe": 1}])
+    # x0 stays zero and omitted lanes keep their defaults
+    sim = VectorSimulator(program, 2)
+    sim.set_registers([{"x0": 5, "x10": "0x3"}, None])
+    assert sim.registers[0, 0] == 0 and sim.registers[0, 10] == 3 and not sim.registers[1].any()
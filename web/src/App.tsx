@@ -6,7 +6,7 @@ import BottomPanel from './components/BottomPanel'
 import RegisterInitializer from './components/RegisterInitializer'
 import MemoryEditor from './components/MemoryEditor'
 import { SimulationState, PipelineState, AsmError } from './types'
-import { assembleCode, loadProgram, simStep, simReset } from './services/api'
+import { assembleCode, loadProgram, simStep, simRun, simReset, simTraceStart, simTraceStop, simTraceDiagram, TraceDiagram, SessionExpiredError } from './services/api'
 
 const initialState: SimulationState = {
   pc: '0x00000000',
@@ -21,6 +21,36 @@ const initialState: SimulationState = {
   }
 }
 
+// A stepped state at cycle c holds the latches trace cycle c starts with: the
+// instructions then in ID, EX, MEM and WB
+const STAGE_LATCH: Record<string, string> = { ID: 'IF/ID', EX: 'ID/EX', MEM: 'EX/MEM', WB: 'MEM/WB' }
+const RUN_DIAGRAM_CYCLES = 500 // cycles of a long Run kept in the diagram (the last ones)
+
+// Trace diagram of cycles start..end-1 (a Run) -> the entries stepping would have produced for
+// cycles start+1..end-1. flushCount is the machine's flush count when the run started.
+function traceToHistory(diagram: TraceDiagram, start: number, end: number, flushCount: number){
+  const entries = Array.from({length: Math.max(0, end - start - 1)}, (_, i) => ({
+    cycle: start + i + 1,
+    pipeline: { IF: { stalled: false }, 'IF/ID': { nop: true }, 'ID/EX': { nop: true }, 'EX/MEM': { nop: true }, 'MEM/WB': { nop: true } } as any,
+    flush_count: 0,
+  }))
+  for (const row of diagram.rows || []) {
+    row.stages.forEach((stage, i) => {
+      const entry = entries[row.first_cycle + i - start - 1]
+      if (entry && STAGE_LATCH[stage]) entry.pipeline[STAGE_LATCH[stage]] = { nop: false, raw: row.instruction ?? row.address }
+    })
+  }
+  // the state after cycle c reports what happened in it
+  const stalls = new Set(diagram.stall_cycles || [])
+  const flushes = new Set(diagram.flush_cycles || [])
+  for (const entry of entries) {
+    entry.pipeline.IF.stalled = stalls.has(entry.cycle - 1)
+    if (flushes.has(entry.cycle - 1)) flushCount += 1
+    entry.flush_count = flushCount
+  }
+  return entries
+}
+
 export default function App(){
   const [code, setCode] = useState<string>(`# sample riscv\nLW x1, 0(x2)\nAND x3, x1, x2`)
   const [sim, setSim] = useState<SimulationState>(initialState)
@@ -43,8 +73,9 @@ export default function App(){
     setConsoleLines((l)=>[...l, 'Assembling...'])
     
     try {
-      // assemble + load into sim
-      const res = await loadProgram(code, initialRegisters, initialMemory)
+      // assemble + load into sim; a load starts from scratch, so an expired session is simply replaced
+      const load = () => loadProgram(code, initialRegisters, initialMemory)
+      const res = await load().catch(e => { if (e instanceof SessionExpiredError) return load(); throw e })
       if (res.success) {
         setConsoleLines((l)=>[...l, `✓ Loaded program to simulator`])
         setAssemblerErrors([])
@@ -59,7 +90,7 @@ export default function App(){
           })))
         }
       } else {
-        setConsoleLines((l)=>[...l, `✗ Load failed`, ...((res.errors||[]).map(e=>`Line ${e.line}: ${e.message}`))])
+        setConsoleLines((l)=>[...l, `✗ Load failed`, ...((res.errors||[]).map(e=> e.line != null ? `Line ${e.line}: ${e.message}` : e.message))])
         setAssemblerErrors(res.errors || [])
       }
     } catch (error) {
@@ -93,6 +124,7 @@ export default function App(){
         setConsoleLines(l=>[...l, '✓ Program completed'])
       }
     } catch(e){
+      if (e instanceof SessionExpiredError) return handleSessionExpired()
       setConsoleLines(l=>[...l, `Step failed: ${e instanceof Error? e.message: String(e)}`])
       setIsRunning(false)
     }
@@ -103,45 +135,64 @@ export default function App(){
     setIsRunning(true)
     setConsoleLines(l=>[...l, 'Running...'])
     
-    // Auto-step until halted
-    let stepCount = 0
-    const maxSteps = 1000 // Safety limit
-    
-    while (stepCount < maxSteps && !isHalted) {
-      try {
-        const state = await simStep()
-        setSim(s=>({ ...s, pc: state.pc, registers: state.registers, cycle: state.cycle }))
-        setPipelineState(state.pipeline)
-        setPipelineHistory(h => [...h, { cycle: state.cycle, pipeline: state.pipeline, flush_count: state.flush_count || 0, stall_cycles: state.stall_cycles || 0 }])
-        
-        // Check if halted
-        const allEmpty = state.halted && 
-          state.pipeline['IF/ID']?.nop && 
-          state.pipeline['ID/EX']?.nop && 
-          state.pipeline['EX/MEM']?.nop && 
-          state.pipeline['MEM/WB']?.nop
-        
-        if (allEmpty) {
-          setIsHalted(true)
-          setIsRunning(false)
-          setConsoleLines(l=>[...l, `✓ Program completed in ${state.cycle} cycles (${state.stall_cycles} stalls, ${state.flush_count} flushes)`])
-          break
-        }
-        
-        stepCount++
-      } catch(e) {
-        setConsoleLines(l=>[...l, `Run failed: ${e instanceof Error? e.message: String(e)}`])
-        setIsRunning(false)
-        break
+    // Run server-side until halted or the cycle budget is used up
+    const maxCycles = 10000 // Safety limit
+
+    // trace the run only while the diagram is shown, so other runs stay on the fast path
+    const traced = activeTab === 'pipeline-diagram' && await simTraceStart(maxCycles).then(()=> true, ()=> {
+      setConsoleLines(l=>[...l, '⚠ Pipeline trace unavailable: Run shows only the final cycle'])
+      return false
+    })
+
+    try {
+      const res = await simRun({ max_cycles: maxCycles, max_seconds: 5 })
+      if (!res.success) {
+        setConsoleLines(l=>[...l, ...((res.errors||[]).map((e: AsmError)=>`Run failed: ${e.message}`))])
+        return
       }
-    }
-    
-    if (stepCount >= maxSteps) {
-      setConsoleLines(l=>[...l, `⚠ Stopped after ${maxSteps} cycles (safety limit)`])
+      const state = res.state
+      setSim(s=>({ ...s, pc: state.pc, registers: state.registers, cycle: state.cycle }))
+      setPipelineState(state.pipeline)
+      await showRunDiagram(state, res.stats, traced)
+
+      if (res.stop_reason === 'halted') {
+        setIsHalted(true)
+        setConsoleLines(l=>[...l, `✓ Program completed in ${state.cycle} cycles (${state.stall_cycles} stalls, ${state.flush_count} flushes)`])
+      } else {
+        setConsoleLines(l=>[...l, `⚠ Stopped after ${res.stats.cycles} cycles (${res.stop_reason})`])
+      }
+    } catch(e) {
+      if (e instanceof SessionExpiredError) return handleSessionExpired()
+      setConsoleLines(l=>[...l, `Run failed: ${e instanceof Error? e.message: String(e)}`])
+    } finally {
+      if (traced) simTraceStop().catch(()=>{})
       setIsRunning(false)
     }
   }
   
+  // Draw every cycle of a Run from the pipeline trace, or just its final state without one
+  async function showRunDiagram(state: any, stats: any, traced: boolean){
+    const end = state.cycle
+    const start = end - stats.cycles
+    if (start >= end) return
+    const finalEntry = { cycle: state.cycle, pipeline: state.pipeline, flush_count: state.flush_count || 0, stall_cycles: state.stall_cycles || 0 }
+    if (traced) {
+      try {
+        const diagram = await simTraceDiagram(start, end - 1)
+        if (diagram.success && diagram.rows) {
+          const entries = [...traceToHistory(diagram, start, end, finalEntry.flush_count - stats.flush_count), finalEntry]
+          // a long run replaces the diagram with its last cycles; a short one extends it
+          setPipelineHistory(h => entries.length > RUN_DIAGRAM_CYCLES ? entries.slice(-RUN_DIAGRAM_CYCLES)
+            : h.length && h[h.length - 1].cycle === start ? [...h, ...entries] : entries)
+          return
+        }
+      } catch {
+        // no trace: fall back to the final state
+      }
+    }
+    setPipelineHistory(h => [...h, finalEntry])
+  }
+
   function handlePause(){
     setIsRunning(false)
     setConsoleLines(l=>[...l, 'Paused'])
@@ -155,7 +206,17 @@ export default function App(){
       setAssemblerErrors([])
       setPipelineHistory([])
       setIsHalted(false)
-    }).catch(e=> setConsoleLines(l=>[...l, `Reset failed: ${e instanceof Error? e.message: String(e)}`]))
+    }).catch(e=> e instanceof SessionExpiredError ? handleSessionExpired()
+      : setConsoleLines(l=>[...l, `Reset failed: ${e instanceof Error? e.message: String(e)}`]))
+  }
+
+  // The server dropped the session and its machine: say so and load the program into a new one
+  async function handleSessionExpired(){
+    setIsRunning(false)
+    setSim(initialState)
+    setPipelineHistory([])
+    setConsoleLines(l=>[...l, '⚠ Simulator session expired; reloading the program into a new session (back to cycle 0)'])
+    await handleAssemble()
   }
 
   return (
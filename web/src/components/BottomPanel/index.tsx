@@ -15,7 +15,8 @@ export default function BottomPanel({ activeTab, onSelectTab, pipelineHistory =
     const instructionMap = new Map<string, Array<{cycle: number, stage: string, isStall?: boolean}>>()
     const flushCycles = new Set<number>()
     
-    let prevFlushCount = 0
+    // a diagram that starts mid-program (the tail of a long Run) counts flushes from its first cycle
+    let prevFlushCount = pipelineHistory[0].cycle > 1 ? pipelineHistory[0].flush_count || 0 : 0
     
     pipelineHistory.forEach((entry, idx) => {
       const pipeline = entry.pipeline
@@ -65,6 +66,9 @@ export default function BottomPanel({ activeTab, onSelectTab, pipelineHistory =
   
   const {diagram: pipelineDiagram, flushCycles} = buildPipelineDiagram()
   const maxCycle = pipelineHistory.length > 0 ? pipelineHistory[pipelineHistory.length - 1].cycle : 0
+  // a Run may only bring its last cycles, so the diagram starts at the first one held
+  const minCycle = pipelineHistory.length > 0 ? pipelineHistory[0].cycle : 1
+  const cycles = Array.from({length: Math.max(0, maxCycle - minCycle + 1)}, (_, i) => minCycle + i)
   
   const cycleInfo = new Map<number, {stall: boolean, flush: boolean}>()
   pipelineHistory.forEach((entry) => {
@@ -132,7 +136,7 @@ export default function BottomPanel({ activeTab, onSelectTab, pipelineHistory =
                   <thead>
                     <tr className="bg-[#7aa2f7]">
                       <th className="border border-[#292e42] px-4 py-2 text-left text-[#1a1b26] font-bold sticky left-0 bg-[#7aa2f7] z-10">Instruction</th>
-                      {Array.from({length: maxCycle}, (_, i) => i + 1).map(cycle => {
+                      {cycles.map(cycle => {
                         const info = cycleInfo.get(cycle)
                         let cycleLabel = cycle.toString()
                         let bgColor = ''
@@ -162,7 +166,7 @@ export default function BottomPanel({ activeTab, onSelectTab, pipelineHistory =
                         <td className="border border-[#292e42] px-4 py-2 text-[#a9b1d6] sticky left-0 bg-[#24283b] z-10 whitespace-nowrap">
                           {item.instruction}
                         </td>
-                        {Array.from({length: maxCycle}, (_, i) => i + 1).map(cycle => {
+                        {cycles.map(cycle => {
                           const stageAtCycle = item.stages.find(s => s.cycle === cycle)
                           const info = cycleInfo.get(cycle)
                           let bgColor = 'bg-[#1a1b26]'
@@ -19,7 +19,7 @@ export default function CodePanel({ code, onChange, highlightedLines = [], assem
       />
       <div className="mt-2 text-xs text-[#f7768e]">
         {assemblerErrors.map((err, i) => (
-          <div key={i}>Line {err.line ?? '?'}: {err.message}</div>
+          <div key={i}>{err.line != null ? `Line ${err.line}: ` : ''}{err.message}</div>
         ))}
       </div>
     </div>
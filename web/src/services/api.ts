@@ -7,7 +7,7 @@ export interface AssembleRequest {
 }
 
 export interface AssembleError {
-  line: number
+  line?: number  // absent for errors outside the source (initial registers/memory)
   message: string
   severity: 'error' | 'warn'
 }
@@ -38,8 +38,43 @@ export async function assembleCode(source: string): Promise<AssembleResponse> {
   return await response.json()
 }
 
+// Each browser tab gets its own simulator session on the backend
+let sessionId: Promise<string> | null = null
+
+function getSessionId(): Promise<string> {
+  if (!sessionId) {
+    sessionId = fetch(`${API_BASE_URL}/api/sessions`, { method: 'POST' })
+      .then(r => { if (!r.ok) throw new Error(`HTTP ${r.status}`); return r.json() })
+      .then(r => r.session_id as string)
+      .catch(e => { sessionId = null; throw e })
+  }
+  return sessionId
+}
+
+// Thrown when the server no longer knows this tab's session (idle timeout, eviction or restart).
+// The next request starts a new, empty session, so callers must load the program again.
+export class SessionExpiredError extends Error {
+  constructor() {
+    super('Simulator session expired')
+    this.name = 'SessionExpiredError'
+  }
+}
+
+async function simFetch(path: string, init: RequestInit = {}): Promise<Response> {
+  const url = `${API_BASE_URL}${path}${path.includes('?') ? '&' : '?'}session_id=${encodeURIComponent(await getSessionId())}`
+  const response = await fetch(url, init)
+  if (response.status === 404) {
+    const body = await response.clone().json().catch(() => null)
+    if (typeof body?.detail === 'string' && body.detail.startsWith('Unknown or expired session')) {
+      sessionId = null
+      throw new SessionExpiredError()
+    }
+  }
+  return response
+}
+
 export async function loadProgram(source: string, initialRegisters?: Record<string, number>, initialMemory?: Record<string, number|string>): Promise<{ success: boolean; errors?: AssembleError[]; instructions?: any[]; labels?: Record<string, string> }> {
-  const response = await fetch(`${API_BASE_URL}/api/sim/load`, {
+  const response = await simFetch('/api/sim/load', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify({ source, initial_registers: initialRegisters, initial_memory: initialMemory }),
@@ -49,13 +84,66 @@ export async function loadProgram(source: string, initialRegisters?: Record<stri
 }
 
 export async function simStep(): Promise<any> {
-  const response = await fetch(`${API_BASE_URL}/api/sim/step`, { method: 'POST' })
+  const response = await simFetch('/api/sim/step', { method: 'POST' })
+  if (!response.ok) throw new Error(`HTTP ${response.status}`)
+  return response.json()
+}
+
+export interface SimRunOptions {
+  max_cycles?: number
+  max_seconds?: number
+  breakpoints?: Array<number | string>
+  watch_registers?: Array<number | string>
+  watch_memory?: Array<number | string>
+}
+
+export async function simRun(options: SimRunOptions = {}): Promise<any> {
+  const response = await simFetch('/api/sim/run', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(options),
+  })
   if (!response.ok) throw new Error(`HTTP ${response.status}`)
   return response.json()
 }
 
 export async function simReset(): Promise<{ success: boolean }> {
-  const response = await fetch(`${API_BASE_URL}/api/sim/reset`, { method: 'POST' })
+  const response = await simFetch('/api/sim/reset', { method: 'POST' })
+  if (!response.ok) throw new Error(`HTTP ${response.status}`)
+  return response.json()
+}
+
+// Pipeline traces: the server records every cycle, so a Run can still be drawn cycle by cycle
+export interface TraceDiagramRow {
+  address: string
+  first_cycle: number
+  stages: string[]  // stage at first_cycle + i
+  flushed: boolean
+  instruction: string | null
+}
+
+// Record up to maxCycles following cycles (replaces a running trace)
+export async function simTraceStart(maxCycles: number): Promise<{ success: boolean }> {
+  const response = await simFetch(`/api/sim/trace?max_cycles=${maxCycles}`, { method: 'POST' })
+  if (!response.ok) throw new Error(`HTTP ${response.status}`)
+  return response.json()
+}
+
+export async function simTraceStop(): Promise<void> {
+  const response = await simFetch('/api/sim/trace', { method: 'DELETE' })
+  if (!response.ok) throw new Error(`HTTP ${response.status}`)
+}
+
+export interface TraceDiagram {
+  success: boolean
+  rows?: TraceDiagramRow[]
+  stall_cycles?: number[]  // cycles in which ID stalled
+  flush_cycles?: number[]  // cycles in which a mispredict flushed the pipeline
+  errors?: AssembleError[]
+}
+
+export async function simTraceDiagram(firstCycle: number, lastCycle: number): Promise<TraceDiagram> {
+  const response = await simFetch(`/api/sim/trace/diagram?first_cycle=${firstCycle}&last_cycle=${lastCycle}`)
   if (!response.ok) throw new Error(`HTTP ${response.status}`)
   return response.json()
 }